@@ -3,12 +3,17 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
+import math
 import statistics
 import requests
 
+from http_session import get_session
+from event_bus import EventBus, get_event_bus
+
 class AlertSystem:
-    def __init__(self, email_config: Dict[str, str] = None):
+    def __init__(self, email_config: Dict[str, str] = None, session: requests.Session = None,
+                 event_bus: EventBus = None, storage=None, max_history: int = 1000):
         """
         Initialize the alert system.
         
@@ -16,32 +21,42 @@ class AlertSystem:
             email_config: Dictionary with email configuration
                          {'smtp_server': 'smtp.gmail.com', 'smtp_port': 587, 
                           'email': 'your_email@gmail.com', 'password': 'your_password'}
+            session: HTTP session for webhooks (defaults to the shared pooled session)
+            event_bus: Bus new alerts are published to (defaults to the shared bus)
+            storage: DataStorage alerts are saved to. With it, query_alerts(),
+                     get_recent_alerts() and get_alert_summary() read the indexed
+                     table and only the last max_history alerts stay in memory.
+            max_history: Alerts kept in memory when a storage is set
         """
         self.email_config = email_config
+        self.session = session or get_session()
+        self.event_bus = event_bus or get_event_bus()
+        self.storage = storage
+        self.max_history = max_history
         self.alert_history = []
+        self._next_seq = 1
         
         # Thresholds for different alert types
         self.volume_threshold_multiplier = 3.0  # 3x normal volume
         self.price_change_threshold = 0.15  # 15% price change
         self.sentiment_threshold = 0.7  # High confidence sentiment
         
-    def detect_volume_anomaly(self, current_volume: float, historical_volumes: List[float]) -> Dict[str, Any]:
+    def detect_volume_anomaly(self, current_volume: float, historical_volumes: Sequence[float]) -> Dict[str, Any]:
         """
         Detect if current volume is anomalously high.
         
         Args:
             current_volume: Current trading volume
-            historical_volumes: List of historical volumes for comparison
+            historical_volumes: Historical volumes for comparison; a list or an array
+                                (e.g. a HistoryCache column), NaN values are ignored
             
         Returns:
             Dictionary with anomaly detection results
         """
-        if not historical_volumes or len(historical_volumes) < 5:
+        avg_volume, std_volume, count = _mean_std(historical_volumes)
+        if count < 5:
             return {"anomaly_detected": False, "reason": "Insufficient historical data"}
         
-        avg_volume = statistics.mean(historical_volumes)
-        std_volume = statistics.stdev(historical_volumes) if len(historical_volumes) > 1 else 0
-        
         # Calculate z-score
         z_score = (current_volume - avg_volume) / std_volume if std_volume > 0 else 0
         
@@ -54,16 +69,16 @@ class AlertSystem:
         )
         
         return {
-            "anomaly_detected": anomaly_detected,
-            "current_volume": current_volume,
+            "anomaly_detected": bool(anomaly_detected),
+            "current_volume": float(current_volume),
             "average_volume": avg_volume,
-            "volume_multiplier": volume_multiplier,
-            "z_score": z_score,
+            "volume_multiplier": float(volume_multiplier),
+            "z_score": float(z_score),
             "threshold_multiplier": self.volume_threshold_multiplier
         }
     
     def detect_pump_and_dump_pattern(self, price_history: List[Dict[str, float]], 
-                                   volume_history: List[float]) -> Dict[str, Any]:
+                                   volume_history: Sequence[float]) -> Dict[str, Any]:
         """
         Detect potential pump and dump patterns.
         
@@ -77,9 +92,28 @@ class AlertSystem:
         if len(price_history) < 10 or len(volume_history) < 10:
             return {"pattern_detected": False, "reason": "Insufficient data"}
         
+        return self.detect_pump_and_dump_arrays([p["close"] for p in price_history[-10:]], volume_history)
+    
+    def detect_pump_and_dump_arrays(self, closes: Sequence[float], volumes: Sequence[float]) -> Dict[str, Any]:
+        """
+        Detect potential pump and dump patterns from close and volume columns.
+        
+        Only the last 10 values are read, so the columns can be long arrays
+        (e.g. memory-mapped HistoryCache views) without being copied.
+        
+        Args:
+            closes: Close prices, oldest first
+            volumes: Volumes, oldest first
+            
+        Returns:
+            Dictionary with pump and dump detection results
+        """
+        if len(closes) < 10 or len(volumes) < 10:
+            return {"pattern_detected": False, "reason": "Insufficient data"}
+        
         # Get recent price changes
-        recent_prices = [p["close"] for p in price_history[-10:]]
-        recent_volumes = volume_history[-10:]
+        recent_prices = [float(p) for p in closes[len(closes) - 10:]]
+        recent_volumes = [float(v) for v in volumes[len(volumes) - 10:]]
         
         # Calculate price change over recent period
         price_change = (recent_prices[-1] - recent_prices[0]) / recent_prices[0]
@@ -182,7 +216,17 @@ class AlertSystem:
             "message": self._generate_alert_message(alert_type, asset_name, data)
         }
         
+        # "seq" orders alerts for cursor pagination: the row id when stored, a counter otherwise
+        if self.storage is not None:
+            alert["seq"] = self.storage.save_alert(alert)
+        else:
+            alert["seq"] = self._next_seq
+            self._next_seq += 1
+        
         self.alert_history.append(alert)
+        if self.storage is not None and len(self.alert_history) > 2 * self.max_history:
+            del self.alert_history[:-self.max_history]
+        self.event_bus.publish(f"alerts.{asset_name}", alert)
         return alert
     
     def _generate_alert_message(self, alert_type: str, asset_name: str, 
@@ -286,7 +330,7 @@ class AlertSystem:
                 ]
             }
             
-            response = requests.post(webhook_url, json=payload)
+            response = self.session.post(webhook_url, json=payload)
             return response.status_code == 200
             
         except Exception as e:
@@ -294,19 +338,66 @@ class AlertSystem:
             return False
     
     def get_recent_alerts(self, hours: int = 24) -> List[Dict[str, Any]]:
-        """Get alerts from the last N hours."""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        """Get alerts from the last N hours, oldest first."""
+        cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
         
-        recent_alerts = []
-        for alert in self.alert_history:
-            alert_time = datetime.fromisoformat(alert['timestamp'])
-            if alert_time > cutoff_time:
-                recent_alerts.append(alert)
+        if self.storage is not None:
+            # alert_history is trimmed when stored, so it may not cover the window
+            return self.storage.get_alerts(since=cutoff, limit=None)[::-1]
+        
+        # Alerts are appended in time order, so walk back from the newest
+        start = len(self.alert_history)
+        while start > 0 and self.alert_history[start - 1]['timestamp'] > cutoff:
+            start -= 1
+        
+        return self.alert_history[start:]
+    
+    def query_alerts(self, since: datetime = None, before: int = None, limit: int = 100,
+                     types: List[str] = None, assets: List[str] = None,
+                     compact: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get alerts newest first, one page at a time.
         
-        return recent_alerts
+        Args:
+            since: Only alerts at or after this time
+            before: Only alerts whose "seq" is below this one (the last seq of the previous page)
+            limit: Maximum number of alerts
+            types: Only these alert types
+            assets: Only alerts for these assets
+            compact: Leave out each alert's detection data
+            
+        Returns:
+            List of alert dictionaries
+        """
+        if self.storage is not None:
+            return self.storage.get_alerts(since, before, limit, types, assets, include_data=not compact)
+        
+        cutoff = since.isoformat() if since else None
+        alerts = []
+        for alert in reversed(self.alert_history):
+            if cutoff and alert['timestamp'] < cutoff:
+                break
+            if before is not None and alert['seq'] >= before:
+                continue
+            if (types and alert['type'] not in types) or (assets and alert['asset_name'] not in assets):
+                continue
+            if compact:
+                alert = {key: value for key, value in alert.items() if key != 'data'}
+            alerts.append(alert)
+            if len(alerts) >= limit:
+                break
+        return alerts
     
     def get_alert_summary(self) -> Dict[str, Any]:
         """Get summary of all alerts."""
+        if self.storage is not None:
+            summary = self.storage.count_alerts()
+            if not summary["total_alerts"]:
+                return {"total_alerts": 0}
+            cutoff = datetime.now() - timedelta(hours=24)
+            summary["recent_alerts_24h"] = self.storage.count_alerts(since=cutoff)["total_alerts"]
+            return summary
+        
         if not self.alert_history:
             return {"total_alerts": 0}
         
@@ -328,3 +419,18 @@ class AlertSystem:
             "recent_alerts_24h": len(self.get_recent_alerts(24))
         }
 
+
+def _mean_std(values: Sequence[float]):
+    """Mean, sample standard deviation and count of the non-NaN values of a list or array."""
+    if hasattr(values, "dtype"):
+        # NumPy array: reduce without materializing Python floats
+        import numpy as np
+        values = values[~np.isnan(values)]
+        count = int(values.size)
+        if count == 0:
+            return 0.0, 0.0, 0
+        return float(values.mean()), float(values.std(ddof=1)) if count > 1 else 0.0, count
+    values = [v for v in values if v is not None and not math.isnan(v)]
+    if not values:
+        return 0.0, 0.0, 0
+    return statistics.mean(values), statistics.stdev(values) if len(values) > 1 else 0, len(values)
@@ -1,44 +1,287 @@
-import yfinance as yf
 import requests
 import json
 
+from http_session import get_session
+from rate_limiter import get_limiter
+from response_cache import get_response_cache, make_key, is_cacheable
+
+# Transport errors worth retrying with backoff
+RETRYABLE_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+def _is_yahoo_rate_limit(error):
+    message = str(error)
+    return type(error).__name__ == "YFRateLimitError" or "Too Many Requests" in message or "Rate limited" in message
+
+def _is_alpha_vantage_throttled(response):
+    # Alpha Vantage answers throttled calls with HTTP 200 and a "Note"/"Information" message
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    message = str(body.get("Note") or body.get("Information") or "") if isinstance(body, dict) else ""
+    return "call frequency" in message or "rate limit" in message.lower()
+
+def _is_alpha_vantage_cacheable(body):
+    # Throttle notes and bad-symbol messages also come back as HTTP 200
+    return isinstance(body, dict) and is_cacheable(body) and not any(k in body for k in ("Note", "Information", "Error Message"))
+
 class YahooFinanceAPI:
-    def get_stock_data(self, ticker):
+    provider = "yahoo"
+    # Seconds each response stays in the shared cache. .info is a slow page
+    # scrape that changes rarely, so it is kept much longer than price history.
+    CACHE_TTLS = {"info": 3600, "history": 60}
+
+    def __init__(self, session=None, cache_ttls=None):
+        # yfinance manages its own pooled session unless one is given explicitly
+        self.session = session
+        self.cache_ttls = dict(self.CACHE_TTLS, **(cache_ttls or {}))
+
+    def _ticker(self, ticker):
+        # yfinance (and pandas with it) is imported on first use, not when the app boots
+        import yfinance as yf
+        return yf.Ticker(ticker, session=self.session) if self.session else yf.Ticker(ticker)
+
+    def _call(self, func):
+        return get_limiter(self.provider).call(func, _is_yahoo_rate_limit)
+
+    def _history_key(self, ticker, period, interval):
+        return make_key(self.provider, "history", {"ticker": ticker, "period": period, "interval": interval})
+
+    def get_stock_data(self, ticker, include_info=True):
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            hist = stock.history(period="1d")
-            return {"info": info, "history": hist.to_dict()}
+            info = self.get_info(ticker) if include_info else {}
+            history = get_response_cache().get_or_load(
+                self._history_key(ticker, "1d", "1d"),
+                lambda: self._call(lambda: self._ticker(ticker).history(period="1d")).to_dict(),
+                ttl=self.cache_ttls["history"]
+            )
+            return {"info": info, "history": history}
         except Exception as e:
             return {"error": str(e)}
 
+    def get_info(self, ticker):
+        """Get the .info dictionary for a ticker, scraping it at most once per TTL."""
+        return get_response_cache().get_or_load(
+            make_key(self.provider, "info", {"ticker": ticker}),
+            lambda: self._call(lambda: self._ticker(ticker).info),
+            ttl=self.cache_ttls["info"]
+        )
+
+    def get_stocks_data(self, tickers, period="1d", interval="1d", include_info=False):
+        """
+        Get history for many tickers with a single yf.download call.
+
+        Args:
+            tickers: Iterable of ticker symbols
+            period: History period passed to yfinance
+            interval: Bar interval passed to yfinance
+            include_info: Also attach the (cached) .info dictionary for each ticker
+
+        Returns:
+            Dictionary {ticker: {"info": ..., "history": ...}}; tickers that could not
+            be fetched map to {"error": ...}
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+
+        # Serve what other callers fetched recently; download only the rest
+        cache = get_response_cache()
+        histories = {}
+        missing = []
+        for ticker in tickers:
+            history = cache.get(self._history_key(ticker, period, interval))
+            if history is None:
+                missing.append(ticker)
+            else:
+                histories[ticker] = history
+
+        results = {}
+        if missing:
+            import pandas as pd
+            import yfinance as yf
+            try:
+                # Identical concurrent downloads are coalesced; the frame itself is not
+                # cached, only the per-ticker histories extracted from it
+                frame = cache.get_or_load(
+                    make_key(self.provider, "download", {"tickers": sorted(missing), "period": period, "interval": interval}),
+                    lambda: self._call(lambda: yf.download(
+                        missing, period=period, interval=interval, group_by="ticker",
+                        auto_adjust=True, threads=True, progress=False, session=self.session
+                    )),
+                    cache_if=lambda value: False
+                )
+            except Exception as e:
+                frame = None
+                for ticker in missing:
+                    results[ticker] = {"error": str(e)}
+
+            for ticker in missing if frame is not None else []:
+                try:
+                    if isinstance(frame.columns, pd.MultiIndex):
+                        if ticker not in frame.columns.get_level_values(0):
+                            results[ticker] = {"error": f"No data returned for {ticker}"}
+                            continue
+                        hist = frame[ticker]
+                    else:
+                        hist = frame
+                    hist = hist.dropna(how="all")
+                    if hist.empty:
+                        results[ticker] = {"error": f"No data returned for {ticker}"}
+                        continue
+
+                    histories[ticker] = hist.to_dict()
+                    cache.set(self._history_key(ticker, period, interval), histories[ticker],
+                              ttl=self.cache_ttls["history"])
+                except Exception as e:
+                    results[ticker] = {"error": str(e)}
+
+        for ticker in tickers:
+            if ticker not in histories:
+                continue
+            try:
+                info = self.get_info(ticker) if include_info else {}
+                results[ticker] = {"info": info, "history": histories[ticker]}
+            except Exception as e:
+                results[ticker] = {"error": str(e)}
+        return {ticker: results[ticker] for ticker in tickers}
+
 class CoinGeckoAPI:
     BASE_URL = "https://api.coingecko.com/api/v3"
+    # /simple/price accepts a comma-separated id list; keep each request within
+    # the documented id count and a conservative URL length.
+    MAX_IDS_PER_REQUEST = 250
+    MAX_IDS_PARAM_LENGTH = 4000
+
+    provider = "coingecko"
+    # Seconds each response stays in the shared cache
+    CACHE_TTLS = {"simple/price": 30, "market_chart": 120}
+
+    def __init__(self, session=None, cache_ttls=None):
+        self.session = session or get_session()
+        self.cache_ttls = dict(self.CACHE_TTLS, **(cache_ttls or {}))
+
+    def _fetch_json(self, url, params):
+        # Rate limited per provider; 429s are retried with backoff before giving up
+        response = get_limiter(self.provider).request(
+            lambda: self.session.get(url, params=params),
+            retry_exceptions=RETRYABLE_EXCEPTIONS
+        )
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        return response.json()
+
+    def _get_json(self, url, params, ttl):
+        return get_response_cache().get_or_load(
+            make_key(self.provider, url, params), lambda: self._fetch_json(url, params),
+            ttl=ttl, cache_if=is_cacheable
+        )
+
+    def _price_key(self, coin_id, vs_currencies):
+        return make_key(self.provider, "simple/price", {"id": coin_id, "vs_currencies": vs_currencies})
 
     def get_coin_price(self, coin_id, vs_currencies="usd"):
         try:
-            url = f"{self.BASE_URL}/simple/price?ids={coin_id}&vs_currencies={vs_currencies}"
-            response = requests.get(url)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            return response.json()
+            url = f"{self.BASE_URL}/simple/price"
+            params = {"ids": coin_id, "vs_currencies": vs_currencies}
+            return self._get_json(url, params, self.cache_ttls["simple/price"])
         except requests.exceptions.RequestException as e:
             return {"error": str(e)}
 
+    def get_coin_prices(self, ids, vs_currencies="usd"):
+        """
+        Get prices for many coins using as few /simple/price requests as possible.
+
+        Args:
+            ids: Iterable of CoinGecko coin ids
+            vs_currencies: Comma-separated string or list of quote currencies
+
+        Returns:
+            Dictionary {coin_id: {currency: price}}, or {"error": ...} if every request failed
+        """
+        if not isinstance(vs_currencies, str):
+            vs_currencies = ",".join(vs_currencies)
+        unique_ids = list(dict.fromkeys(ids))
+        if not unique_ids:
+            return {}
+
+        # Prices are cached per coin so overlapping watchlists share entries
+        cache = get_response_cache()
+        prices = {}
+        missing = []
+        for coin_id in unique_ids:
+            price = cache.get(self._price_key(coin_id, vs_currencies))
+            if price is None:
+                missing.append(coin_id)
+            else:
+                prices[coin_id] = price
+
+        errors = []
+        url = f"{self.BASE_URL}/simple/price"
+        for chunk in self._chunk_ids(missing):
+            try:
+                result = self._fetch_json(url, {"ids": ",".join(chunk), "vs_currencies": vs_currencies})
+            except requests.exceptions.RequestException as e:
+                errors.append(str(e))
+                print(f"Error fetching prices for {len(chunk)} coins: {e}")
+                continue
+            for coin_id, price in result.items():
+                cache.set(self._price_key(coin_id, vs_currencies), price, ttl=self.cache_ttls["simple/price"])
+            prices.update(result)
+
+        if errors and not prices:
+            return {"error": "; ".join(errors)}
+        return prices
+
+    def _chunk_ids(self, ids):
+        chunk = []
+        length = 0
+        for coin_id in ids:
+            added = len(coin_id) + (1 if chunk else 0)
+            if chunk and (len(chunk) >= self.MAX_IDS_PER_REQUEST or length + added > self.MAX_IDS_PARAM_LENGTH):
+                yield chunk
+                chunk, length, added = [], 0, len(coin_id)
+            chunk.append(coin_id)
+            length += added
+        if chunk:
+            yield chunk
+
     def get_coin_market_chart(self, coin_id, vs_currency="usd", days="1"):
         try:
-            url = f"{self.BASE_URL}/coins/{coin_id}/market_chart?vs_currency={vs_currency}&days={days}"
-            response = requests.get(url)
-            response.raise_for_status()
-            return response.json()
+            url = f"{self.BASE_URL}/coins/{coin_id}/market_chart"
+            params = {"vs_currency": vs_currency, "days": days}
+            return self._get_json(url, params, self.cache_ttls["market_chart"])
         except requests.exceptions.RequestException as e:
             return {"error": str(e)}
 
 class AlphaVantageAPI:
     # This class will be implemented later, as it requires an API key and has rate limits.
     # For now, we'll focus on Yahoo Finance and CoinGecko.
-    def __init__(self, api_key):
+    provider = "alphavantage"
+    # Free-tier calls are scarce, so responses are kept for a while
+    CACHE_TTL = 300
+
+    def __init__(self, api_key, session=None, cache_ttl=CACHE_TTL):
         self.api_key = api_key
         self.BASE_URL = "https://www.alphavantage.co/query"
+        self.session = session or get_session()
+        self.cache_ttl = cache_ttl
+
+    def _fetch_json(self, params):
+        response = get_limiter(self.provider).request(
+            lambda: self.session.get(self.BASE_URL, params=params),
+            is_throttled=_is_alpha_vantage_throttled,
+            retry_exceptions=RETRYABLE_EXCEPTIONS
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _get_json(self, params):
+        # The API key is not part of the cache key
+        key_params = {k: v for k, v in params.items() if k != "apikey"}
+        return get_response_cache().get_or_load(
+            make_key(self.provider, self.BASE_URL, key_params), lambda: self._fetch_json(params),
+            ttl=self.cache_ttl, cache_if=_is_alpha_vantage_cacheable
+        )
 
     def get_daily_adjusted(self, symbol):
         try:
@@ -47,9 +290,7 @@ class AlphaVantageAPI:
                 "symbol": symbol,
                 "apikey": self.api_key
             }
-            response = requests.get(self.BASE_URL, params=params)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(params)
         except requests.exceptions.RequestException as e:
             return {"error": str(e)}
 
@@ -61,11 +302,6 @@ class AlphaVantageAPI:
                 "interval": interval,
                 "apikey": self.api_key
             }
-            response = requests.get(self.BASE_URL, params=params)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(params)
         except requests.exceptions.RequestException as e:
             return {"error": str(e)}
-
-
-
@@ -0,0 +1,162 @@
+import gzip
+import json
+from dataclasses import asdict, is_dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent as is; compressing them saves less than the headers cost
+MIN_COMPRESS_SIZE = 1024
+
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/plain", "text/csv")
+
+
+def _default(value: Any) -> Any:
+    """Encode types neither encoder handles natively."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    # NumPy scalars and arrays
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(value: Any) -> bytes:
+        """
+        Serialize to compact JSON bytes.
+
+        datetimes, enums, dataclasses and NumPy values are encoded natively
+        (orjson when installed, the json module otherwise), so callers can
+        pass them without converting them first.
+        """
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+else:
+    _encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+
+    def dumps(value: Any) -> bytes:
+        """Serialize to compact JSON bytes with the json module (same output types as with orjson)."""
+        return _encoder.encode(value).encode()
+
+
+def loads(data) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best content coding the client accepts: 'br' (if brotli is installed), 'gzip' or None."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        # mtime=0 keeps the output (and so its ETag) the same for the same body
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def response_encoding(size: int, accept_encoding: Optional[str], content_type: str) -> Optional[str]:
+    """Content coding for a response of this size and type, or None to send it uncompressed."""
+    if size < MIN_COMPRESS_SIZE or not (content_type or "").startswith(COMPRESSIBLE_TYPES):
+        return None
+    return choose_encoding(accept_encoding)
+
+
+def negotiate(body: bytes, accept_encoding: Optional[str], content_type: str = "application/json",
+              cache: Dict[str, bytes] = None) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress a body for a client if it is worth it.
+
+    Args:
+        body: Uncompressed response body
+        accept_encoding: The request's Accept-Encoding header
+        content_type: Response content type; only text-like types are compressed
+        cache: Dict of already compressed bodies by encoding, filled in as needed
+
+    Returns:
+        (body, content coding or None if sent uncompressed)
+    """
+    encoding = response_encoding(len(body), accept_encoding, content_type)
+    if encoding is None:
+        return body, None
+    if cache is None:
+        return compress(body, encoding), encoding
+    if encoding not in cache:
+        cache[encoding] = compress(body, encoding)
+    return cache[encoding], encoding
+
+
+def json_response(payload: Any, status: int = 200):
+    """Flask response with the payload serialized by dumps() (drop-in for jsonify)."""
+    from flask import Response
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+def compress_response(response):
+    """
+    after_request hook compressing JSON and text responses for clients that accept it.
+
+    Responses that are streamed, already encoded or small are left alone.
+    """
+    from flask import request
+    response.vary.add("Accept-Encoding")
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or "Content-Encoding" in response.headers):
+        return response
+    body, encoding = negotiate(response.get_data(), request.headers.get("Accept-Encoding"),
+                               response.mimetype or "")
+    if encoding:
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            # Same content, different bytes: the validator becomes weak
+            response.headers["ETag"] = "W/" + etag
+    return response
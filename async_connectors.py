@@ -0,0 +1,189 @@
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable
+
+from api_connectors import YahooFinanceAPI, CoinGeckoAPI, AlphaVantageAPI
+
+# Maximum number of in-flight requests per provider, shared by every
+# async connector instance in the process.
+PROVIDER_CONCURRENCY = {
+    "yahoo": 4,
+    "coingecko": 4,
+    "alphavantage": 1,
+}
+
+
+class ProviderConcurrency:
+    """
+    Bounds concurrent calls per provider.
+
+    Each event loop gets its own asyncio.Semaphore per provider, and the
+    blocking connector call runs on a per-provider thread pool of the same
+    size, so the limit also holds when several loops run in different threads.
+    """
+
+    def __init__(self, limits: Dict[str, int] = None):
+        self.limits = dict(limits or PROVIDER_CONCURRENCY)
+        self._executors = {}
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def set_limit(self, provider: str, limit: int):
+        """Change the concurrency limit of a provider (applies to new loops and pools)."""
+        with self._lock:
+            self.limits[provider] = limit
+            executor = self._executors.pop(provider, None)
+        if executor:
+            executor.shutdown(wait=False)
+
+    def _executor(self, provider: str) -> ThreadPoolExecutor:
+        with self._lock:
+            if provider not in self._executors:
+                self._executors[provider] = ThreadPoolExecutor(
+                    max_workers=self.limits.get(provider, 1),
+                    thread_name_prefix=f"{provider}-connector"
+                )
+            return self._executors[provider]
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._semaphores.setdefault(loop, {})
+            if provider not in semaphores:
+                semaphores[provider] = asyncio.Semaphore(self.limits.get(provider, 1))
+            return semaphores[provider]
+
+    async def run(self, provider: str, func, *args, **kwargs):
+        """Run a blocking connector call within the provider's concurrency limit."""
+        async with self._semaphore(provider):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor(provider), functools.partial(func, *args, **kwargs)
+            )
+
+
+concurrency = ProviderConcurrency()
+
+
+async def _gather_by_key(keys: Iterable[str], make_call) -> Dict[str, Any]:
+    keys = list(dict.fromkeys(keys))
+    results = await asyncio.gather(*(make_call(key) for key in keys), return_exceptions=True)
+    return {
+        key: ({"error": str(result)} if isinstance(result, BaseException) else result)
+        for key, result in zip(keys, results)
+    }
+
+
+class AsyncYahooFinanceAPI:
+    provider = "yahoo"
+
+    def __init__(self, api: YahooFinanceAPI = None):
+        self.api = api or YahooFinanceAPI()
+
+    async def get_stock_data(self, ticker, include_info=True):
+        return await concurrency.run(self.provider, self.api.get_stock_data, ticker, include_info)
+
+    async def get_stocks_data(self, tickers, period="1d", interval="1d", include_info=False):
+        # yf.download already fetches many tickers in one call
+        return await concurrency.run(
+            self.provider, self.api.get_stocks_data, list(tickers), period, interval, include_info
+        )
+
+    async def get_info(self, ticker):
+        return await concurrency.run(self.provider, self.api.get_info, ticker)
+
+    async def get_infos(self, tickers) -> Dict[str, Any]:
+        return await _gather_by_key(tickers, self.get_info)
+
+
+class AsyncCoinGeckoAPI:
+    provider = "coingecko"
+
+    def __init__(self, api: CoinGeckoAPI = None):
+        self.api = api or CoinGeckoAPI()
+
+    async def get_coin_price(self, coin_id, vs_currencies="usd"):
+        return await concurrency.run(self.provider, self.api.get_coin_price, coin_id, vs_currencies)
+
+    async def get_coin_prices(self, ids, vs_currencies="usd"):
+        return await concurrency.run(self.provider, self.api.get_coin_prices, list(ids), vs_currencies)
+
+    async def get_coin_market_chart(self, coin_id, vs_currency="usd", days="1"):
+        return await concurrency.run(
+            self.provider, self.api.get_coin_market_chart, coin_id, vs_currency, days
+        )
+
+    async def get_coin_market_charts(self, coin_ids, vs_currency="usd", days="1") -> Dict[str, Any]:
+        return await _gather_by_key(
+            coin_ids, lambda coin_id: self.get_coin_market_chart(coin_id, vs_currency, days)
+        )
+
+
+class AsyncAlphaVantageAPI:
+    provider = "alphavantage"
+
+    def __init__(self, api_key=None, api: AlphaVantageAPI = None):
+        self.api = api or AlphaVantageAPI(api_key)
+
+    async def get_daily_adjusted(self, symbol):
+        return await concurrency.run(self.provider, self.api.get_daily_adjusted, symbol)
+
+    async def get_intraday(self, symbol, interval="5min"):
+        return await concurrency.run(self.provider, self.api.get_intraday, symbol, interval)
+
+    async def get_daily_adjusted_many(self, symbols) -> Dict[str, Any]:
+        return await _gather_by_key(symbols, self.get_daily_adjusted)
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    coro.close()
+    raise RuntimeError("run_sync() cannot be called from a running event loop; await the coroutine instead")
+
+
+class ConcurrentConnectors:
+    """Synchronous facade that fetches whole watchlists concurrently."""
+
+    def __init__(self, yf_api: YahooFinanceAPI = None, cg_api: CoinGeckoAPI = None,
+                 av_api: AlphaVantageAPI = None):
+        self.yahoo = AsyncYahooFinanceAPI(yf_api)
+        self.coingecko = AsyncCoinGeckoAPI(cg_api)
+        self.alphavantage = AsyncAlphaVantageAPI(api=av_api) if av_api else None
+
+    def get_stocks_data(self, tickers, **kwargs) -> Dict[str, Any]:
+        return run_sync(self.yahoo.get_stocks_data(tickers, **kwargs))
+
+    def get_coin_market_charts(self, coin_ids, vs_currency="usd", days="1") -> Dict[str, Any]:
+        return run_sync(self.coingecko.get_coin_market_charts(coin_ids, vs_currency, days))
+
+    def get_crypto_snapshots(self, coin_ids, vs_currency="usd", days="1") -> Dict[str, Dict[str, Any]]:
+        """Fetch batched prices and per-coin market charts for a watchlist in one round."""
+        async def fetch():
+            return await asyncio.gather(
+                self.coingecko.get_coin_prices(coin_ids, vs_currency),
+                self.coingecko.get_coin_market_charts(coin_ids, vs_currency, days)
+            )
+
+        prices, charts = run_sync(fetch())
+        snapshots = {}
+        for coin_id in dict.fromkeys(coin_ids):
+            if "error" in prices:
+                price = {"error": prices["error"]}
+            elif coin_id in prices:
+                price = {coin_id: prices[coin_id]}
+            else:
+                price = {"error": f"No price returned for {coin_id}"}
+            snapshots[coin_id] = {"price": price, "market_chart": charts[coin_id]}
+        return snapshots
+
+    def get_daily_adjusted_many(self, symbols) -> Dict[str, Any]:
+        if not self.alphavantage:
+            return {symbol: {"error": "Alpha Vantage API key not configured"} for symbol in symbols}
+        return run_sync(self.alphavantage.get_daily_adjusted_many(symbols))
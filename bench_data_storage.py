@@ -0,0 +1,97 @@
+"""
+Benchmark DataStorage latest-snapshot lookups against table size.
+
+Compares three ways of answering "latest snapshot for a ticker":
+  scan    - the original query with indexes disabled (NOT INDEXED)
+  index   - the same query using idx_stock_data_ticker_timestamp
+  latest  - get_latest_stock_data(), a primary key lookup on stock_latest
+
+It also compares the size and parse time of one year of daily history
+stored as JSON and as packed arrays (history_codec.py).
+
+Usage: python bench_data_storage.py [rows ...]
+"""
+from data_storage import DataStorage
+from datetime import datetime, timedelta, timezone
+from history_codec import decode_history, encode_history
+import json
+import os
+import sys
+import tempfile
+import time
+
+TICKERS = [f"T{i:03d}" for i in range(100)]
+HISTORY = {"Close": {"2025-09-01 00:00:00-04:00": 150.0}}
+
+def populate(db, rows):
+    # Write snapshots directly so large tables build quickly
+    snapshots = []
+    latest = {}
+    for i in range(rows):
+        ticker = TICKERS[i % len(TICKERS)]
+        row = (ticker, f"2025-09-01T00:00:{i:09d}", json.dumps({"symbol": ticker}), json.dumps(HISTORY))
+        snapshots.append(row)
+        latest[ticker] = row
+    with db.connections.write() as conn:
+        conn.executemany("INSERT INTO stock_data (ticker, timestamp, info, history) VALUES (?, ?, ?, ?)", snapshots)
+        conn.executemany("INSERT OR REPLACE INTO stock_latest (ticker, timestamp, info, history) VALUES (?, ?, ?, ?)",
+                         list(latest.values()))
+
+def time_lookups(lookup, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        lookup(TICKERS[i % len(TICKERS)])
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def bench(rows, repeat=200):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db = DataStorage(db_name=path)
+    populate(db, rows)
+
+    def scan(ticker):
+        return db.connections.reader().execute(
+            "SELECT info, history FROM stock_data NOT INDEXED WHERE ticker = ? ORDER BY timestamp DESC LIMIT 1",
+            (ticker,)
+        ).fetchone()
+
+    def index(ticker):
+        return db.connections.reader().execute(
+            "SELECT info, history FROM stock_data WHERE ticker = ? ORDER BY timestamp DESC LIMIT 1",
+            (ticker,)
+        ).fetchone()
+
+    results = {
+        "scan": time_lookups(scan, max(repeat // 10, 5)),
+        "index": time_lookups(index, repeat),
+        "latest": time_lookups(db.get_latest_stock_data, repeat),
+    }
+    db.close()
+    os.remove(path)
+    return results
+
+def bench_history_codec(days=365, repeat=200):
+    start = datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=-5)))
+    history = {
+        column: {str(start + timedelta(days=i)): 100.0 + i * 0.37 for i in range(days)}
+        for column in ("Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits")
+    }
+    stored = {"json": json.dumps(history)}
+    for codec in ("raw", "zlib"):
+        stored[codec] = encode_history(history, codec)
+
+    print(f"\n{'codec':>6} {'bytes':>10} {'parse (us)':>12}")
+    for codec, value in stored.items():
+        parse = json.loads if codec == "json" else decode_history
+        begin = time.perf_counter()
+        for _ in range(repeat):
+            parse(value)
+        elapsed = (time.perf_counter() - begin) / repeat * 1e6
+        print(f"{codec:>6} {len(value):>10} {elapsed:>12.1f}")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000, 500000]
+    print(f"{'rows':>10} {'scan (us)':>12} {'index (us)':>12} {'latest (us)':>12}")
+    for rows in sizes:
+        r = bench(rows)
+        print(f"{rows:>10} {r['scan']:>12.1f} {r['index']:>12.1f} {r['latest']:>12.1f}")
+    bench_history_codec()
@@ -0,0 +1,112 @@
+"""
+Benchmark API response serialization and compression (api_serialization.py).
+
+For payloads shaped like today's /alerts, /reports/daily and /portfolio
+responses it times:
+  jsonify    - json.dumps with sorted keys and pre-stringified datetimes,
+               what flask.jsonify does today
+  dumps      - api_serialization.dumps (orjson when installed) on native
+               datetimes and enums
+and reports the body size uncompressed, gzipped and (if brotli is
+installed) brotli-compressed, with the time each compression takes.
+
+Usage: python bench_serialization.py [alerts ...]
+"""
+from api_serialization import brotli, compress, dumps, orjson
+from datetime import datetime, timedelta
+from strategy_executor import Position
+import json
+import random
+import sys
+import time
+
+ASSETS = ["AAPL", "GOOGL", "MSFT", "TSLA", "NVDA", "AMZN", "META", "bitcoin", "ethereum", "dogecoin", "solana"]
+ALERT_TYPES = ("volume_anomaly", "pump_dump", "sentiment_spike")
+
+def timed(function, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+def alerts_payload(count, rng):
+    start = datetime.now() - timedelta(hours=24)
+    alerts = []
+    for i in range(count):
+        asset = rng.choice(ASSETS)
+        alert_type = rng.choice(ALERT_TYPES)
+        timestamp = start + timedelta(seconds=i * 86400 / count)
+        alerts.append({
+            "seq": i + 1,
+            "id": f"{alert_type}_{asset}_{int(timestamp.timestamp())}",
+            "type": alert_type,
+            "asset_name": asset,
+            "timestamp": timestamp,
+            "urgency": rng.choice(("low", "medium", "high")),
+            "data": {
+                "anomaly_detected": True,
+                "current_volume": rng.uniform(1e6, 5e7),
+                "average_volume": rng.uniform(1e6, 1e7),
+                "volume_ratio": rng.uniform(3, 8),
+                "z_score": rng.uniform(2, 6),
+                "price_changes": [rng.uniform(-0.1, 0.2) for _ in range(10)],
+            },
+            "message": f"Unusual {alert_type.replace('_', ' ')} detected for {asset}",
+        })
+    return {"success": True, "data": alerts, "next_cursor": None, "timestamp": datetime.now()}
+
+def report_payload(rng):
+    news = [{"title": f"Market update {i}: {rng.choice(ASSETS)} moves on earnings", "link": f"https://example.com/news/{i}",
+             "published": datetime.now() - timedelta(minutes=i), "source": "Google Finance",
+             "summary": "Analysts weigh the latest results and guidance. " * 4} for i in range(60)]
+    assets = [{"symbol": asset, "current_price": rng.uniform(1, 500), "change_24h": rng.uniform(-10, 10),
+               "volume": rng.uniform(1e6, 1e8), "sentiment": rng.choice(("bullish", "bearish", "neutral")),
+               "score": rng.random()} for asset in ASSETS]
+    return {"success": True, "data": {
+        "date": datetime.now().strftime("%Y-%m-%d"), "version": 42, "built_at": datetime.now(),
+        "top_opportunities": sorted(assets, key=lambda a: -a["score"])[:5], "stock_analysis": assets[:7],
+        "crypto_analysis": assets[7:], "bubble_warnings": assets[:2], "latest_news": news,
+        "recent_alerts": alerts_payload(100, rng)["data"],
+        "market_sentiment": {"overall_sentiment": "bullish", "confidence": 0.75},
+    }, "timestamp": datetime.now()}
+
+def portfolio_payload(count, rng):
+    positions = []
+    for i in range(count):
+        position = Position(f"SYM{i:03d}", rng.uniform(1, 100), rng.uniform(10, 500), "long")
+        position.update_price(position.entry_price * rng.uniform(0.9, 1.2))
+        positions.append(position)
+    return {"success": True, "data": {"positions": positions, "total_positions": count}, "timestamp": datetime.now()}
+
+def jsonify_body(payload):
+    # flask.jsonify: sorted keys, compact separators, ASCII, objects converted by the caller
+    def stringify(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if hasattr(value, "to_dict"):
+            return value.to_dict()
+        raise TypeError(type(value).__name__)
+    return json.dumps(payload, default=stringify, sort_keys=True, separators=(",", ":")).encode()
+
+def bench(name, payload):
+    jsonify_ms, body = timed(lambda: jsonify_body(payload))
+    dumps_ms, fast_body = timed(lambda: dumps(payload))
+    gzip_ms, gzipped = timed(lambda: compress(fast_body, "gzip"))
+    row = f"{name:>12} {jsonify_ms:>12.2f} {dumps_ms:>10.2f} {len(body) / 1024:>10.1f} {len(gzipped) / 1024:>10.1f} {gzip_ms:>10.2f}"
+    if brotli is not None:
+        br_ms, br = timed(lambda: compress(fast_body, "br"))
+        row += f" {len(br) / 1024:>8.1f} {br_ms:>8.2f}"
+    print(row)
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000]
+    rng = random.Random(42)
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'json'}; brotli: {'yes' if brotli else 'not installed'}")
+    header = f"{'payload':>12} {'jsonify ms':>12} {'dumps ms':>10} {'raw KB':>10} {'gzip KB':>10} {'gzip ms':>10}"
+    if brotli is not None:
+        header += f" {'br KB':>8} {'br ms':>8}"
+    print(header)
+    for count in sizes:
+        bench(f"alerts {count}", alerts_payload(count, rng))
+    bench("report", report_payload(rng))
+    bench("portfolio", portfolio_payload(200, rng))
@@ -0,0 +1,164 @@
+"""
+Measure the cold start of the Flask app (main.py).
+
+Every measurement runs in a fresh interpreter, as a new worker would:
+  imports   - `python -X importtime` breakdown of importing the app module,
+              the slowest modules by cumulative and by self time
+  boot      - time to import the app and answer the first /health request
+              through the test client, which heavy packages got imported
+              and which components were built
+  http      - time from spawning a server process to the first 200 from
+              /health over HTTP (with --http)
+
+Usage: python bench_startup.py [--app main:app] [--runs 5] [--top 15] [--http]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+HEALTH_PATH = "/api/wealthflow/health"
+
+# Third-party packages that should not be imported until something uses them
+HEAVY_MODULES = ("yfinance", "pandas", "praw", "openai", "feedparser", "jinja2", "schedule")
+
+BOOT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+module = __import__({module!r}, fromlist=["_"])
+app = getattr(module, {attr!r})
+imported = time.perf_counter()
+response = app.test_client().get({path!r})
+answered = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "first_health_ms": (answered - imported) * 1000,
+    "total_ms": (answered - start) * 1000,
+    "status": response.status_code,
+    "heavy_modules": sorted(name for name in {heavy!r} if name in sys.modules),
+    "components": (response.get_json(silent=True) or {{}}).get("components", {{}}),
+}}))
+"""
+
+SERVE_SCRIPT = """
+module = __import__({module!r}, fromlist=["_"])
+getattr(module, {attr!r}).run(host="127.0.0.1", port={port}, debug=False, use_reloader=False)
+"""
+
+
+def _split_app(app):
+    module, _, attr = app.partition(":")
+    return module, attr or "app"
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        [(module, self_us, cumulative_us), ...] in import order
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def profile_imports(app, cwd):
+    module, _ = _split_app(app)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr.splitlines()[-1]}")
+    return parse_importtime(result.stderr)
+
+
+def profile_boot(app, cwd):
+    module, attr = _split_app(app)
+    script = BOOT_SCRIPT.format(module=module, attr=attr, path=HEALTH_PATH, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"booting {app} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def profile_http(app, cwd, timeout=60.0):
+    """Milliseconds from spawning a server to its first successful /health response."""
+    module, attr = _split_app(app)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    script = SERVE_SCRIPT.format(module=module, attr=attr, port=port)
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-c", script], cwd=cwd,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with status {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{HEALTH_PATH}", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"no /health response within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _print_imports(rows, top):
+    total = sum(self_us for _, self_us, _ in rows)
+    print(f"{len(rows)} modules imported in {total / 1000:.1f} ms (sum of self times)")
+    print(f"\n{'cumulative (ms)':>16} {'self (ms)':>10}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:top]:
+        print(f"{cumulative_us / 1000:>16.1f} {self_us / 1000:>10.1f}  {name}")
+
+    # Top-level packages by their own (self) time, including all submodules
+    packages = {}
+    for name, self_us, _ in rows:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print(f"\n{'self (ms)':>16}  package")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{self_us / 1000:>16.1f}  {package}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the Flask app's import time and cold start.")
+    parser.add_argument("--app", default="main:app", help="module:attribute of the Flask app")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="rows in the import breakdown")
+    parser.add_argument("--http", action="store_true", help="also time the first /health over HTTP")
+    args = parser.parse_args()
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    print(f"== Imports ({args.app})")
+    _print_imports(profile_imports(args.app, cwd), args.top)
+
+    print(f"\n== Boot to first {HEALTH_PATH} ({args.runs} runs, median)")
+    boots = [profile_boot(args.app, cwd) for _ in range(args.runs)]
+    for key in ("import_ms", "first_health_ms", "total_ms"):
+        print(f"{key:>16}: {statistics.median(boot[key] for boot in boots):.1f}")
+    print(f"{'heavy modules':>16}: {', '.join(boots[-1]['heavy_modules']) or 'none'}")
+    components = boots[-1]["components"]
+    if components:
+        print(f"{'components':>16}: " + ", ".join(f"{name}={entry.get('state')}" for name, entry in components.items()))
+
+    if args.http:
+        print(f"\n== Spawn to first HTTP {HEALTH_PATH} ({args.runs} runs)")
+        times = [profile_http(args.app, cwd) for _ in range(args.runs)]
+        print(f"{'median_ms':>16}: {statistics.median(times):.1f}")
+        print(f"{'max_ms':>16}: {max(times):.1f}")
@@ -0,0 +1,66 @@
+"""
+Benchmark the storage backends (storage_backends.py) on the SaaS workload.
+
+For each available backend it times:
+  insert     - record_commissions() in batches of 1000
+  stats      - affiliate_stats(), the per-affiliate commission rollup
+  breakdown  - commission_breakdown(), per affiliate and signal type
+  users      - get_users_by_package()
+
+Usage: python bench_storage_backends.py [commissions ...]
+"""
+from storage_backends import BACKENDS, duckdb, open_backend
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+AFFILIATES = [(f"AFF{i:03d}", f"Affiliate {i}", 0.2, 0.0, 0) for i in range(200)]
+USERS = [(f"user{i}@email.com", ("VIP", "PREMIUM", "BASIC")[i % 3], AFFILIATES[i % 200][0], None)
+         for i in range(5000)]
+SIGNAL_TYPES = ("OURO", "PRATA", "BRONZE")
+
+def timed(function, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def bench(kind, commissions, batch_size=1000):
+    directory = tempfile.mkdtemp()
+    try:
+        backend = open_backend(kind, os.path.join(directory, f"bench.{kind}"))
+        backend.add_affiliates(AFFILIATES)
+        backend.add_users(USERS)
+
+        rng = random.Random(42)
+        rows = [
+            (user[2], user[0], rng.choice(SIGNAL_TYPES), rng.uniform(0.1, 5.0))
+            for user in (rng.choice(USERS) for _ in range(commissions))
+        ]
+
+        def insert():
+            for start in range(0, len(rows), batch_size):
+                backend.record_commissions(rows[start:start + batch_size])
+
+        results = {
+            "insert": timed(insert),
+            "stats": timed(backend.affiliate_stats, repeat=5),
+            "breakdown": timed(backend.commission_breakdown, repeat=5),
+            "users": timed(lambda: backend.get_users_by_package("VIP"), repeat=20),
+        }
+        backend.close()
+        return results
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    kinds = [kind for kind in BACKENDS if kind != "duckdb" or duckdb is not None]
+    print(f"{'backend':>8} {'rows':>10} {'insert (ms)':>12} {'stats (ms)':>12} {'breakdown (ms)':>15} {'users (ms)':>11}")
+    for rows in sizes:
+        for kind in kinds:
+            r = bench(kind, rows)
+            print(f"{kind:>8} {rows:>10} {r['insert']:>12.1f} {r['stats']:>12.2f} {r['breakdown']:>15.2f} {r['users']:>11.2f}")
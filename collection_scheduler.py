@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# What to do with an asset whose task from an earlier cycle is still running
+OVERRUN_SKIP = "skip"    # leave it out of this cycle
+OVERRUN_ALLOW = "allow"  # submit it again anyway
+
+@dataclass
+class TaskResult:
+    """Outcome of one asset task within a cycle."""
+    key: str
+    status: str  # 'ok', 'error', 'timeout' or 'skipped'
+    value: Any = None
+    error: Optional[str] = None
+    duration: float = 0.0
+
+@dataclass
+class CycleReport:
+    """Timing summary of one collection cycle."""
+    cycle: int
+    scheduled_at: datetime
+    started_at: datetime
+    start_lag: float
+    duration: float
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    skipped: int = 0
+    missed_ticks: int = 0
+    slowest: List[Tuple[str, float]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cycle": self.cycle,
+            "scheduled_at": self.scheduled_at.isoformat(),
+            "started_at": self.started_at.isoformat(),
+            "start_lag": self.start_lag,
+            "duration": self.duration,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "skipped": self.skipped,
+            "missed_ticks": self.missed_ticks,
+            "slowest": self.slowest,
+        }
+
+class CollectionScheduler:
+    """
+    Runs per-asset collection tasks on a worker pool at a fixed rate.
+
+    Cycles start on a fixed grid (start + n * interval) no matter how long
+    the previous cycle took, so the cadence does not drift. Each task must
+    finish within `asset_deadline` seconds of the cycle start; late tasks are
+    reported as timed out and, with the 'skip' overrun policy, left out of the
+    following cycles until they finish.
+    """
+
+    def __init__(self, interval: float = 60.0, max_workers: int = 16,
+                 asset_deadline: float = None, overrun_policy: str = OVERRUN_SKIP,
+                 history_size: int = 100):
+        """
+        Initialize the scheduler.
+
+        Args:
+            interval: Seconds between cycle starts
+            max_workers: Size of the worker pool
+            asset_deadline: Seconds a task may take, measured from the cycle start
+                            (defaults to 80% of the interval)
+            overrun_policy: 'skip' or 'allow' for assets still running from an earlier cycle
+            history_size: Number of cycle reports to keep
+        """
+        if overrun_policy not in (OVERRUN_SKIP, OVERRUN_ALLOW):
+            raise ValueError(f"Unknown overrun policy: {overrun_policy}")
+        self.interval = interval
+        self.asset_deadline = asset_deadline if asset_deadline is not None else interval * 0.8
+        self.overrun_policy = overrun_policy
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collector")
+
+        self.reports = deque(maxlen=history_size)
+        self._running = {}  # key -> future of an overrunning task
+        self._cycle = 0
+        self._stop_event = threading.Event()
+
+    def run_cycle(self, tasks: Dict[str, Callable[[], Any]],
+                  scheduled_at: float = None) -> Tuple[Dict[str, TaskResult], CycleReport]:
+        """
+        Run one cycle of tasks and wait for them up to the deadline.
+
+        Args:
+            tasks: Mapping of asset key to a zero-argument fetch function
+            scheduled_at: time.time() at which the cycle was due (defaults to now)
+
+        Returns:
+            (results by key, cycle report)
+        """
+        self._cycle += 1
+        start = time.time()
+        start_monotonic = time.monotonic()
+        scheduled_at = start if scheduled_at is None else scheduled_at
+        deadline = start_monotonic + self.asset_deadline
+
+        # Forget overrunning tasks that have finished since the last cycle
+        self._running = {key: future for key, future in self._running.items() if not future.done()}
+
+        results: Dict[str, TaskResult] = {}
+        futures = {}
+        for key, task in tasks.items():
+            if key in self._running and self.overrun_policy == OVERRUN_SKIP:
+                results[key] = TaskResult(key, "skipped", error="previous run still in progress")
+                continue
+            futures[self.executor.submit(self._timed, task)] = key
+
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                ok, value, duration, finished_at = future.result()
+                if finished_at > deadline:
+                    # Finished while wait() was returning; too late for this cycle
+                    pending.add(future)
+                elif ok:
+                    results[key] = TaskResult(key, "ok", value=value, duration=duration)
+                else:
+                    results[key] = TaskResult(key, "error", error=value, duration=duration)
+
+        for future in pending:
+            key = futures[future]
+            # Tasks still queued never start; running ones cannot be interrupted, so
+            # they are tracked as overrunning and their results are dropped
+            if future.cancel():
+                error = f"missed {self.asset_deadline:.1f}s deadline before starting"
+            else:
+                if not future.done():
+                    self._running[key] = future
+                error = f"missed {self.asset_deadline:.1f}s deadline"
+            results[key] = TaskResult(key, "timeout", error=error, duration=time.monotonic() - start_monotonic)
+
+        report = self._build_report(results, scheduled_at, start, time.monotonic() - start_monotonic)
+        self.reports.append(report)
+        return results, report
+
+    def run_forever(self, build_tasks: Callable[[], Dict[str, Callable[[], Any]]],
+                    on_results: Callable[[Dict[str, TaskResult], CycleReport], None],
+                    max_cycles: int = None):
+        """
+        Run cycles at a fixed rate until stop() is called.
+
+        Args:
+            build_tasks: Called at each tick to build that cycle's tasks
+            on_results: Called in the scheduler thread with each cycle's results
+            max_cycles: Stop after this many cycles (runs forever if None)
+        """
+        self._stop_event.clear()
+        next_tick = time.time()
+        cycles = 0
+        missed = 0
+        while not self._stop_event.is_set():
+            results, report = self.run_cycle(build_tasks(), scheduled_at=next_tick)
+            report.missed_ticks = missed
+            try:
+                on_results(results, report)
+            except Exception as e:
+                print(f"Error handling results of cycle {report.cycle}: {e}")
+
+            cycles += 1
+            if max_cycles is not None and cycles >= max_cycles:
+                break
+
+            # Fixed rate: the next tick is on the grid, not `interval` after we finished.
+            # If we overran whole ticks, skip them instead of bunching cycles together.
+            next_tick += self.interval
+            now = time.time()
+            missed = 0
+            if next_tick < now:
+                missed = int((now - next_tick) // self.interval) + 1
+                next_tick += missed * self.interval
+            self._stop_event.wait(max(0.0, next_tick - time.time()))
+
+    def stop(self):
+        self._stop_event.set()
+
+    def shutdown(self):
+        self.stop()
+        self.executor.shutdown(wait=False)
+
+    @staticmethod
+    def _timed(task):
+        start = time.monotonic()
+        try:
+            ok, value = True, task()
+        except Exception as e:
+            ok, value = False, str(e)
+        finished_at = time.monotonic()
+        return ok, value, finished_at - start, finished_at
+
+    def _build_report(self, results, scheduled_at, start, duration) -> CycleReport:
+        statuses = [r.status for r in results.values()]
+        slowest = sorted(
+            ((r.key, round(r.duration, 3)) for r in results.values() if r.status != "skipped"),
+            key=lambda item: item[1], reverse=True
+        )[:5]
+        return CycleReport(
+            cycle=self._cycle,
+            scheduled_at=datetime.fromtimestamp(scheduled_at),
+            started_at=datetime.fromtimestamp(start),
+            start_lag=max(0.0, start - scheduled_at),
+            duration=duration,
+            completed=statuses.count("ok"),
+            failed=statuses.count("error"),
+            timed_out=statuses.count("timeout"),
+            skipped=statuses.count("skipped"),
+            slowest=slowest
+        )
@@ -0,0 +1,119 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class ComponentRegistry:
+    """
+    Builds named components on first use and shares one instance of each.
+
+    Factories receive the registry, so a component gets its dependencies with
+    registry.get() and every user of e.g. 'alert_system' shares the same
+    object. A factory that fails is not retried until reset() is called, so a
+    missing dependency costs one attempt per process, not one per request.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[["ComponentRegistry"], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._errors: Dict[str, Exception] = {}
+        self._init_seconds: Dict[str, float] = {}
+        self._locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[["ComponentRegistry"], Any]):
+        """
+        Register how to build a component.
+
+        Args:
+            name: Component name
+            factory: Callable taking the registry and returning the instance
+        """
+        with self._lock:
+            if name in self._instances:
+                raise ValueError(f"Component already initialized: {name}")
+            self._factories[name] = factory
+            self._errors.pop(name, None)
+            self._locks.setdefault(name, threading.RLock())
+
+    def set(self, name: str, instance: Any):
+        """Use an existing instance for a component (e.g. one shared with another app)."""
+        with self._lock:
+            self._instances[name] = instance
+            self._errors.pop(name, None)
+            self._init_seconds.setdefault(name, 0.0)
+
+    def get(self, name: str) -> Any:
+        """
+        Get a component, building it (and its dependencies) on first use.
+
+        Raises:
+            KeyError: No component registered under this name
+            RuntimeError: The component's factory failed
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name not in self._factories and name not in self._instances:
+                raise KeyError(f"Unknown component: {name}")
+            lock = self._locks.setdefault(name, threading.RLock())
+
+        # Built under its own lock, so slow components do not block each other
+        with lock:
+            if name in self._instances:
+                return self._instances[name]
+            if name in self._errors:
+                raise RuntimeError(f"{name} failed to initialize: {self._errors[name]}")
+            start = time.perf_counter()
+            try:
+                instance = self._factories[name](self)
+            except Exception as e:
+                with self._lock:
+                    self._errors[name] = e
+                    self._init_seconds[name] = time.perf_counter() - start
+                print(f"Error initializing {name}: {e}")
+                raise RuntimeError(f"{name} failed to initialize: {e}") from e
+            with self._lock:
+                self._instances[name] = instance
+                self._init_seconds[name] = time.perf_counter() - start
+            return instance
+
+    def optional(self, name: str) -> Optional[Any]:
+        """Get a component, or None if it cannot be built."""
+        try:
+            return self.get(name)
+        except RuntimeError:
+            return None
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self._instances
+
+    def reset(self, name: str = None):
+        """Forget an instance or a failure (all components if name is None) so it is built again."""
+        with self._lock:
+            names = [name] if name else list(set(self._instances) | set(self._errors))
+            for component in names:
+                self._instances.pop(component, None)
+                self._errors.pop(component, None)
+                self._init_seconds.pop(component, None)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-component state: 'ready', 'failed' or 'pending' (not built yet), with init times."""
+        with self._lock:
+            status = {}
+            for name in sorted(set(self._factories) | set(self._instances)):
+                if name in self._instances:
+                    state = "ready"
+                elif name in self._errors:
+                    state = "failed"
+                else:
+                    state = "pending"
+                entry = {"state": state}
+                if name in self._init_seconds:
+                    entry["init_ms"] = round(self._init_seconds[name] * 1000, 2)
+                if name in self._errors:
+                    entry["error"] = str(self._errors[name])
+                status[name] = entry
+            return status
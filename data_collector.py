@@ -1,42 +1,192 @@
 from api_connectors import YahooFinanceAPI, CoinGeckoAPI, AlphaVantageAPI
-from data_storage import DataStorage
-import time
+from async_connectors import ConcurrentConnectors
+from collection_scheduler import CollectionScheduler, OVERRUN_SKIP
+from data_storage import DataStorage, WriteBehindBuffer, history_to_bars, market_chart_to_bars
+from event_bus import get_event_bus
+from functools import partial
+from history_cache import HistoryCache
+from retention import RetentionManager
 import os
 
 class DataCollector:
-    def __init__(self, db_name='wealthflow.db', alpha_vantage_api_key=None):
+    def __init__(self, db_name='wealthflow.db', alpha_vantage_api_key=None, include_info=False,
+                 write_behind=False, flush_interval=5.0, max_pending=500, retention_interval=None,
+                 history_cache=None, event_bus=None):
         self.yf_api = YahooFinanceAPI()
         self.cg_api = CoinGeckoAPI()
         self.av_api = AlphaVantageAPI(alpha_vantage_api_key) if alpha_vantage_api_key else None
+        self.connectors = ConcurrentConnectors(self.yf_api, self.cg_api, self.av_api)
         self.db = DataStorage(db_name)
+        # Snapshots go to the database in one transaction per batch, either right
+        # away or, with write_behind, from a background buffer
+        self.writer = WriteBehindBuffer(self.db, flush_interval, max_pending).start() if write_behind else self.db
+        # Rollups and pruning run on their own thread, in short transactions between our writes
+        self.retention = RetentionManager(db_name).start(retention_interval) if retention_interval else None
+        # Optional HistoryCache (or cache directory) that trigger checks read close/volume arrays from
+        self.history_cache = HistoryCache(history_cache) if isinstance(history_cache, str) else history_cache
+        # Scraping .info is slow; when enabled it is served from the connector's TTL cache
+        self.include_info = include_info
+        # Latest prices are published as 'prices.<symbol>' events for the SSE stream
+        self.event_bus = event_bus or get_event_bus()
 
     def collect_stock_data(self, ticker):
-        print(f"Collecting stock data for {ticker}...")
-        data = self.yf_api.get_stock_data(ticker)
-        if data and "error" not in data:
-            self.db.save_stock_data(ticker, data["info"], data["history"])
-            print(f"Successfully collected and saved data for {ticker}.")
-        else:
-            print(f"Error collecting data for {ticker}: {data.get('error', 'Unknown error')}")
+        self.collect_stocks_data([ticker])
+
+    def collect_stocks_data(self, tickers):
+        print(f"Collecting stock data for {len(tickers)} tickers...")
+        results = self.yf_api.get_stocks_data(tickers, include_info=self.include_info)
+        self._save_stock_results(tickers, results)
+
+    def _save_stock_results(self, tickers, results):
+        self._write_snapshots(stocks=self._stock_snapshots(tickers, results))
+
+    def _stock_snapshots(self, tickers, results):
+        snapshots = []
+        for ticker in tickers:
+            data = results.get(ticker, {"error": "No data returned"})
+            if "error" not in data:
+                snapshots.append((ticker, data["info"], data["history"]))
+                print(f"Successfully collected data for {ticker}.")
+            else:
+                print(f"Error collecting data for {ticker}: {data.get('error', 'Unknown error')}")
+        return snapshots
 
     def collect_crypto_data(self, coin_id):
-        print(f"Collecting crypto data for {coin_id}...")
-        price = self.cg_api.get_coin_price(coin_id)
-        market_chart = self.cg_api.get_coin_market_chart(coin_id)
-        if price and "error" not in price and market_chart and "error" not in market_chart:
-            self.db.save_crypto_data(coin_id, price, market_chart)
-            print(f"Successfully collected and saved data for {coin_id}.")
+        self.collect_cryptos_data([coin_id])
+
+    def collect_cryptos_data(self, coin_ids):
+        print(f"Collecting crypto data for {len(coin_ids)} coins...")
+        # Prices are batched and market charts fetched concurrently
+        snapshots = self.connectors.get_crypto_snapshots(coin_ids)
+        self._save_crypto_snapshots(snapshots)
+
+    def _save_crypto_snapshots(self, snapshots):
+        self._write_snapshots(cryptos=self._crypto_snapshots(snapshots))
+
+    def _crypto_snapshots(self, snapshots):
+        valid = []
+        for coin_id, snapshot in snapshots.items():
+            price = snapshot["price"]
+            market_chart = snapshot["market_chart"]
+            if price and "error" not in price and market_chart and "error" not in market_chart:
+                valid.append((coin_id, price, market_chart))
+                print(f"Successfully collected data for {coin_id}.")
+            else:
+                print(f"Error collecting data for {coin_id}: price_error={price.get('error', 'N/A')}, chart_error={market_chart.get('error', 'N/A')}")
+        return valid
+
+    def run_collection_loop(self, stocks, cryptos, interval=60, max_workers=16, asset_deadline=None,
+                            overrun_policy=OVERRUN_SKIP, stock_batch_size=50, max_cycles=None):
+        """
+        Collect all assets at a fixed rate using a worker pool.
+
+        Args:
+            stocks: Tickers to collect
+            cryptos: CoinGecko coin ids to collect
+            interval: Seconds between cycle starts
+            max_workers: Number of concurrent fetch workers
+            asset_deadline: Seconds each fetch may take (defaults to 80% of interval)
+            overrun_policy: What to do with assets still running from an earlier cycle
+            stock_batch_size: Tickers per bulk Yahoo download task
+            max_cycles: Stop after this many cycles (runs forever if None)
+        """
+        self.scheduler = CollectionScheduler(interval, max_workers, asset_deadline, overrun_policy)
+
+        def build_tasks():
+            # Fetch-only tasks; results are saved in this thread once the cycle completes
+            tasks = {}
+            for start in range(0, len(stocks), stock_batch_size):
+                batch = stocks[start:start + stock_batch_size]
+                tasks[f"stocks:{start}"] = partial(self.yf_api.get_stocks_data, batch, include_info=self.include_info)
+            if cryptos:
+                tasks["crypto:prices"] = partial(self.cg_api.get_coin_prices, cryptos)
+            for coin_id in cryptos:
+                tasks[f"crypto:{coin_id}"] = partial(self.cg_api.get_coin_market_chart, coin_id)
+            return tasks
+
+        def on_results(results, report):
+            self._save_cycle_results(stocks, cryptos, stock_batch_size, results)
+            print(f"\nCollection cycle {report.cycle} finished in {report.duration:.2f}s "
+                  f"(lag {report.start_lag:.2f}s): {report.completed} ok, {report.failed} failed, "
+                  f"{report.timed_out} timed out, {report.skipped} skipped, "
+                  f"{report.missed_ticks} missed ticks. Slowest: {report.slowest[:3]}")
+
+        try:
+            self.scheduler.run_forever(build_tasks, on_results, max_cycles=max_cycles)
+        finally:
+            self.scheduler.shutdown()
+
+    def _save_cycle_results(self, stocks, cryptos, stock_batch_size, results):
+        # The whole cycle is written as one batch
+        stock_snapshots = []
+        for start in range(0, len(stocks), stock_batch_size):
+            batch = stocks[start:start + stock_batch_size]
+            result = results.get(f"stocks:{start}")
+            if result and result.status == "ok":
+                stock_snapshots.extend(self._stock_snapshots(batch, result.value))
+            else:
+                error = result.error if result else "not scheduled"
+                print(f"Error collecting stock batch {batch[0]}..{batch[-1]}: {error}")
+
+        crypto_snapshots = self._crypto_snapshots(self._cycle_crypto_results(cryptos, results)) if cryptos else []
+        self._write_snapshots(stocks=stock_snapshots, cryptos=crypto_snapshots)
+
+    def _write_snapshots(self, stocks=(), cryptos=()):
+        self.writer.save_snapshots(stocks=stocks, cryptos=cryptos)
+        # The cache only takes bars newer than the ones it already holds
+        for ticker, _, history in stocks:
+            interval, bars = history_to_bars(history)
+            if self.history_cache is not None:
+                self._append_to_cache(ticker, interval, bars)
+            if bars:
+                self._publish_price(ticker, bars[-1][0], bars[-1][4], bars[-1][5])
+        for coin_id, price, market_chart in cryptos:
+            if self.history_cache is not None:
+                interval, bars = market_chart_to_bars(market_chart)
+                self._append_to_cache(coin_id, interval, bars)
+            usd = price.get(coin_id, {}).get("usd")
+            if usd is not None:
+                self._publish_price(coin_id, None, usd, None)
+
+    def _publish_price(self, symbol, ts, close, volume):
+        self.event_bus.publish(f"prices.{symbol}", {"symbol": symbol, "ts": ts, "price": close, "volume": volume})
+
+    def _append_to_cache(self, symbol, interval, bars):
+        try:
+            self.history_cache.append_bars(symbol, interval, bars)
+        except (OSError, ValueError) as e:
+            print(f"Error updating history cache for {symbol}: {e}")
+
+    def _cycle_crypto_results(self, cryptos, results):
+        prices_result = results.get("crypto:prices")
+        if prices_result and prices_result.status == "ok":
+            prices = prices_result.value
         else:
-            print(f"Error collecting data for {coin_id}: price_error={price.get('error', 'N/A')}, chart_error={market_chart.get('error', 'N/A')}")
+            prices = {"error": prices_result.error if prices_result else "not scheduled"}
 
-    def run_collection_loop(self, stocks, cryptos, interval=60):
-        while True:
-            for stock in stocks:
-                self.collect_stock_data(stock)
-            for crypto in cryptos:
-                self.collect_crypto_data(crypto)
-            print(f"\nCollection cycle finished. Waiting for {interval} seconds...")
-            time.sleep(interval)
+        snapshots = {}
+        for coin_id in cryptos:
+            chart_result = results.get(f"crypto:{coin_id}")
+            if "error" in prices:
+                price = {"error": prices["error"]}
+            elif coin_id in prices:
+                price = {coin_id: prices[coin_id]}
+            else:
+                price = {"error": f"No price returned for {coin_id}"}
+            if chart_result and chart_result.status == "ok":
+                market_chart = chart_result.value
+            else:
+                market_chart = {"error": chart_result.error if chart_result else "not scheduled"}
+            snapshots[coin_id] = {"price": price, "market_chart": market_chart}
+        return snapshots
+
+    def close(self):
+        """Flush any buffered snapshots and close the database."""
+        if isinstance(self.writer, WriteBehindBuffer):
+            self.writer.stop()
+        if self.retention is not None:
+            self.retention.close()
+        self.db.close()
 
 if __name__ == "__main__":
     # Example usage:
@@ -52,15 +202,9 @@ if __name__ == "__main__":
     cryptos_to_monitor = ["bitcoin", "ethereum", "dogecoin"]
 
     # Run the collection loop (for a limited number of iterations for this example)
-    for _ in range(2): # Run twice for demonstration
-        for stock in stocks_to_monitor:
-            collector.collect_stock_data(stock)
-        for crypto in cryptos_to_monitor:
-            collector.collect_crypto_data(crypto)
-        print("\nCollection cycle finished. Waiting for 10 seconds...")
-        time.sleep(10)
-
-    collector.db.close()
+    collector.run_collection_loop(stocks_to_monitor, cryptos_to_monitor, interval=10, max_cycles=2)
+
+    collector.close()
     print("\nData collection example finished.")
 
 
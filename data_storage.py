@@ -1,74 +1,705 @@
-import sqlite3
 import json
+import threading
+from collections import deque
 from datetime import datetime
+from history_codec import HistoryArrays, bars_to_arrays, decode_history, encode_history, load_history, to_epoch_seconds
+from storage_connections import get_connection_manager, release_connection_manager
+
+# Bar intervals stored in ohlcv_bars, in seconds
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "1d": 86400,
+    "1wk": 604800,
+}
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# SQLite's default limit on bound parameters is 999; stay well under it
+MAX_SYMBOLS_PER_QUERY = 500
+
+# Bumped whenever _migrate() has new work to do (stored in PRAGMA user_version)
+SCHEMA_VERSION = 2
 
 class DataStorage:
-    def __init__(self, db_name='wealthflow.db'):
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
-        self._create_tables()
+    def __init__(self, db_name='wealthflow.db', busy_timeout=5.0, history_codec="zlib"):
+        """
+        Open (and if needed create or migrate) the database.
 
-    def _create_tables(self):
-        self.cursor.execute("""CREATE TABLE IF NOT EXISTS stock_data (
+        Args:
+            db_name: SQLite database file
+            busy_timeout: Seconds to wait for another process holding the write lock
+            history_codec: How stock history is stored: 'zlib', 'lz4' or 'raw' packed
+                           arrays (see history_codec.py), or 'json' for the old text format
+        """
+        self.history_codec = history_codec
+        # Every DataStorage on the same file shares one WAL-mode writer; reads use
+        # a per-thread read-only connection so they never wait behind writes
+        # There is deliberately no shared cursor: each statement runs on the
+        # calling thread's reader or inside a locked write transaction
+        self.connections = get_connection_manager(db_name, busy_timeout=busy_timeout)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        with self.connections.write() as conn:
+            self._create_tables(conn)
+            self._migrate(conn)
+
+    def _create_tables(self, conn):
+        conn.execute("""CREATE TABLE IF NOT EXISTS stock_data (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 ticker TEXT NOT NULL,
                 timestamp TEXT NOT NULL,
                 info TEXT,
                 history TEXT
             )""")
-        self.cursor.execute("""CREATE TABLE IF NOT EXISTS crypto_data (
+        conn.execute("""CREATE TABLE IF NOT EXISTS crypto_data (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 coin_id TEXT NOT NULL,
                 timestamp TEXT NOT NULL,
                 price TEXT,
                 market_chart TEXT
             )""")
-        self.conn.commit()
+        create_ohlcv_tables(conn)
+        # History lookups by asset and time use these instead of scanning the table
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_stock_data_ticker_timestamp ON stock_data (ticker, timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_crypto_data_coin_timestamp ON crypto_data (coin_id, timestamp)")
+        # Latest snapshot per asset, replaced on every save so reads are a primary key lookup
+        conn.execute("""CREATE TABLE IF NOT EXISTS stock_latest (
+                ticker TEXT PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                info TEXT,
+                history TEXT
+            )""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS crypto_latest (
+                coin_id TEXT PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                price TEXT,
+                market_chart TEXT
+            )""")
+        # Alerts raised by AlertSystem; the API pages through them newest first by id
+        conn.execute("""CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                alert_id TEXT NOT NULL,
+                type TEXT NOT NULL,
+                asset_name TEXT NOT NULL,
+                urgency TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                message TEXT,
+                data TEXT
+            )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_asset_id ON alerts (asset_name, id)")
 
-    def save_stock_data(self, ticker, info, history):
+    def _migrate(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._migrate_blobs_to_bars(conn)
+        if version < 2:
+            self._rebuild_latest_snapshots(conn)
+        if version < SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def migrate_blobs_to_bars(self):
+        """
+        Backfill ohlcv_bars from the JSON blobs in stock_data and crypto_data.
+
+        Rows are replayed oldest first so later snapshots of the same bar win.
+        Blobs that cannot be parsed are skipped.
+
+        Returns:
+            Number of bars written
+        """
+        with self.connections.write() as conn:
+            return self._migrate_blobs_to_bars(conn)
+
+    def _migrate_blobs_to_bars(self, conn):
+        written = 0
+        rows = conn.execute("SELECT ticker, history FROM stock_data ORDER BY id").fetchall()
+        for ticker, history in rows:
+            try:
+                bars = history_to_bars(load_history(history))
+            except (ValueError, TypeError, AttributeError) as e:
+                print(f"Skipping unreadable stock history for {ticker}: {e}")
+                continue
+            written += self._write_bars(conn, ticker, bars)
+
+        rows = conn.execute("SELECT coin_id, market_chart FROM crypto_data ORDER BY id").fetchall()
+        for coin_id, market_chart in rows:
+            try:
+                bars = market_chart_to_bars(json.loads(market_chart or "{}"))
+            except (ValueError, TypeError, AttributeError) as e:
+                print(f"Skipping unreadable market chart for {coin_id}: {e}")
+                continue
+            written += self._write_bars(conn, coin_id, bars)
+        return written
+
+    def rebuild_latest_snapshots(self):
+        """Repopulate stock_latest/crypto_latest from the snapshot history tables."""
+        with self.connections.write() as conn:
+            self._rebuild_latest_snapshots(conn)
+
+    def _rebuild_latest_snapshots(self, conn):
+        conn.execute("DELETE FROM stock_latest")
+        conn.execute("""INSERT INTO stock_latest (ticker, timestamp, info, history)
+            SELECT ticker, timestamp, info, history FROM stock_data AS s
+            WHERE id = (SELECT id FROM stock_data WHERE ticker = s.ticker
+                        ORDER BY timestamp DESC, id DESC LIMIT 1)""")
+        conn.execute("DELETE FROM crypto_latest")
+        conn.execute("""INSERT INTO crypto_latest (coin_id, timestamp, price, market_chart)
+            SELECT coin_id, timestamp, price, market_chart FROM crypto_data AS c
+            WHERE id = (SELECT id FROM crypto_data WHERE coin_id = c.coin_id
+                        ORDER BY timestamp DESC, id DESC LIMIT 1)""")
+
+    def _write_bars(self, conn, symbol, bars):
+        """Upsert (interval, rows) from history_to_bars()/market_chart_to_bars(). Does not commit."""
+        rows = _bar_rows(symbol, bars)
+        conn.executemany(
+            "INSERT OR REPLACE INTO ohlcv_bars (symbol, interval, ts, open, high, low, close, volume) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        return len(rows)
+
+    def save_stock_data(self, ticker, info, history, interval=None):
+        self.save_snapshots(stocks=[(ticker, info, history)], stock_interval=interval)
+
+    def save_crypto_data(self, coin_id, price, market_chart, interval=None):
+        self.save_snapshots(cryptos=[(coin_id, price, market_chart)], crypto_interval=interval)
+
+    def save_snapshots(self, stocks=(), cryptos=(), stock_interval=None, crypto_interval=None):
+        """
+        Save many snapshots in a single transaction.
+
+        Args:
+            stocks: Iterable of (ticker, info, history) tuples
+            cryptos: Iterable of (coin_id, price, market_chart) tuples
+            stock_interval: Bar interval of the stock histories (inferred if None)
+            crypto_interval: Bar interval of the market charts (inferred if None)
+
+        Returns:
+            Number of snapshots written
+        """
         timestamp = datetime.now().isoformat()
+        stock_rows, crypto_rows, bar_rows = [], [], []
+
+        for ticker, info, history in stocks:
+            stock_rows.append((ticker, timestamp, json.dumps(info), self._encode_history(history)))
+            bar_rows.extend(_bar_rows(ticker, history_to_bars(history, stock_interval)))
+
+        for coin_id, price, market_chart in cryptos:
+            crypto_rows.append((coin_id, timestamp, json.dumps(price), json.dumps(market_chart)))
+            bar_rows.extend(_bar_rows(coin_id, market_chart_to_bars(market_chart, crypto_interval)))
+
+        if not stock_rows and not crypto_rows:
+            return 0
+        # One transaction (and one fsync) for the whole batch; rolled back as a unit on error
+        with self.connections.write() as conn:
+            conn.executemany(
+                "INSERT INTO stock_data (ticker, timestamp, info, history) VALUES (?, ?, ?, ?)", stock_rows
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO stock_latest (ticker, timestamp, info, history) VALUES (?, ?, ?, ?)", stock_rows
+            )
+            conn.executemany(
+                "INSERT INTO crypto_data (coin_id, timestamp, price, market_chart) VALUES (?, ?, ?, ?)", crypto_rows
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO crypto_latest (coin_id, timestamp, price, market_chart) VALUES (?, ?, ?, ?)",
+                crypto_rows
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO ohlcv_bars (symbol, interval, ts, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                bar_rows
+            )
+        return len(stock_rows) + len(crypto_rows)
+
+    def _encode_history(self, history):
+        if self.history_codec != "json":
+            # Packed arrays; histories that are not {column: {timestamp: number}} stay JSON
+            encoded = encode_history(history, self.history_codec)
+            if encoded is not None:
+                return encoded
         # Convert Timestamp keys in history (which is a dict of dicts) to strings
         # history is like {'Open': {Timestamp(...): value}, 'High': {Timestamp(...): value}}
         # We need to convert the inner Timestamp keys to strings as well
         history_serializable = {}
         for col, values in history.items():
             history_serializable[col] = {str(k): v for k, v in values.items()}
-
-        self.cursor.execute(
-            "INSERT INTO stock_data (ticker, timestamp, info, history) VALUES (?, ?, ?, ?)",
-            (ticker, timestamp, json.dumps(info), json.dumps(history_serializable))
-        )
-        self.conn.commit()
-
-    def save_crypto_data(self, coin_id, price, market_chart):
-        timestamp = datetime.now().isoformat()
-        self.cursor.execute(
-            "INSERT INTO crypto_data (coin_id, timestamp, price, market_chart) VALUES (?, ?, ?, ?)",
-            (coin_id, timestamp, json.dumps(price), json.dumps(market_chart))
-        )
-        self.conn.commit()
+        return json.dumps(history_serializable)
 
     def get_latest_stock_data(self, ticker):
-        self.cursor.execute(
-            "SELECT info, history FROM stock_data WHERE ticker = ? ORDER BY timestamp DESC LIMIT 1",
-            (ticker,)
-        )
-        row = self.cursor.fetchone()
+        """
+        Get the latest snapshot of a stock.
+
+        Returns:
+            {"info": ..., "history": {column: {timestamp: value}}} or None. Packed
+            histories come back with ISO timestamps in the offset they were saved
+            with (rows packed before offsets were stored read back as UTC).
+        """
+        row = self.connections.reader().execute(
+            "SELECT info, history FROM stock_latest WHERE ticker = ?", (ticker,)
+        ).fetchone()
         if row:
-            return {"info": json.loads(row[0]), "history": json.loads(row[1])}
+            return {"info": json.loads(row[0]), "history": load_history(row[1])}
         return None
 
+    def get_latest_stock_history(self, ticker):
+        """
+        Get the latest stock history as arrays (see history_codec.HistoryArrays).
+
+        Skips building per-timestamp dicts, so indicators can work on the
+        columns directly. Returns None if there is no snapshot.
+        """
+        row = self.connections.reader().execute(
+            "SELECT history FROM stock_latest WHERE ticker = ?", (ticker,)
+        ).fetchone()
+        if row is None:
+            return None
+        if isinstance(row[0], bytes):
+            return decode_history(row[0])
+        # Snapshot saved in the JSON format
+        encoded = encode_history(json.loads(row[0]), "raw")
+        return decode_history(encoded) if encoded else HistoryArrays([], {})
+
     def get_latest_crypto_data(self, coin_id):
-        self.cursor.execute(
-            "SELECT price, market_chart FROM crypto_data WHERE coin_id = ? ORDER BY timestamp DESC LIMIT 1",
-            (coin_id,)
-        )
-        row = self.cursor.fetchone()
+        row = self.connections.reader().execute(
+            "SELECT price, market_chart FROM crypto_latest WHERE coin_id = ?", (coin_id,)
+        ).fetchone()
         if row:
             return {"price": json.loads(row[0]), "market_chart": json.loads(row[1])}
         return None
 
+    def get_ohlcv(self, symbol, interval="1d", start=None, end=None, limit=None):
+        """
+        Get bars for one symbol in time order.
+
+        Args:
+            symbol: Ticker or coin id
+            interval: Bar interval, see INTERVAL_SECONDS
+            start: Earliest bar time, inclusive (datetime or epoch seconds)
+            end: Latest bar time, inclusive (datetime or epoch seconds)
+            limit: Only return the most recent `limit` bars
+
+        Returns:
+            List of {"ts", "open", "high", "low", "close", "volume"} dicts, ts in epoch seconds
+        """
+        query = "SELECT ts, open, high, low, close, volume FROM ohlcv_bars WHERE symbol = ? AND interval = ?"
+        query, params = _add_range(query, [symbol, interval], start, end)
+        if limit is not None:
+            query = f"SELECT * FROM ({query} ORDER BY ts DESC LIMIT ?) ORDER BY ts"
+            params.append(limit)
+        else:
+            query += " ORDER BY ts"
+        rows = self.connections.reader().execute(query, params).fetchall()
+        return [dict(zip(("ts",) + OHLCV_COLUMNS, row)) for row in rows]
+
+    def get_bars(self, symbols, start=None, end=None, interval="1d"):
+        """
+        Get bars for many symbols at once, as columns.
+
+        Args:
+            symbols: Tickers/coin ids (or a single one)
+            start: Earliest bar time, inclusive (datetime or epoch seconds)
+            end: Latest bar time, inclusive (datetime or epoch seconds)
+            interval: Bar interval, see INTERVAL_SECONDS
+
+        Returns:
+            {symbol: HistoryArrays} with "open", "high", "low", "close" and "volume"
+            columns (NumPy arrays when available, NaN for missing values); symbols
+            without bars map to empty arrays. Use .to_pandas() for a DataFrame.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        grouped = {symbol: [] for symbol in symbols}
+        reader = self.connections.reader()
+        for i in range(0, len(symbols), MAX_SYMBOLS_PER_QUERY):
+            chunk = symbols[i:i + MAX_SYMBOLS_PER_QUERY]
+            query = (f"SELECT symbol, ts, open, high, low, close, volume FROM ohlcv_bars "
+                     f"WHERE symbol IN ({', '.join('?' * len(chunk))}) AND interval = ?")
+            params = list(chunk) + [interval]
+            query, params = _add_range(query, params, start, end)
+            for row in reader.execute(query + " ORDER BY symbol, ts", params):
+                grouped[row[0]].append(row[1:])
+        return {symbol: bars_to_arrays(rows, OHLCV_COLUMNS) for symbol, rows in grouped.items()}
+
+    def iter_bars(self, symbols, start=None, end=None, interval="1d", chunk_size=10000):
+        """
+        Stream bars for large ranges without loading them all at once.
+
+        Each chunk is a separate short query (keyset pagination on ts), so no
+        read transaction is held open while the caller processes data.
+
+        Yields:
+            (symbol, HistoryArrays) with at most chunk_size bars, in time order per symbol
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        reader = self.connections.reader()
+        for symbol in symbols:
+            after = None
+            while True:
+                query = "SELECT ts, open, high, low, close, volume FROM ohlcv_bars WHERE symbol = ? AND interval = ?"
+                query, params = _add_range(query, [symbol, interval], start, end)
+                if after is not None:
+                    query += " AND ts > ?"
+                    params.append(after)
+                rows = reader.execute(query + " ORDER BY ts LIMIT ?", params + [chunk_size]).fetchall()
+                if not rows:
+                    break
+                yield symbol, bars_to_arrays(rows, OHLCV_COLUMNS)
+                if len(rows) < chunk_size:
+                    break
+                after = rows[-1][0]
+
+    def save_alert(self, alert):
+        """
+        Store an alert dict from AlertSystem.generate_alert().
+
+        Returns:
+            The alert's row id, which orders alerts and serves as the page cursor
+        """
+        with self.connections.write() as conn:
+            cursor = conn.execute(
+                "INSERT INTO alerts (alert_id, type, asset_name, urgency, timestamp, message, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (alert["id"], alert["type"], alert["asset_name"], alert["urgency"], alert["timestamp"],
+                 alert.get("message"), json.dumps(alert.get("data"), default=str))
+            )
+            return cursor.lastrowid
+
+    def get_alerts(self, since=None, before=None, limit=100, types=None, assets=None, include_data=True):
+        """
+        Get alerts newest first.
+
+        Args:
+            since: Only alerts at or after this time (datetime or ISO string)
+            before: Only alerts with a row id below this one (the previous page's last "seq")
+            limit: Maximum number of alerts (None for all)
+            types: Only these alert types
+            assets: Only alerts for these asset names
+            include_data: Load and decode each alert's detection data (skipped for compact pages)
+
+        Returns:
+            List of alert dicts with their row id as "seq"
+        """
+        columns = ["id", "alert_id", "type", "asset_name", "urgency", "timestamp", "message"]
+        if include_data:
+            columns.append("data")
+        query = f"SELECT {', '.join(columns)} FROM alerts WHERE 1 = 1"
+        params = []
+        if before is not None:
+            query += " AND id < ?"
+            params.append(before)
+        if since is not None:
+            query += " AND timestamp >= ?"
+            params.append(since.isoformat() if isinstance(since, datetime) else since)
+        for column, values in (("type", types), ("asset_name", assets)):
+            if values:
+                query += f" AND {column} IN ({', '.join('?' * len(values))})"
+                params.extend(values)
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self.connections.reader().execute(query, params).fetchall()
+
+        alerts = []
+        for row in rows:
+            alert = {"seq": row[0], "id": row[1], "type": row[2], "asset_name": row[3],
+                     "urgency": row[4], "timestamp": row[5], "message": row[6]}
+            if include_data:
+                alert["data"] = json.loads(row[7]) if row[7] else None
+            alerts.append(alert)
+        return alerts
+
+    def count_alerts(self, since=None):
+        """
+        Count stored alerts by type and urgency without loading them.
+
+        Args:
+            since: Only count alerts at or after this time (datetime or ISO string)
+
+        Returns:
+            Dictionary with "total_alerts", "alert_types" and "urgency_levels" counts
+        """
+        query = "SELECT type, urgency, COUNT(*) FROM alerts"
+        params = []
+        if since is not None:
+            query += " WHERE timestamp >= ?"
+            params.append(since.isoformat() if isinstance(since, datetime) else since)
+        rows = self.connections.reader().execute(query + " GROUP BY type, urgency", params).fetchall()
+
+        counts = {"total_alerts": 0, "alert_types": {}, "urgency_levels": {}}
+        for alert_type, urgency, count in rows:
+            counts["total_alerts"] += count
+            counts["alert_types"][alert_type] = counts["alert_types"].get(alert_type, 0) + count
+            counts["urgency_levels"][urgency] = counts["urgency_levels"].get(urgency, 0) + count
+        return counts
+
     def close(self):
-        self.conn.close()
+        """Release this storage's reference to the shared connections. Later calls do nothing."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        release_connection_manager(self.connections)
+
+
+class WriteBehindBuffer:
+    """
+    Queues snapshots in memory and writes them to a DataStorage in batches.
+
+    A batch is flushed when `max_pending` snapshots are queued or every
+    `flush_interval` seconds by the background thread, whichever comes first.
+    Exposes the same save_* methods as DataStorage, so either can be used as
+    the write target.
+    """
+
+    def __init__(self, storage, flush_interval=5.0, max_pending=500, max_retries=3):
+        """
+        Initialize the buffer.
+
+        Args:
+            storage: DataStorage to write to
+            flush_interval: Seconds between background flushes
+            max_pending: Number of queued snapshots that triggers an immediate flush
+            max_retries: Flushes a snapshot that fails on its own is retried in
+                         before it is dropped into `rejected`
+        """
+        self.storage = storage
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+
+        self._stocks = []
+        self._cryptos = []
+        # Snapshots whose own write failed: [(kind, snapshot, attempts)], retried one by one
+        self._retries = []
+        # Last snapshots given up on, kept for inspection
+        self.rejected = deque(maxlen=100)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.counters = {"queued": 0, "written": 0, "flushes": 0, "flush_errors": 0, "retried": 0, "dropped": 0}
+
+    def save_stock_data(self, ticker, info, history):
+        self.save_snapshots(stocks=[(ticker, info, history)])
+
+    def save_crypto_data(self, coin_id, price, market_chart):
+        self.save_snapshots(cryptos=[(coin_id, price, market_chart)])
+
+    def save_snapshots(self, stocks=(), cryptos=()):
+        with self._lock:
+            self._stocks.extend(stocks)
+            self._cryptos.extend(cryptos)
+            pending = len(self._stocks) + len(self._cryptos)
+            self.counters["queued"] = pending
+        if pending >= self.max_pending:
+            if self._thread is not None:
+                self._wakeup.set()
+            else:
+                self.flush()
+
+    def flush(self):
+        """
+        Write everything queued so far. Returns the number of snapshots written.
+
+        A batch that fails is written again one snapshot at a time, so a single
+        bad snapshot (say an info dict that does not encode) cannot hold up the
+        ones queued with it. Snapshots that fail on their own are retried on the
+        next flushes and dropped after max_retries attempts.
+        """
+        with self._flush_lock:
+            with self._lock:
+                stocks, self._stocks = self._stocks, []
+                cryptos, self._cryptos = self._cryptos, []
+                retries, self._retries = self._retries, []
+            if not stocks and not cryptos and not retries:
+                return 0
+
+            written = 0
+            if stocks or cryptos:
+                try:
+                    written = self.storage.save_snapshots(stocks=stocks, cryptos=cryptos)
+                except Exception as e:
+                    print(f"Error flushing {len(stocks) + len(cryptos)} snapshots, writing them one by one: {e}")
+                    with self._lock:
+                        self.counters["flush_errors"] += 1
+                    retries = ([("stocks", row, 0) for row in stocks] + [("cryptos", row, 0) for row in cryptos]
+                               + retries)
+
+            failed = []
+            for kind, row, attempts in retries:
+                try:
+                    written += self.storage.save_snapshots(**{kind: [row]})
+                except Exception as e:
+                    attempts += 1
+                    if attempts >= self.max_retries:
+                        print(f"Dropping {kind[:-1]} snapshot for {row[0]} after {attempts} failed writes: {e}")
+                        self.rejected.append((kind, row, str(e)))
+                        with self._lock:
+                            self.counters["dropped"] += 1
+                    else:
+                        failed.append((kind, row, attempts))
+                        with self._lock:
+                            self.counters["retried"] += 1
+
+            with self._lock:
+                self._retries = failed + self._retries
+                self.counters["written"] += written
+                self.counters["flushes"] += 1
+                self.counters["queued"] = len(self._stocks) + len(self._cryptos) + len(self._retries)
+            return written
+
+    def start(self):
+        """Start the background flush thread."""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread and write whatever is still queued."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def create_ohlcv_tables(conn):
+    """Create the ohlcv_bars table (shared with retention.py, which may run on other databases)."""
+    # Normalized price series: one typed row per bar, clustered on the
+    # primary key so a (symbol, interval, ts range) query is an index scan
+    conn.execute("""CREATE TABLE IF NOT EXISTS ohlcv_bars (
+            symbol TEXT NOT NULL,
+            interval TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume REAL,
+            PRIMARY KEY (symbol, interval, ts)
+        ) WITHOUT ROWID""")
+    # Rollups and retention work on one interval across all symbols
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ohlcv_bars_interval_ts ON ohlcv_bars (interval, ts)")
+
+
+def _add_range(query, params, start, end):
+    if start is not None:
+        query += " AND ts >= ?"
+        params.append(to_epoch_seconds(start))
+    if end is not None:
+        query += " AND ts <= ?"
+        params.append(to_epoch_seconds(end))
+    return query, params
+
+
+def _bar_rows(symbol, bars):
+    interval, rows = bars
+    return [(symbol, interval) + row for row in rows]
+
+
+def infer_interval(timestamps, default="1d"):
+    """Pick the INTERVAL_SECONDS entry closest to the median spacing of sorted epoch timestamps."""
+    if len(timestamps) < 2:
+        return default
+    gaps = sorted(b - a for a, b in zip(timestamps, timestamps[1:]) if b > a)
+    if not gaps:
+        return default
+    median = gaps[len(gaps) // 2]
+    return min(INTERVAL_SECONDS, key=lambda name: abs(INTERVAL_SECONDS[name] - median))
+
+
+def history_to_bars(history, interval=None):
+    """
+    Convert a yfinance history dict to bar rows.
+
+    Accepts both DataFrame.to_dict() output ({"Open": {ts: value}, ...}) and
+    row-oriented dicts ({ts: {"Open": value, ...}}).
+
+    Returns:
+        (interval, [(ts, open, high, low, close, volume), ...]) sorted by ts
+    """
+    if not history:
+        return interval or "1d", []
+    by_ts = {}
+    if any(str(key).lower() in OHLCV_COLUMNS for key in history):
+        for column, values in history.items():
+            column = str(column).lower()
+            if column not in OHLCV_COLUMNS:
+                continue
+            for ts, value in values.items():
+                by_ts.setdefault(to_epoch_seconds(ts), {})[column] = value
+    else:
+        for ts, values in history.items():
+            bar = by_ts.setdefault(to_epoch_seconds(ts), {})
+            for column, value in values.items():
+                if str(column).lower() in OHLCV_COLUMNS:
+                    bar[str(column).lower()] = value
+
+    timestamps = sorted(by_ts)
+    rows = [(ts,) + tuple(_to_float(by_ts[ts].get(column)) for column in OHLCV_COLUMNS) for ts in timestamps]
+    return interval or infer_interval(timestamps), rows
+
+
+def market_chart_to_bars(market_chart, interval=None):
+    """
+    Aggregate a CoinGecko market_chart ({"prices": [[ms, price]], "total_volumes": [[ms, volume]]})
+    into bars.
+
+    CoinGecko samples are not aligned to bar boundaries, so they are bucketed
+    onto the interval grid: open/close are the first/last price in the bucket,
+    high/low the extremes and volume the last reported 24h volume.
+
+    Returns:
+        (interval, [(ts, open, high, low, close, volume), ...]) sorted by ts
+    """
+    prices = sorted((to_epoch_seconds(ts), _to_float(price)) for ts, price in market_chart.get("prices", []))
+    if not prices:
+        return interval or "1d", []
+    interval = interval or infer_interval([ts for ts, _ in prices])
+    step = INTERVAL_SECONDS[interval]
+
+    buckets = {}
+    for ts, price in prices:
+        bucket = ts - ts % step
+        bar = buckets.get(bucket)
+        if bar is None:
+            buckets[bucket] = [price, price, price, price, None]
+        elif price is not None:
+            bar[1] = price if bar[1] is None else max(bar[1], price)
+            bar[2] = price if bar[2] is None else min(bar[2], price)
+            bar[3] = price
+    for ts, volume in sorted((to_epoch_seconds(ts), _to_float(v)) for ts, v in market_chart.get("total_volumes", [])):
+        bar = buckets.get(ts - ts % step)
+        if bar is not None:
+            bar[4] = volume
+
+    return interval, [(ts,) + tuple(buckets[ts]) for ts in sorted(buckets)]
+
+
+def _to_float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    # NaN (missing yfinance values) is stored as NULL
+    return None if value != value else value
 
 
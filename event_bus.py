@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from api_serialization import dumps
+
+
+@dataclass
+class Event:
+    """One published event. Ids increase monotonically within the process."""
+    id: int
+    topic: str
+    data: Any
+    timestamp: float
+
+    def to_sse(self) -> str:
+        """Format as a Server-Sent Events frame."""
+        data = dumps(self.data).decode()
+        return f"id: {self.id}\nevent: {self.topic}\ndata: {data}\n\n"
+
+
+def topic_matches(topic: str, filters: Optional[Iterable[str]]) -> bool:
+    """'prices' matches 'prices' and 'prices.AAPL'; no filters match everything."""
+    if not filters:
+        return True
+    return any(topic == f or topic.startswith(f + ".") for f in filters)
+
+
+class Subscription:
+    """
+    A subscriber's bounded queue of events.
+
+    Publishers never wait for subscribers: when the queue is full the oldest
+    event is dropped and the subscription is marked as lagged, so the client
+    can be told to reload the state it missed.
+    """
+
+    def __init__(self, bus: "EventBus", topics: Optional[List[str]], max_queue: int):
+        self.bus = bus
+        self.topics = topics
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.closed = False
+        self._queue = deque()
+        self._condition = threading.Condition()
+
+    def offer(self, event: Event):
+        with self._condition:
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(event)
+            self._condition.notify()
+
+    def get(self, timeout: float = None, max_events: int = 100) -> List[Event]:
+        """Wait up to timeout seconds for events and return those queued (empty on timeout)."""
+        with self._condition:
+            if not self._queue and not self.closed:
+                self._condition.wait(timeout)
+            events = []
+            while self._queue and len(events) < max_events:
+                events.append(self._queue.popleft())
+            return events
+
+    def take_dropped(self) -> int:
+        """Number of events dropped since the last call."""
+        with self._condition:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+
+    def close(self):
+        self.bus.unsubscribe(self)
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class EventBus:
+    """
+    In-process publish/subscribe bus.
+
+    Recent events are kept in a ring buffer so a reconnecting client can
+    resume from the last event id it saw (SSE Last-Event-ID).
+    """
+
+    def __init__(self, history_size: int = 1000, max_queue: int = 256):
+        """
+        Initialize the bus.
+
+        Args:
+            history_size: Number of recent events kept for resuming clients
+            max_queue: Default per-subscriber queue size before events are dropped
+        """
+        self.max_queue = max_queue
+        self._history = deque(maxlen=history_size)
+        self._subscriptions: List[Subscription] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.counters = {"published": 0, "delivered": 0}
+
+    def publish(self, topic: str, data: Any) -> Event:
+        """Publish an event to every subscriber whose filters match its topic."""
+        with self._lock:
+            event = Event(self._next_id, topic, data, time.time())
+            self._next_id += 1
+            self._history.append(event)
+            subscriptions = [s for s in self._subscriptions if topic_matches(topic, s.topics)]
+            self.counters["published"] += 1
+            self.counters["delivered"] += len(subscriptions)
+        for subscription in subscriptions:
+            subscription.offer(event)
+        return event
+
+    def subscribe(self, topics: Optional[Iterable[str]] = None, last_event_id: int = None,
+                  max_queue: int = None) -> Subscription:
+        """
+        Subscribe to events.
+
+        Args:
+            topics: Topic filters (all topics if None), see topic_matches()
+            last_event_id: Replay buffered events newer than this id first
+            max_queue: Queue size for this subscriber (defaults to the bus's)
+
+        Returns:
+            Subscription; close() it when the client goes away
+        """
+        subscription = Subscription(self, list(topics) if topics else None, max_queue or self.max_queue)
+        with self._lock:
+            if last_event_id is not None:
+                if self._history and self._history[0].id > last_event_id + 1:
+                    # Part of what the client missed is no longer buffered
+                    subscription.dropped += self._history[0].id - last_event_id - 1
+                for event in self._history:
+                    if event.id > last_event_id and topic_matches(event.topic, subscription.topics):
+                        subscription.offer(event)
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["subscribers"] = len(self._subscriptions)
+            stats["last_event_id"] = self._next_id - 1
+        return stats
+
+
+def sse_stream(subscription: Subscription, heartbeat: float = 15.0, retry_ms: int = 3000) -> Iterator[str]:
+    """
+    Yield Server-Sent Events frames for a subscription until the client disconnects.
+
+    Sends a comment line every `heartbeat` seconds so proxies keep the
+    connection open, and a 'lagged' event with the number of events the
+    client missed whenever its queue overflowed.
+    """
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        while not subscription.closed:
+            events = subscription.get(timeout=heartbeat)
+            dropped = subscription.take_dropped()
+            if dropped:
+                yield f"event: lagged\ndata: {dumps({'dropped': dropped}).decode()}\n\n"
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            yield "".join(event.to_sse() for event in events)
+    finally:
+        # Runs when the server closes the generator after a disconnect
+        subscription.close()
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    """Get the process-wide event bus."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = EventBus()
+    return _bus
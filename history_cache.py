@@ -0,0 +1,224 @@
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# One fixed-width little-endian file per column: <root>/<interval>/<symbol>/<column>
+COLUMNS = {"ts": "q", "close": "d", "volume": "d"}
+RECORD_SIZE = 8
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9._-]")
+
+
+class HistoryView:
+    """
+    Read-only columns of one symbol, memory-mapped from the cache files.
+
+    Columns are np.frombuffer views on the mappings (memoryviews without
+    NumPy), so no per-value Python objects are created. Rows appended after
+    the view was opened are not visible; open a new view to see them.
+    """
+
+    def __init__(self, maps: Dict[str, Optional[mmap.mmap]], rows: int, start: int = 0):
+        self._maps = maps
+        self.rows = rows - start
+        self.columns = {}
+        for name, code in COLUMNS.items():
+            buffer = maps.get(name)
+            if buffer is None or rows == 0:
+                self.columns[name] = _empty(code)
+            else:
+                self.columns[name] = _array(buffer, code, start, rows)
+
+    @property
+    def timestamps(self):
+        return self.columns["ts"]
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def close(self):
+        # Views must be dropped before the mappings can be closed
+        self.columns = {}
+        for buffer in self._maps.values():
+            if buffer is not None:
+                try:
+                    buffer.close()
+                except BufferError:
+                    # A caller still holds a slice of the data; the mapping is freed with it
+                    pass
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HistoryCache:
+    """
+    Append-only on-disk cache of per-symbol close/volume columns.
+
+    Each column is a flat file of 8-byte values, so reading 30 days of minute
+    bars is an mmap and a binary search instead of building dicts. Appends only
+    add rows newer than the last cached timestamp; a row with the same
+    timestamp as the last one (a bar still in progress) overwrites it in place.
+    """
+
+    def __init__(self, root: str = "history_cache"):
+        self.root = root
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, _SAFE_NAME.sub("_", interval), _SAFE_NAME.sub("_", symbol))
+
+    def _lock(self, path: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    @staticmethod
+    def _rows(path: str) -> int:
+        # Columns may differ in length after a crash mid-append; the shortest wins
+        sizes = []
+        for name in COLUMNS:
+            column_path = os.path.join(path, name)
+            sizes.append(os.path.getsize(column_path) // RECORD_SIZE if os.path.exists(column_path) else 0)
+        return min(sizes)
+
+    def append(self, symbol: str, interval: str, timestamps: Sequence[int],
+               closes: Sequence[Optional[float]], volumes: Sequence[Optional[float]]) -> int:
+        """
+        Append bars (sorted by timestamp) for one symbol.
+
+        Returns:
+            Number of rows appended or overwritten
+        """
+        path = self._dir(symbol, interval)
+        with self._lock(path):
+            os.makedirs(path, exist_ok=True)
+            rows = self._rows(path)
+            last_ts = self._last_timestamp(path, rows)
+
+            new_rows = [
+                (int(ts), _float(close), _float(volume))
+                for ts, close, volume in zip(timestamps, closes, volumes)
+                if last_ts is None or int(ts) >= last_ts
+            ]
+            if not new_rows:
+                return 0
+            # Drop duplicate timestamps within the batch, keeping the latest values
+            deduped = {}
+            for row in new_rows:
+                deduped[row[0]] = row
+            new_rows = [deduped[ts] for ts in sorted(deduped)]
+
+            overwrite_last = last_ts is not None and new_rows[0][0] == last_ts
+            offset = (rows - 1 if overwrite_last else rows) * RECORD_SIZE
+            for index, (name, code) in enumerate(COLUMNS.items()):
+                data = struct.pack(f"<{len(new_rows)}{code}", *(row[index] for row in new_rows))
+                column_path = os.path.join(path, name)
+                with open(column_path, "r+b" if os.path.exists(column_path) else "wb") as f:
+                    # Truncate any partial tail left by an interrupted append
+                    f.truncate(rows * RECORD_SIZE)
+                    f.seek(offset)
+                    f.write(data)
+            return len(new_rows)
+
+    def append_bars(self, symbol: str, interval: str, bars: Sequence[tuple]) -> int:
+        """Append (ts, open, high, low, close, volume) rows, e.g. from data_storage.history_to_bars()."""
+        return self.append(symbol, interval, [bar[0] for bar in bars], [bar[4] for bar in bars],
+                           [bar[5] for bar in bars])
+
+    def _last_timestamp(self, path: str, rows: int) -> Optional[int]:
+        if rows == 0:
+            return None
+        with open(os.path.join(path, "ts"), "rb") as f:
+            f.seek((rows - 1) * RECORD_SIZE)
+            return struct.unpack("<q", f.read(RECORD_SIZE))[0]
+
+    def open(self, symbol: str, interval: str, start: int = None) -> HistoryView:
+        """
+        Map a symbol's columns.
+
+        Args:
+            symbol: Ticker or coin id
+            interval: Bar interval
+            start: Only expose rows with ts >= start (epoch seconds)
+        """
+        path = self._dir(symbol, interval)
+        rows = self._rows(path) if os.path.isdir(path) else 0
+        maps = {}
+        if rows:
+            for name in COLUMNS:
+                with open(os.path.join(path, name), "rb") as f:
+                    maps[name] = mmap.mmap(f.fileno(), rows * RECORD_SIZE, access=mmap.ACCESS_READ)
+        first = 0
+        if rows and start is not None:
+            first = _search(maps["ts"], rows, int(start))
+        return HistoryView(maps, rows, first)
+
+    def window(self, symbol: str, interval: str, seconds: float, now: float = None) -> HistoryView:
+        """Map the rows of the last `seconds` seconds."""
+        now = time.time() if now is None else now
+        return self.open(symbol, interval, start=int(now - seconds))
+
+    def intervals(self, symbol: str):
+        """Intervals the cache holds bars of for a symbol."""
+        if not os.path.isdir(self.root):
+            return []
+        name = _SAFE_NAME.sub("_", symbol)
+        return sorted(interval for interval in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, interval, name)))
+
+    def symbols(self, interval: str):
+        path = os.path.join(self.root, _SAFE_NAME.sub("_", interval))
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+
+def _array(buffer, code: str, start: int, rows: int):
+    if np is not None:
+        dtype = "<i8" if code == "q" else "<f8"
+        return np.frombuffer(buffer, dtype=dtype, count=rows - start, offset=start * RECORD_SIZE)
+    view = memoryview(buffer)[start * RECORD_SIZE:rows * RECORD_SIZE]
+    if sys.byteorder == "little":
+        return view.cast(code)
+    import array
+    values = array.array(code, bytes(view))
+    values.byteswap()
+    return values
+
+
+def _empty(code: str):
+    if np is not None:
+        return np.empty(0, dtype="<i8" if code == "q" else "<f8")
+    return memoryview(b"").cast(code)
+
+
+def _search(buffer, rows: int, target: int) -> int:
+    """Index of the first timestamp >= target (binary search without decoding the column)."""
+    low, high = 0, rows
+    while low < high:
+        middle = (low + high) // 2
+        if struct.unpack_from("<q", buffer, middle * RECORD_SIZE)[0] < target:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _float(value) -> float:
+    return float("nan") if value is None else float(value)
@@ -0,0 +1,286 @@
+import json
+import struct
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# Blob layout (little-endian):
+#   header   "<4sBBHI": magic, version, compression, column count, row count
+#   names    per column: uint16 length + UTF-8 name
+#   padding  to a multiple of 8 bytes so the arrays below are aligned
+#   payload  int64 timestamp deltas (first value absolute, epoch seconds),
+#            int64 UTC offsets of the original timestamps in seconds (version 2),
+#            then one float64 array per column; optionally compressed as a whole
+MAGIC = b"WFH1"
+VERSION = 2
+# Version 1 blobs have no offset column; their timestamps are read back as UTC
+VERSIONS = (1, 2)
+_HEADER = struct.Struct("<4sBBHI")
+
+# Offset stored for timestamps that had no time zone
+NAIVE_OFFSET = -(1 << 62)
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZ4 = 2
+COMPRESSIONS = {"raw": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "lz4": COMPRESSION_LZ4}
+
+
+class HistoryArrays:
+    """
+    Decoded history: epoch-second timestamps plus one float64 array per column.
+
+    With NumPy installed the value columns are np.frombuffer views on the
+    (decompressed) blob; without it they are memoryviews. Timestamps are
+    rebuilt from their deltas, so they are the only column that is copied.
+    `offsets` holds the UTC offset (seconds) each timestamp was written with,
+    or None if they are all UTC.
+    """
+
+    def __init__(self, timestamps, columns: Dict[str, Sequence[float]], offsets: Sequence[int] = None):
+        self.timestamps = timestamps
+        self.columns = columns
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def records(self) -> List[Dict[str, Optional[float]]]:
+        """Row-wise view: [{"ts": ..., column: value, ...}], with None for missing values."""
+        names = list(self.columns)
+        rows = zip(self.timestamps, *(self.columns[name] for name in names))
+        return [
+            dict(ts=int(row[0]), **{name: (None if value != value else float(value)) for name, value in zip(names, row[1:])})
+            for row in rows
+        ]
+
+    def to_pandas(self):
+        """DataFrame indexed by UTC timestamp (requires pandas)."""
+        import pandas as pd
+        index = pd.to_datetime(self.timestamps, unit="s", utc=True)
+        return pd.DataFrame(dict(self.columns), index=index)
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """
+        Convert back to the {column: {timestamp: value}} layout.
+
+        Keys are ISO timestamps in the offset they were written with, e.g.
+        '2025-09-02 00:00:00-04:00' for an exchange-local yfinance index.
+        """
+        if self.offsets is None:
+            keys = [_iso_key(int(ts), 0) for ts in self.timestamps]
+        else:
+            keys = [_iso_key(int(ts), int(offset)) for ts, offset in zip(self.timestamps, self.offsets)]
+        result = {}
+        for name, values in self.columns.items():
+            result[name] = {key: (None if value != value else float(value)) for key, value in zip(keys, values)}
+        return result
+
+
+def to_epoch_seconds(value):
+    """Convert a pandas Timestamp, datetime, ISO string or epoch (s or ms) to epoch seconds."""
+    if isinstance(value, (int, float)):
+        # CoinGecko timestamps are in milliseconds
+        return int(value / 1000) if value > 1e11 else int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def utc_offset_seconds(value) -> int:
+    """UTC offset of a timestamp key in seconds; NAIVE_OFFSET for naive ones, 0 for epoch numbers."""
+    if isinstance(value, (int, float)):
+        return 0
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    offset = value.utcoffset()
+    return NAIVE_OFFSET if offset is None else int(offset.total_seconds())
+
+
+def history_columns(history, with_offsets: bool = False) -> Optional[tuple]:
+    """
+    Turn a DataFrame.to_dict() history ({column: {timestamp: value}}) into
+    (timestamps, {column: values}) sorted by time.
+
+    Args:
+        history: {column: {timestamp: value}} dict
+        with_offsets: Also return the UTC offset of each timestamp key, see utc_offset_seconds()
+
+    Returns:
+        None if the history does not have that shape or holds non-numeric values
+    """
+    if not history or not all(isinstance(values, dict) for values in history.values()):
+        return None
+    offsets = {}
+    try:
+        by_column = {}
+        for column, values in history.items():
+            by_column[str(column)] = by_ts = {}
+            for key, value in values.items():
+                ts = to_epoch_seconds(key)
+                by_ts[ts] = _to_float(value)
+                if with_offsets and ts not in offsets:
+                    offsets[ts] = utc_offset_seconds(key)
+    except (TypeError, ValueError, AttributeError, OverflowError):
+        return None
+    timestamps = sorted(set().union(*(values.keys() for values in by_column.values())))
+    nan = float("nan")
+    columns = {name: [values.get(ts, nan) for ts in timestamps] for name, values in by_column.items()}
+    if with_offsets:
+        return timestamps, columns, [offsets[ts] for ts in timestamps]
+    return timestamps, columns
+
+
+def encode_columns(timestamps: Sequence[int], columns: Dict[str, Sequence[float]],
+                   compression: str = "zlib", offsets: Sequence[int] = None) -> bytes:
+    """
+    Pack a timestamp column and float columns into a history blob.
+
+    Args:
+        timestamps: Epoch seconds, ascending
+        columns: Column name to values (same length as timestamps)
+        compression: 'raw', 'zlib' or 'lz4' (falls back to zlib if lz4 is not installed)
+        offsets: UTC offset in seconds of each timestamp (all UTC if None)
+    """
+    if compression == "lz4" and lz4_frame is None:
+        compression = "zlib"
+    rows = len(timestamps)
+    deltas = [timestamps[0]] + [b - a for a, b in zip(timestamps, timestamps[1:])] if rows else []
+
+    names = b"".join(struct.pack("<H", len(n)) + n for n in (name.encode("utf-8") for name in columns))
+    header = _HEADER.pack(MAGIC, VERSION, COMPRESSIONS[compression], len(columns), rows) + names
+    header += b"\0" * (-len(header) % 8)
+
+    payload = struct.pack(f"<{rows}q", *deltas)
+    payload += struct.pack(f"<{rows}q", *(offsets if offsets is not None else [0] * rows))
+    for values in columns.values():
+        payload += struct.pack(f"<{rows}d", *values)
+    if compression == "zlib":
+        payload = zlib.compress(payload, 6)
+    elif compression == "lz4":
+        payload = lz4_frame.compress(payload)
+    return header + payload
+
+
+def encode_history(history, compression: str = "zlib") -> Optional[bytes]:
+    """Encode a DataFrame.to_dict() history, or return None if it cannot be packed."""
+    packed = history_columns(history, with_offsets=True)
+    if packed is None:
+        return None
+    timestamps, columns, offsets = packed
+    return encode_columns(timestamps, columns, compression, offsets)
+
+
+def is_encoded(value) -> bool:
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:4]) == MAGIC
+
+
+def decode_history(blob) -> HistoryArrays:
+    """Decode a history blob into arrays without copying the value columns."""
+    buffer = memoryview(blob)
+    magic, version, compression, column_count, rows = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version not in VERSIONS:
+        raise ValueError("Not a history blob")
+
+    offset = _HEADER.size
+    names = []
+    for _ in range(column_count):
+        (length,) = struct.unpack_from("<H", buffer, offset)
+        names.append(bytes(buffer[offset + 2:offset + 2 + length]).decode("utf-8"))
+        offset += 2 + length
+    offset += -offset % 8
+
+    payload = buffer[offset:]
+    if compression == COMPRESSION_ZLIB:
+        payload = memoryview(zlib.decompress(payload))
+    elif compression == COMPRESSION_LZ4:
+        if lz4_frame is None:
+            raise ValueError("History blob is lz4-compressed but lz4 is not installed")
+        payload = memoryview(lz4_frame.decompress(payload))
+
+    size = rows * 8
+    # Columns before the float arrays: timestamps, plus offsets from version 2 on
+    first = 2 if version >= 2 else 1
+    if np is not None:
+        timestamps = np.cumsum(np.frombuffer(payload, dtype="<i8", count=rows))
+        offsets = np.frombuffer(payload, dtype="<i8", count=rows, offset=size) if first == 2 else None
+        columns = {
+            name: np.frombuffer(payload, dtype="<f8", count=rows, offset=size * (i + first))
+            for i, name in enumerate(names)
+        }
+    else:
+        timestamps = list(accumulate(_view(payload[:size], "q")))
+        offsets = _view(payload[size:size * 2], "q") if first == 2 else None
+        columns = {name: _view(payload[size * (i + first):size * (i + first + 1)], "d")
+                   for i, name in enumerate(names)}
+    return HistoryArrays(timestamps, columns, offsets)
+
+
+def bars_to_arrays(rows: Sequence[tuple], columns: Sequence[str]) -> HistoryArrays:
+    """Build HistoryArrays from (ts, value, ...) rows, e.g. an ohlcv_bars query result."""
+    nan = float("nan")
+    timestamps = [row[0] for row in rows]
+    values = {
+        name: [nan if row[i] is None else row[i] for row in rows]
+        for i, name in enumerate(columns, start=1)
+    }
+    if np is not None:
+        return HistoryArrays(np.array(timestamps, dtype=np.int64),
+                             {name: np.array(column, dtype=np.float64) for name, column in values.items()})
+    return HistoryArrays(timestamps, values)
+
+
+def load_history(value):
+    """Read a stored history value, binary or legacy JSON, as a {column: {timestamp: value}} dict."""
+    if value is None:
+        return {}
+    if is_encoded(value):
+        return decode_history(value).to_dict()
+    return json.loads(value)
+
+
+_zones = {0: timezone.utc}
+
+
+def _iso_key(ts: int, offset: int) -> str:
+    if offset == NAIVE_OFFSET:
+        return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat(sep=" ")
+    zone = _zones.get(offset)
+    if zone is None:
+        zone = _zones.setdefault(offset, timezone(timedelta(seconds=offset)))
+    return datetime.fromtimestamp(ts, zone).isoformat(sep=" ")
+
+
+def _view(buffer: memoryview, fmt: str):
+    if sys.byteorder == "little":
+        return buffer.cast(fmt)
+    # Big-endian hosts need a byte-swapped copy
+    import array
+    values = array.array(fmt, bytes(buffer))
+    values.byteswap()
+    return values
+
+
+def _to_float(value):
+    if value is None:
+        return float("nan")
+    if not isinstance(value, (int, float)) and not hasattr(value, "__float__"):
+        raise TypeError(f"Non-numeric history value: {value!r}")
+    return float(value)
@@ -0,0 +1,282 @@
+import hashlib
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from functools import wraps
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from api_serialization import negotiate, response_encoding
+
+
+class CachedResponse:
+    """A rendered response body with its validators."""
+
+    __slots__ = ("body", "status", "content_type", "etag", "last_modified", "created", "cacheable", "encoded")
+
+    def __init__(self, body: bytes, status: int = 200, content_type: str = "application/json",
+                 cacheable: bool = True):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.last_modified = time.time()
+        self.created = time.monotonic()
+        self.cacheable = cacheable
+        # Compressed copies of the body by content coding, made on first request for each
+        self.encoded: Dict[str, bytes] = {}
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created
+
+
+class EndpointCache:
+    """
+    In-memory cache of rendered endpoint responses with stale-while-revalidate.
+
+    A response younger than its TTL is served as is. Between the TTL and
+    TTL + stale_ttl the stale copy is served and one background refresh is
+    started; after that the next request renders it again, with concurrent
+    requests for the same key waiting for that one render. POST handlers
+    call invalidate() so the next GET sees their changes.
+    """
+
+    def __init__(self, default_ttl: float = 5.0, default_stale_ttl: float = 30.0, max_entries: int = 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            default_ttl: Seconds a response is served without refreshing it
+            default_stale_ttl: Seconds past the TTL a response may still be served while it is refreshed
+            max_entries: Maximum number of cached responses (oldest are dropped first)
+        """
+        self.default_ttl = default_ttl
+        self.default_stale_ttl = default_stale_ttl
+        self.max_entries = max_entries
+
+        self._entries: Dict[Hashable, CachedResponse] = {}
+        # Per-key render locks with the number of renders holding them; dropped
+        # when the last one finishes, so keys never rendered again cost nothing
+        self._key_locks: Dict[Hashable, list] = {}
+        self._refreshing = set()
+        # Bumped by invalidate() so refreshes started before it are discarded
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.counters = {"hits": 0, "stale": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0,
+                         "not_modified": 0, "invalidations": 0}
+
+    def get_or_render(self, key: tuple, render: Callable[[], CachedResponse], ttl: float = None,
+                      stale_ttl: float = None,
+                      refresh: Callable[[Callable[[], None]], None] = None) -> Tuple[CachedResponse, str]:
+        """
+        Get a cached response, rendering it on a miss.
+
+        Args:
+            key: Cache key; key[0] is the endpoint name used by invalidate()
+            render: Zero-argument callable that renders the response
+            ttl: Fresh lifetime in seconds (defaults to default_ttl)
+            stale_ttl: Stale-while-revalidate window in seconds (defaults to default_stale_ttl)
+            refresh: Runs a background refresh callable (defaults to a daemon thread)
+
+        Returns:
+            (response, 'HIT', 'STALE' or 'MISS')
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        stale_ttl = self.default_stale_ttl if stale_ttl is None else stale_ttl
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.age < ttl:
+                self.counters["hits"] += 1
+                return entry, "HIT"
+            if entry is not None and entry.age < ttl + stale_ttl:
+                self.counters["stale"] += 1
+                start_refresh = key not in self._refreshing
+                if start_refresh:
+                    self._refreshing.add(key)
+                    version = self._versions.get(key[0], 0)
+            else:
+                entry = None
+            if entry is None or start_refresh:
+                key_lock = self._hold_key_lock(key)
+
+        if entry is not None:
+            if start_refresh:
+                (refresh or _start_thread)(lambda: self._refresh(key, key_lock, render, version))
+            return entry, "STALE"
+
+        # One render per key; requests arriving meanwhile wait and reuse it
+        try:
+            with key_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None and entry.age < ttl:
+                        self.counters["hits"] += 1
+                        return entry, "HIT"
+                    self.counters["misses"] += 1
+                    version = self._versions.get(key[0], 0)
+                entry = render()
+                self._store(key, entry, version)
+                return entry, "MISS"
+        finally:
+            with self._lock:
+                self._release_key_lock(key)
+
+    def _hold_key_lock(self, key) -> threading.Lock:
+        # Caller holds self._lock
+        holder = self._key_locks.get(key)
+        if holder is None:
+            holder = self._key_locks[key] = [threading.Lock(), 0]
+        holder[1] += 1
+        return holder[0]
+
+    def _release_key_lock(self, key):
+        # Caller holds self._lock
+        holder = self._key_locks[key]
+        holder[1] -= 1
+        if holder[1] == 0:
+            del self._key_locks[key]
+
+    def _refresh(self, key, key_lock, render, version):
+        try:
+            with key_lock:
+                self._store(key, render(), version)
+            with self._lock:
+                self.counters["refreshes"] += 1
+        except Exception as e:
+            # Keep serving the stale copy; the next request past the window renders again
+            print(f"Error refreshing cached response for {key[0]}: {e}")
+            with self._lock:
+                self.counters["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+                self._release_key_lock(key)
+
+    def _store(self, key, entry: CachedResponse, version: int):
+        if not entry.cacheable:
+            return
+        with self._lock:
+            if self._versions.get(key[0], 0) != version:
+                # Invalidated while rendering: the result may predate the change
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                del self._entries[oldest]
+
+    def invalidate(self, *names: str):
+        """Drop every cached response of the named endpoints."""
+        with self._lock:
+            for name in names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+            for key in [key for key in self._entries if key[0] in names]:
+                del self._entries[key]
+            self.counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            for name in {key[0] for key in self._entries}:
+                self._versions[name] = self._versions.get(name, 0) + 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["refreshing"] = len(self._refreshing)
+        return stats
+
+    def cached(self, name: str, ttl: float = None, stale_ttl: float = None):
+        """
+        Decorator caching a Flask view's GET responses.
+
+        Only 200 responses are cached. Responses carry an ETag and Last-Modified,
+        and conditional requests that still match get an empty 304.
+
+        Args:
+            name: Endpoint name, used as the cache key prefix and by invalidate()
+            ttl: Fresh lifetime in seconds
+            stale_ttl: Stale-while-revalidate window in seconds
+        """
+        from flask import Response, copy_current_request_context, current_app, request
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return view(*args, **kwargs)
+
+                def render():
+                    response = current_app.make_response(view(*args, **kwargs))
+                    return CachedResponse(response.get_data(), response.status_code, response.content_type,
+                                          cacheable=response.status_code == 200)
+
+                def refresh(function):
+                    # The refresh renders the view outside this request, so it needs a copy of its context
+                    _start_thread(copy_current_request_context(function))
+
+                # URL arguments are strings, so the key is hashable as is
+                key = (name, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+                entry, state = self.get_or_render(key, render, ttl, stale_ttl, refresh)
+
+                if entry.cacheable and not_modified(entry, request.headers.get("If-None-Match"),
+                                                    request.headers.get("If-Modified-Since")):
+                    with self._lock:
+                        self.counters["not_modified"] += 1
+                    response = Response(status=304)
+                    encoding = response_encoding(len(entry.body), request.headers.get("Accept-Encoding"),
+                                                 entry.content_type)
+                else:
+                    body, encoding = negotiate(entry.body, request.headers.get("Accept-Encoding"),
+                                               entry.content_type, entry.encoded)
+                    response = Response(body, status=entry.status, content_type=entry.content_type)
+                    if encoding:
+                        response.headers["Content-Encoding"] = encoding
+                response.vary.add("Accept-Encoding")
+                if entry.cacheable:
+                    # A compressed body is the same content in different bytes, so its validator is weak
+                    response.headers["ETag"] = "W/" + entry.etag if encoding else entry.etag
+                    response.headers["Last-Modified"] = formatdate(entry.last_modified, usegmt=True)
+                    response.headers["Age"] = str(int(entry.age))
+                    # Browsers revalidate on every poll; a matching ETag costs a dict lookup and a 304
+                    response.headers["Cache-Control"] = "no-cache"
+                response.headers["X-Cache"] = state
+                return response
+            return wrapper
+        return decorator
+
+
+def not_modified(entry: CachedResponse, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+    """Whether a conditional request's validators still match the entry (If-None-Match wins)."""
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.replace("W/", "", 1) == entry.etag for tag in tags)
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError, IndexError):
+            return False
+        # HTTP dates have one second resolution
+        return int(entry.last_modified) <= since
+    return False
+
+
+def _start_thread(function):
+    threading.Thread(target=function, daemon=True).start()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_endpoint_cache() -> EndpointCache:
+    """Get the process-wide endpoint cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EndpointCache()
+    return _cache
@@ -0,0 +1,103 @@
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Default pool and timeout settings per host. Hosts that are not listed here
+# fall back to DEFAULT_HOST_CONFIG.
+DEFAULT_HOST_CONFIG = {"pool_connections": 4, "pool_maxsize": 10, "timeout": (3.05, 15)}
+
+HOST_CONFIGS = {
+    "api.coingecko.com": {"pool_connections": 1, "pool_maxsize": 10, "timeout": (3.05, 10)},
+    "www.alphavantage.co": {"pool_connections": 1, "pool_maxsize": 5, "timeout": (3.05, 20)},
+    "news.google.com": {"pool_connections": 1, "pool_maxsize": 4, "timeout": (3.05, 10)},
+}
+
+
+class PooledSession(requests.Session):
+    """requests.Session with keep-alive pools and default timeouts per host."""
+
+    def __init__(self, host_configs: Dict[str, Dict] = None, default_config: Dict = None):
+        super().__init__()
+        self.default_config = dict(default_config or DEFAULT_HOST_CONFIG)
+        self.host_configs = {}
+
+        # Catch-all adapters for hosts without their own configuration
+        self._mount_adapter("https://", self.default_config)
+        self._mount_adapter("http://", self.default_config)
+
+        for host, config in (host_configs if host_configs is not None else HOST_CONFIGS).items():
+            self.configure_host(host, **config)
+
+    def _mount_adapter(self, prefix: str, config: Dict):
+        adapter = HTTPAdapter(
+            pool_connections=config.get("pool_connections", self.default_config["pool_connections"]),
+            pool_maxsize=config.get("pool_maxsize", self.default_config["pool_maxsize"]),
+            pool_block=config.get("pool_block", False),
+        )
+        self.mount(prefix, adapter)
+
+    def configure_host(self, host: str, pool_connections: int = None, pool_maxsize: int = None,
+                       timeout=None, pool_block: bool = False):
+        """
+        Set the connection pool size and default timeout for a host.
+
+        Args:
+            host: Host name, e.g. 'api.coingecko.com'
+            pool_connections: Number of pools to cache for the host
+            pool_maxsize: Maximum number of keep-alive connections to the host
+            timeout: Default (connect, read) timeout for requests to the host
+            pool_block: Block when the pool is exhausted instead of opening extra connections
+        """
+        config = dict(self.host_configs.get(host, self.default_config))
+        if pool_connections is not None:
+            config["pool_connections"] = pool_connections
+        if pool_maxsize is not None:
+            config["pool_maxsize"] = pool_maxsize
+        if timeout is not None:
+            config["timeout"] = timeout
+        config["pool_block"] = pool_block
+        self.host_configs[host] = config
+
+        # requests picks the adapter with the longest matching prefix
+        self._mount_adapter(f"https://{host}", config)
+        self._mount_adapter(f"http://{host}", config)
+
+    def get_timeout(self, url: str):
+        host = urlparse(url).hostname or ""
+        return self.host_configs.get(host, self.default_config).get("timeout")
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.get_timeout(url)
+        return super().request(method, url, **kwargs)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> PooledSession:
+    """Get the process-wide pooled session shared by all connectors."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = PooledSession()
+    return _session
+
+
+def configure_host(host: str, **config):
+    """Configure pool size and timeout for a host on the shared session."""
+    get_session().configure_host(host, **config)
+
+
+def reset_session(session: Optional[PooledSession] = None):
+    """Close the shared session and optionally replace it (mainly for tests)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = session
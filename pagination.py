@@ -0,0 +1,89 @@
+import base64
+import json
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+_RELATIVE = re.compile(r"^(\d+)([smhdw])$")
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def encode_cursor(value: Any) -> str:
+    """Opaque cursor for a position in a result set (clients pass it back unchanged)."""
+    return base64.urlsafe_b64encode(json.dumps(value, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Any:
+    """Decode a cursor from encode_cursor(); None if not given. Raises ValueError if malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def parse_limit(value: Optional[str], default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    """Page size from a query argument, capped at maximum. Raises ValueError if not a positive integer."""
+    if value in (None, ""):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f"limit must be an integer, got {value!r}")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, maximum)
+
+
+def parse_since(value: Optional[str], now: datetime = None) -> Optional[datetime]:
+    """
+    Parse a since= filter.
+
+    Accepts an ISO 8601 timestamp, epoch seconds or a relative age such as
+    '15m', '2h', '7d'. Returns a naive local datetime, comparable with the
+    datetime.now().isoformat() timestamps the components store.
+
+    Raises:
+        ValueError: If the value is in none of these formats
+    """
+    if value in (None, ""):
+        return None
+    value = value.strip()
+    match = _RELATIVE.match(value)
+    if match:
+        return (now or datetime.now()) - timedelta(**{_UNITS[match.group(2)]: int(match.group(1))})
+    try:
+        return datetime.fromtimestamp(float(value))
+    except ValueError:
+        pass
+    try:
+        since = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"since must be an ISO timestamp, epoch seconds or an age like '2h', got {value!r}")
+    if since.tzinfo is not None:
+        since = since.astimezone().replace(tzinfo=None)
+    return since
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """Field names from a comma-separated fields= argument, or None for all fields."""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    return fields or None
+
+
+def parse_flag(value: Optional[str]) -> bool:
+    return value is not None and value.lower() in ("", "1", "true", "yes", "on")
+
+
+def project(item: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Keep only the requested top-level fields of a record (all of them if fields is None)."""
+    if fields is None:
+        return item
+    return {field: item[field] for field in fields if field in item}
@@ -0,0 +1,322 @@
+"""
+Bulk export and import of the historical store as partitioned Parquet.
+
+Each table becomes a Hive-partitioned dataset:
+
+    <root>/<table>/<symbol column>=<symbol>/date=<date>/part-*.parquet
+
+so readers filtering on symbols or a time range only open the matching
+directories, and the ts/timestamp filter is pushed down to row group
+statistics. Only the requested columns are read.
+
+Usage:
+    python parquet_io.py export <db> <root> [bars|signals ...]
+    python parquet_io.py import <db> <root> [bars|signals ...]
+"""
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, Optional, Sequence
+from urllib.request import pathname2url
+
+from data_storage import create_ohlcv_tables
+from history_codec import to_epoch_seconds
+from storage_backends import create_saas_tables
+from storage_connections import get_connection_manager, release_connection_manager
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+# Granularity of the date partition. Daily partitions of daily bars make one
+# tiny file per bar, so monthly is the default.
+DATE_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m", "year": "%Y"}
+DATE_COLUMN = "date"
+
+
+@dataclass
+class ExportTable:
+    """A table exported as a Parquet dataset partitioned by symbol and date."""
+    table: str
+    symbol_column: str = "symbol"
+    timestamp_column: str = "timestamp"
+    # INTEGER epoch seconds, or SQLite 'YYYY-MM-DD HH:MM:SS' text
+    epoch_timestamps: bool = False
+    # Export order; the primary key order avoids a sort
+    order_by: Optional[str] = None
+    # Creates the table when importing into a new database
+    create: Optional[Callable] = None
+    # AUTOINCREMENT id that is exported but not imported: the target database
+    # assigns its own, so rows never collide with ids it already holds
+    surrogate_key: Optional[str] = None
+    # Columns identifying an imported row when the surrogate key is left out;
+    # rows already present are skipped
+    natural_key: Sequence[str] = ()
+
+
+BARS = ExportTable("ohlcv_bars", timestamp_column="ts", epoch_timestamps=True,
+                   order_by="symbol, interval, ts", create=create_ohlcv_tables)
+# The SaaS workflow's trading signals
+SIGNALS = ExportTable("signals", create=create_saas_tables, surrogate_key="id",
+                      natural_key=("timestamp", "symbol", "type", "price"))
+
+TABLES = {"bars": BARS, "signals": SIGNALS}
+
+
+def export_table(db_name: str, root: str, spec: ExportTable = BARS, symbols: Sequence[str] = None,
+                 start=None, end=None, date_granularity: str = "month", batch_size: int = 100000) -> int:
+    """
+    Export a table to a partitioned Parquet dataset.
+
+    Rows are streamed from SQLite in batches, so memory use does not grow
+    with the table. Exporting into an existing dataset adds new files next to
+    the old ones.
+
+    Args:
+        db_name: SQLite database file
+        root: Dataset root directory (the table gets a subdirectory)
+        spec: Table to export (BARS or SIGNALS)
+        symbols: Only export these symbols (all if None)
+        start: Only export rows at or after this time (datetime, ISO string or epoch)
+        end: Only export rows at or before this time
+        date_granularity: 'day', 'month' or 'year' date partitions
+        batch_size: Rows fetched and written per batch
+
+    Returns:
+        Number of rows exported
+    """
+    _require_pyarrow()
+    date_format = DATE_FORMATS[date_granularity]
+    # A dedicated read-only connection: pyarrow may pull batches from its own threads
+    conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_name))}?mode=ro", uri=True,
+                           check_same_thread=False)
+    try:
+        columns = _table_columns(conn, spec.table)
+        names = [name for name, _ in columns]
+        schema = pa.schema([(name, _arrow_type(declared)) for name, declared in columns] + [(DATE_COLUMN, pa.string())])
+        query, params = _select(spec, names, symbols, start, end)
+        cursor = conn.execute(query, params)
+        ts_index = names.index(spec.timestamp_column)
+        exported = 0
+
+        def batches() -> Iterator["pa.RecordBatch"]:
+            nonlocal exported
+            dates = {}
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                exported += len(rows)
+                values = list(zip(*rows))
+                values.append([_partition_date(spec, ts, date_format, dates) for ts in values[ts_index]])
+                yield pa.RecordBatch.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema
+                )
+
+        ds.write_dataset(
+            batches(), os.path.join(root, spec.table), schema=schema, format="parquet",
+            partitioning=_partitioning(spec),
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            max_partitions=1 << 20
+        )
+        return exported
+    finally:
+        conn.close()
+
+
+def open_dataset(root: str, spec: ExportTable = BARS) -> "ds.Dataset":
+    """Open an exported table as a pyarrow Dataset."""
+    _require_pyarrow()
+    return ds.dataset(os.path.join(root, spec.table), format="parquet", partitioning=_partitioning(spec))
+
+
+def read_table(root: str, spec: ExportTable = BARS, columns: List[str] = None, symbols: Sequence[str] = None,
+               start=None, end=None, filter=None) -> "pa.Table":
+    """
+    Read an exported table.
+
+    Args:
+        root: Dataset root directory
+        spec: Table to read
+        columns: Columns to read (all if None); the others are never loaded
+        symbols: Only read these symbols' partitions
+        start: Only read rows at or after this time
+        end: Only read rows at or before this time
+        filter: Extra pyarrow.dataset expression, e.g. ds.field("interval") == "1d"
+
+    Returns:
+        pyarrow Table (use .to_pandas() or .to_pydict() as needed)
+    """
+    return open_dataset(root, spec).to_table(columns=columns, filter=_filter(spec, symbols, start, end, filter))
+
+
+def iter_batches(root: str, spec: ExportTable = BARS, columns: List[str] = None, symbols: Sequence[str] = None,
+                 start=None, end=None, filter=None, batch_size: int = 100000) -> Iterator["pa.RecordBatch"]:
+    """Stream an exported table as record batches; arguments as in read_table()."""
+    dataset = open_dataset(root, spec)
+    return dataset.to_batches(columns=columns, filter=_filter(spec, symbols, start, end, filter),
+                              batch_size=batch_size)
+
+
+def import_table(db_name: str, root: str, spec: ExportTable = BARS, symbols: Sequence[str] = None,
+                 start=None, end=None, batch_size: int = 100000) -> int:
+    """
+    Load an exported table into a database, e.g. to bootstrap a new node.
+
+    Each batch is inserted with one executemany in its own transaction.
+    Rows whose primary key (or, for tables with a surrogate key, natural key)
+    already exists are kept as they are.
+
+    Args:
+        db_name: SQLite database file
+        root: Dataset root directory
+        spec: Table to import
+        symbols: Only import these symbols
+        start: Only import rows at or after this time
+        end: Only import rows at or before this time
+        batch_size: Rows per transaction
+
+    Returns:
+        Number of rows inserted
+    """
+    _require_pyarrow()
+    connections = get_connection_manager(db_name)
+    try:
+        with connections.write() as conn:
+            if spec.create is not None:
+                spec.create(conn)
+            columns = [name for name, _ in _table_columns(conn, spec.table)]
+
+        dataset = open_dataset(root, spec)
+        names = [name for name in columns if name in dataset.schema.names and name != spec.surrogate_key]
+        placeholders = ", ".join("?" * len(names))
+        if spec.natural_key:
+            key_indexes = [names.index(name) for name in spec.natural_key]
+            insert = (f"INSERT INTO {spec.table} ({', '.join(names)}) SELECT {placeholders} "
+                      f"WHERE NOT EXISTS (SELECT 1 FROM {spec.table} WHERE "
+                      f"{' AND '.join(f'{name} = ?' for name in spec.natural_key)})")
+        else:
+            insert = f"INSERT OR IGNORE INTO {spec.table} ({', '.join(names)}) VALUES ({placeholders})"
+
+        imported = 0
+        for batch in dataset.to_batches(columns=names, filter=_filter(spec, symbols, start, end),
+                                        batch_size=batch_size):
+            rows = list(zip(*(column.to_pylist() for column in batch.columns)))
+            if spec.natural_key:
+                rows = [row + tuple(row[index] for index in key_indexes) for row in rows]
+            with connections.write() as conn:
+                before = conn.total_changes
+                conn.executemany(insert, rows)
+                imported += conn.total_changes - before
+        return imported
+    finally:
+        release_connection_manager(connections)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet export/import requires pyarrow (pip install pyarrow)")
+
+
+def _table_columns(conn, table):
+    columns = [(row[1], (row[2] or "").upper()) for row in conn.execute(f"PRAGMA table_info({table})")]
+    if not columns:
+        raise ValueError(f"Table {table} does not exist")
+    return columns
+
+
+def _arrow_type(declared: str):
+    # SQLite type affinity rules, reduced to what our tables use
+    if "INT" in declared:
+        return pa.int64()
+    if any(name in declared for name in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return pa.string()
+
+
+def _partitioning(spec: ExportTable):
+    # Explicit string types: inference would turn '2025' or numeric tickers into integers
+    return ds.partitioning(pa.schema([(spec.symbol_column, pa.string()), (DATE_COLUMN, pa.string())]),
+                           flavor="hive")
+
+
+def _bound(spec: ExportTable, value):
+    ts = to_epoch_seconds(value)
+    if spec.epoch_timestamps:
+        return ts
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _partition_date(spec: ExportTable, ts, date_format: str, cache: dict) -> str:
+    if not spec.epoch_timestamps:
+        # 'YYYY-MM-DD ...' text: the date is a prefix
+        return str(ts)[:len(datetime(2000, 1, 1).strftime(date_format))]
+    day = ts // 86400
+    date = cache.get(day)
+    if date is None:
+        date = cache[day] = datetime.fromtimestamp(day * 86400, timezone.utc).strftime(date_format)
+    return date
+
+
+def _select(spec: ExportTable, names: List[str], symbols, start, end):
+    query = f"SELECT {', '.join(names)} FROM {spec.table} WHERE 1 = 1"
+    params = []
+    if symbols:
+        query += f" AND {spec.symbol_column} IN ({', '.join('?' * len(symbols))})"
+        params.extend(symbols)
+    if start is not None:
+        query += f" AND {spec.timestamp_column} >= ?"
+        params.append(_bound(spec, start))
+    if end is not None:
+        query += f" AND {spec.timestamp_column} <= ?"
+        params.append(_bound(spec, end))
+    query += f" ORDER BY {spec.order_by or f'{spec.symbol_column}, {spec.timestamp_column}'}"
+    return query, params
+
+
+def _filter(spec: ExportTable, symbols=None, start=None, end=None, extra=None):
+    """Partition filters (directory pruning) plus row filters (row group statistics)."""
+    conditions = []
+    if symbols:
+        conditions.append(ds.field(spec.symbol_column).isin(list(symbols)))
+    if start is not None:
+        day = datetime.fromtimestamp(to_epoch_seconds(start), timezone.utc).strftime("%Y-%m-%d")
+        # Match day, month and year partitions alike: '2025-09' < '2025-09-15' as strings
+        date = ds.field(DATE_COLUMN)
+        conditions.append((date >= day) | (date == day[:7]) | (date == day[:4]))
+        conditions.append(ds.field(spec.timestamp_column) >= _bound(spec, start))
+    if end is not None:
+        day = datetime.fromtimestamp(to_epoch_seconds(end), timezone.utc).strftime("%Y-%m-%d")
+        conditions.append(ds.field(DATE_COLUMN) <= day)
+        conditions.append(ds.field(spec.timestamp_column) <= _bound(spec, end))
+    if extra is not None:
+        conditions.append(extra)
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] not in ("export", "import"):
+        print(__doc__)
+        sys.exit(1)
+    command, db_name, root = sys.argv[1:4]
+    for name in sys.argv[4:] or ["bars"]:
+        spec = TABLES[name]
+        begin = time.perf_counter()
+        if command == "export":
+            rows = export_table(db_name, root, spec)
+        else:
+            rows = import_table(db_name, root, spec)
+        print(f"{command.capitalize()}ed {rows} rows of {spec.table} in {time.perf_counter() - begin:.2f}s")
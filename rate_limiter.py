@@ -0,0 +1,239 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Requests per second and burst size per provider. Alpha Vantage's free tier
+# allows 5 calls per minute, so it gets no burst at all.
+PROVIDER_RATE_LIMITS = {
+    "coingecko": {"rate": 30 / 60, "capacity": 5},
+    "alphavantage": {"rate": 5 / 60, "capacity": 1},
+    "yahoo": {"rate": 2.0, "capacity": 5},
+}
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class BackoffPolicy:
+    """Jittered exponential backoff ("full jitter") with a cap."""
+
+    def __init__(self, max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Get the delay before retry number `attempt` (0-based).
+
+        Args:
+            attempt: Number of retries already made
+            retry_after: Server-provided Retry-After in seconds, if any
+
+        Returns:
+            Seconds to wait before the next attempt
+        """
+        if retry_after is not None:
+            # Never retry earlier than the server asked; jitter spreads out the herd
+            return min(max(retry_after, 0.0), self.max_delay) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class ProviderLimiter:
+    """Token bucket plus retry/backoff for one data provider."""
+
+    def __init__(self, name: str, rate: float, capacity: float, policy: BackoffPolicy = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            name: Provider name
+            rate: Tokens (requests) added per second
+            capacity: Maximum burst size
+            policy: Backoff policy used when the provider throttles us
+        """
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.policy = policy or BackoffPolicy()
+
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        self.counters = {
+            "requests": 0,
+            "throttled": 0,
+            "throttle_wait_seconds": 0.0,
+            "rate_limited": 0,
+            "retried": 0,
+            "failed": 0,
+        }
+
+    def _refill(self, now: float):
+        if now <= self._last_refill:
+            return
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def _count(self, counter: str, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def acquire(self) -> float:
+        """Block until a request may be sent. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.counters["requests"] += 1
+                    if waited:
+                        self.counters["throttled"] += 1
+                        self.counters["throttle_wait_seconds"] += waited
+                    return waited
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float):
+        """Hold back every caller of this provider, e.g. after a 429."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # Empty the bucket so it holds exactly one token when the pause ends
+            self._tokens = 0
+            self._last_refill = max(time.monotonic(), self._paused_until - 1 / self.rate)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]):
+        delay = self.policy.delay(attempt, retry_after)
+        self._count("retried")
+        # Everyone sharing the provider waits, not just this caller
+        self.pause(delay)
+
+    def request(self, send: Callable[[], Any], is_throttled: Callable[[Any], bool] = None,
+                retry_exceptions: Tuple[type, ...] = ()):
+        """
+        Send an HTTP request within the rate limit, retrying when throttled.
+
+        Args:
+            send: Zero-argument callable returning a requests-style response
+            is_throttled: Extra check for providers that signal throttling in the body
+            retry_exceptions: Transport errors that should be retried
+
+        Returns:
+            The last response received
+        """
+        for attempt in range(self.policy.max_retries + 1):
+            self.acquire()
+            last_attempt = attempt == self.policy.max_retries
+            try:
+                response = send()
+            except retry_exceptions:
+                if last_attempt:
+                    self._count("failed")
+                    raise
+                self._backoff(attempt, None)
+                continue
+
+            status = getattr(response, "status_code", 200)
+            throttled = status == 429 or (is_throttled is not None and is_throttled(response))
+            if throttled:
+                self._count("rate_limited")
+            if not throttled and status not in RETRYABLE_STATUS_CODES:
+                return response
+            if last_attempt:
+                self._count("failed")
+                return response
+
+            headers = getattr(response, "headers", None) or {}
+            self._backoff(attempt, parse_retry_after(headers.get("Retry-After")))
+        return response
+
+    def call(self, func: Callable[[], Any], is_retryable: Callable[[Exception], bool]):
+        """
+        Run a non-HTTP provider call (e.g. a yfinance call) within the rate limit.
+
+        Args:
+            func: Zero-argument callable doing the request
+            is_retryable: Decides whether a raised exception means "throttled, retry"
+
+        Returns:
+            Whatever func returns
+        """
+        for attempt in range(self.policy.max_retries + 1):
+            self.acquire()
+            try:
+                return func()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                self._count("rate_limited")
+                if attempt == self.policy.max_retries:
+                    self._count("failed")
+                    raise
+                self._backoff(attempt, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["rate_per_second"] = self.rate
+            stats["capacity"] = self.capacity
+            stats["available_tokens"] = round(self._tokens, 3)
+        return stats
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """Get the process-wide limiter for a provider."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            config = PROVIDER_RATE_LIMITS.get(provider, {"rate": 1.0, "capacity": 1})
+            _limiters[provider] = ProviderLimiter(provider, config["rate"], config["capacity"])
+        return _limiters[provider]
+
+
+def configure_limiter(provider: str, rate: float = None, capacity: float = None,
+                      policy: BackoffPolicy = None) -> ProviderLimiter:
+    """Replace a provider's limiter, e.g. after upgrading to a paid API tier."""
+    config = dict(PROVIDER_RATE_LIMITS.get(provider, {"rate": 1.0, "capacity": 1}))
+    if rate is not None:
+        config["rate"] = rate
+    if capacity is not None:
+        config["capacity"] = capacity
+    limiter = ProviderLimiter(provider, config["rate"], config["capacity"], policy)
+    with _limiters_lock:
+        _limiters[provider] = limiter
+    return limiter
+
+
+def get_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Get throttling and retry counters for every provider used so far."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
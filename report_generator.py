@@ -1,13 +1,11 @@
 import json
 import smtplib
-import feedparser
 import requests
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from jinja2 import Template
-import schedule
 import time
 import threading
 
@@ -15,11 +13,13 @@ from api_connectors import YahooFinanceAPI, CoinGeckoAPI
 from sentiment_analyzer import SentimentAnalyzer
 from alert_system import AlertSystem
 from data_storage import DataStorage
+from http_session import get_session
 
 class NewsAggregator:
     """Aggregates news from various sources."""
     
-    def __init__(self):
+    def __init__(self, session: requests.Session = None):
+        self.session = session or get_session()
         self.news_sources = {
             "google_finance": "https://news.google.com/rss/search?q=finance&hl=en-US&gl=US&ceid=US:en",
             "google_crypto": "https://news.google.com/rss/search?q=cryptocurrency&hl=en-US&gl=US&ceid=US:en",
@@ -35,7 +35,7 @@ class NewsAggregator:
                 # Default to finance news
                 feed_url = self.news_sources["google_finance"]
             
-            feed = feedparser.parse(feed_url)
+            feed = self._fetch_feed(feed_url)
             news_items = []
             
             for entry in feed.entries[:limit]:
@@ -58,8 +58,9 @@ class NewsAggregator:
     def search_news_by_keyword(self, keyword: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Search for news containing specific keywords."""
         try:
-            search_url = f"https://news.google.com/rss/search?q={keyword}&hl=en-US&gl=US&ceid=US:en"
-            feed = feedparser.parse(search_url)
+            search_url = "https://news.google.com/rss/search"
+            params = {"q": keyword, "hl": "en-US", "gl": "US", "ceid": "US:en"}
+            feed = self._fetch_feed(search_url, params)
             
             news_items = []
             for entry in feed.entries[:limit]:
@@ -81,6 +82,13 @@ class NewsAggregator:
             print(f"Error searching news for {keyword}: {e}")
             return []
     
+    def _fetch_feed(self, url: str, params: Dict[str, str] = None):
+        """Download a feed over the pooled session and parse it."""
+        response = self.session.get(url, params=params)
+        response.raise_for_status()
+        import feedparser
+        return feedparser.parse(response.content)
+    
     def _calculate_relevance(self, title: str, keyword: str) -> float:
         """Calculate relevance score based on keyword presence."""
         title_lower = title.lower()
@@ -101,22 +109,40 @@ class NewsAggregator:
         
         return score
 
+@dataclass
+class ReportSnapshot:
+    """A built daily report, shared by the API and the email/file paths."""
+    version: int
+    data: Dict[str, Any]
+    built_at: datetime
+    # Date and watchlists the report was built for; a change triggers a rebuild
+    inputs: tuple
+    build_seconds: float = 0.0
+    # Rendered templates by format, so each format is rendered once per snapshot
+    rendered: Dict[str, str] = field(default_factory=dict)
+
 class ReportGenerator:
     """Generates comprehensive daily reports."""
     
-    def __init__(self, email_config: Dict[str, str] = None):
+    def __init__(self, email_config: Dict[str, str] = None, yf_api: YahooFinanceAPI = None,
+                 cg_api: CoinGeckoAPI = None, sentiment_analyzer: SentimentAnalyzer = None,
+                 news_aggregator: NewsAggregator = None, alert_system: AlertSystem = None,
+                 db: DataStorage = None):
         """
         Initialize report generator.
         
         Args:
             email_config: Email configuration for sending reports
+            yf_api, cg_api, sentiment_analyzer, news_aggregator, alert_system, db:
+                Shared instances to use instead of creating new ones. Sharing the
+                trigger engine's AlertSystem puts the alerts it raised in the report.
         """
-        self.yf_api = YahooFinanceAPI()
-        self.cg_api = CoinGeckoAPI()
-        self.sentiment_analyzer = SentimentAnalyzer()
-        self.news_aggregator = NewsAggregator()
-        self.alert_system = AlertSystem(email_config)
-        self.db = DataStorage()
+        self.yf_api = yf_api or YahooFinanceAPI()
+        self.cg_api = cg_api or CoinGeckoAPI()
+        self.sentiment_analyzer = sentiment_analyzer or SentimentAnalyzer()
+        self.news_aggregator = news_aggregator or NewsAggregator()
+        self.alert_system = alert_system or AlertSystem(email_config)
+        self.db = db or DataStorage()
         self.email_config = email_config
         
         # Assets to analyze
@@ -126,6 +152,13 @@ class ReportGenerator:
         # Report templates
         self.html_template = self._get_html_template()
         self.text_template = self._get_text_template()
+        
+        # Latest built report; readers never wait for the network once there is one
+        self.snapshot_max_age = timedelta(minutes=15)
+        self._snapshot: Optional[ReportSnapshot] = None
+        self._build_lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._rebuilding = False
     
     def generate_daily_report(self) -> Dict[str, Any]:
         """Generate comprehensive daily report."""
@@ -144,14 +177,108 @@ class ReportGenerator:
         
         return report_data
     
+    def get_report_snapshot(self, max_age: timedelta = None, wait: bool = True) -> Optional[ReportSnapshot]:
+        """
+        Get the current report snapshot.
+        
+        The current snapshot is returned immediately; if it is older than
+        max_age or was built for another date or watchlist, a rebuild is
+        started in the background and replaces it when done.
+        
+        Args:
+            max_age: Age after which the snapshot is rebuilt (defaults to snapshot_max_age)
+            wait: If no snapshot has been built yet, build it in the caller's thread.
+                  Otherwise start a background build and return None, so request
+                  handlers never wait for the network.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            if wait:
+                return self.build_report_snapshot()
+            self._rebuild_in_background()
+            return None
+        max_age = self.snapshot_max_age if max_age is None else max_age
+        if snapshot.inputs != self._report_inputs() or datetime.now() - snapshot.built_at > max_age:
+            self._rebuild_in_background()
+        return snapshot
+    
+    def build_report_snapshot(self) -> ReportSnapshot:
+        """
+        Build a new report snapshot and make it current.
+        
+        One build runs at a time; callers that waited for a build started
+        after their call reuse its snapshot instead of building again.
+        """
+        requested_at = datetime.now()
+        with self._build_lock:
+            current = self._snapshot
+            inputs = self._report_inputs()
+            if current is not None and current.built_at >= requested_at and current.inputs == inputs:
+                return current
+            
+            started = time.monotonic()
+            data = self.generate_daily_report()
+            snapshot = ReportSnapshot(
+                version=current.version + 1 if current else 1,
+                data=data,
+                built_at=datetime.now(),
+                inputs=inputs,
+                build_seconds=time.monotonic() - started
+            )
+            # Swapping the reference publishes the snapshot; readers never see a partial one
+            self._snapshot = snapshot
+            print(f"Report snapshot v{snapshot.version} built in {snapshot.build_seconds:.1f}s")
+            return snapshot
+    
+    def invalidate_report(self):
+        """Rebuild the report in the background, e.g. after its inputs changed."""
+        self._rebuild_in_background()
+    
+    def is_building(self) -> bool:
+        """Whether a background build is running."""
+        with self._rebuild_lock:
+            return self._rebuilding
+    
+    def render_report(self, format: str = "html", snapshot: ReportSnapshot = None) -> str:
+        """Render a snapshot (the current one by default) as 'html' or 'text', once per format."""
+        snapshot = snapshot or self.get_report_snapshot()
+        content = snapshot.rendered.get(format)
+        if content is None:
+            from jinja2 import Template
+            template = Template(self.html_template if format == "html" else self.text_template)
+            content = snapshot.rendered[format] = template.render(**snapshot.data)
+        return content
+    
+    def _report_inputs(self) -> tuple:
+        return (datetime.now().strftime('%Y-%m-%d'), tuple(self.monitored_stocks), tuple(self.monitored_cryptos))
+    
+    def _rebuild_in_background(self):
+        with self._rebuild_lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        
+        def rebuild():
+            try:
+                self.build_report_snapshot()
+            except Exception as e:
+                print(f"Error rebuilding report snapshot: {e}")
+            finally:
+                with self._rebuild_lock:
+                    self._rebuilding = False
+        
+        threading.Thread(target=rebuild, daemon=True).start()
+    
     def _get_top_opportunities(self) -> List[Dict[str, Any]]:
         """Identify top 3 assets with potential for growth."""
         opportunities = []
         
-        # Analyze stocks
+        # Analyze stocks (history for all tickers comes from one bulk download)
+        stocks_data = self.yf_api.get_stocks_data(self.monitored_stocks)
+        
         for ticker in self.monitored_stocks:
             try:
-                data = self.yf_api.get_stock_data(ticker)
+                data = stocks_data.get(ticker, {"error": "No data returned"})
                 if "error" not in data:
                     opportunity_score = self._calculate_opportunity_score(ticker, data, "stock")
                     opportunities.append({
@@ -164,11 +291,16 @@ class ReportGenerator:
             except Exception as e:
                 print(f"Error analyzing {ticker}: {e}")
         
-        # Analyze cryptos
+        # Analyze cryptos (prices for all coins come from batched requests)
+        crypto_prices = self.cg_api.get_coin_prices(self.monitored_cryptos)
+        if "error" in crypto_prices:
+            print(f"Error fetching crypto prices: {crypto_prices['error']}")
+            crypto_prices = {}
+        
         for coin_id in self.monitored_cryptos:
             try:
-                price_data = self.cg_api.get_coin_price(coin_id)
-                if "error" not in price_data:
+                if coin_id in crypto_prices:
+                    price_data = {coin_id: crypto_prices[coin_id]}
                     opportunity_score = self._calculate_opportunity_score(coin_id, price_data, "crypto")
                     opportunities.append({
                         "symbol": coin_id.upper(),
@@ -322,7 +454,10 @@ class ReportGenerator:
         """Extract current price from stock data."""
         try:
             info = data.get("info", {})
-            return info.get("currentPrice", info.get("regularMarketPrice", 0.0))
+            price = info.get("currentPrice", info.get("regularMarketPrice"))
+            if price is None:
+                price = self._latest_history_value(data, "Close")
+            return price or 0.0
         except:
             return 0.0
     
@@ -330,10 +465,20 @@ class ReportGenerator:
         """Extract volume from stock data."""
         try:
             info = data.get("info", {})
-            return info.get("volume", info.get("regularMarketVolume", 0))
+            volume = info.get("volume", info.get("regularMarketVolume"))
+            if volume is None:
+                volume = self._latest_history_value(data, "Volume")
+            return volume or 0
         except:
             return 0
     
+    def _latest_history_value(self, data: Dict[str, Any], column: str):
+        """Get the most recent value of a history column (history is {column: {timestamp: value}})."""
+        values = data.get("history", {}).get(column, {})
+        if not values:
+            return None
+        return values[max(values)]
+    
     def _get_html_template(self) -> str:
         """Get HTML email template."""
         return """
@@ -446,25 +591,26 @@ class ReportGenerator:
         Disclaimer: This report is for informational purposes only.
         """
     
-    def send_daily_report(self, recipient_email: str, format: str = "html") -> bool:
-        """Send daily report via email."""
+    def send_daily_report(self, recipient_email: str, format: str = "html",
+                          snapshot: ReportSnapshot = None) -> bool:
+        """
+        Send daily report via email.
+        
+        Args:
+            recipient_email: Recipient address
+            format: 'html' or 'text'
+            snapshot: Report to send (defaults to the current snapshot)
+        """
         if not self.email_config:
             print("Email configuration not provided")
             return False
         
         try:
-            # Generate report data
-            report_data = self.generate_daily_report()
-            
-            # Render template
-            if format == "html":
-                template = Template(self.html_template)
-                content = template.render(**report_data)
-                content_type = "html"
-            else:
-                template = Template(self.text_template)
-                content = template.render(**report_data)
-                content_type = "plain"
+            # Reuse the built report and its rendering
+            snapshot = snapshot or self.get_report_snapshot()
+            report_data = snapshot.data
+            content = self.render_report(format, snapshot)
+            content_type = "html" if format == "html" else "plain"
             
             # Create email
             msg = MIMEMultipart()
@@ -496,14 +642,7 @@ class ReportGenerator:
             filename = f"wealthflow_report_{timestamp}.{'html' if format == 'html' else 'txt'}"
         
         try:
-            report_data = self.generate_daily_report()
-            
-            if format == "html":
-                template = Template(self.html_template)
-                content = template.render(**report_data)
-            else:
-                template = Template(self.text_template)
-                content = template.render(**report_data)
+            content = self.render_report(format)
             
             with open(filename, 'w', encoding='utf-8') as f:
                 f.write(content)
@@ -531,18 +670,39 @@ class ReportScheduler:
         self.running = False
         self.scheduler_thread = None
     
-    def schedule_daily_reports(self, time_str: str = "08:00"):
-        """Schedule daily reports at specified time."""
+    def schedule_daily_reports(self, time_str: str = "08:00", refresh_minutes: int = 15):
+        """
+        Schedule daily reports at specified time.
+        
+        Args:
+            time_str: Time the reports are emailed
+            refresh_minutes: Minutes between report snapshot rebuilds, so API
+                             readers always get a recent report without building it
+        """
+        import schedule
         schedule.every().day.at(time_str).do(self._send_daily_reports)
-        print(f"Scheduled daily reports at {time_str}")
+        schedule.every(refresh_minutes).minutes.do(self._refresh_report)
+        print(f"Scheduled daily reports at {time_str}, refreshed every {refresh_minutes} minutes")
+    
+    def _refresh_report(self):
+        try:
+            self.report_generator.build_report_snapshot()
+        except Exception as e:
+            print(f"Error refreshing report snapshot: {e}")
     
     def _send_daily_reports(self):
         """Send daily reports to all recipients."""
         print(f"Sending daily reports at {datetime.now()}")
         
+        # One fresh report for every recipient
+        try:
+            snapshot = self.report_generator.build_report_snapshot()
+        except Exception as e:
+            print(f"Error building daily report: {e}")
+            return
         for recipient in self.recipients:
             try:
-                success = self.report_generator.send_daily_report(recipient)
+                success = self.report_generator.send_daily_report(recipient, snapshot=snapshot)
                 if success:
                     print(f"Report sent to {recipient}")
                 else:
@@ -571,6 +731,7 @@ class ReportScheduler:
     
     def _scheduler_loop(self):
         """Main scheduler loop."""
+        import schedule
         while self.running:
             schedule.run_pending()
             time.sleep(60)  # Check every minute
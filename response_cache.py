@@ -0,0 +1,261 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def make_key(provider: str, endpoint: str, params: Dict[str, Any] = None) -> tuple:
+    """Build a hashable cache key from (provider, endpoint, params)."""
+    return (provider, endpoint, _freeze(params or {}))
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+
+def copy_value(value):
+    """
+    Copy the dicts and lists of a JSON-like value.
+
+    Every caller gets its own containers, so one that edits a result (say,
+    adds a field to a price dict) cannot change what the cache hands out next.
+    Leaves (numbers, strings, timestamps) are immutable and shared; other
+    objects, e.g. a DataFrame passed through with cache_if, are not copied.
+    """
+    if isinstance(value, dict):
+        return {key: copy_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_value(item) for item in value]
+    return value
+
+
+def approximate_size(value, max_items: int = 100000) -> int:
+    """Cheap estimate of the memory held by a JSON-like value, in bytes."""
+    size = 0
+    stack = [value]
+    seen = set()
+    visited = 0
+    while stack and visited < max_items:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        visited += 1
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set)):
+            stack.extend(obj)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class _Flight:
+    """An upstream call in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL cache with LRU eviction, a memory cap and single-flight loading.
+
+    Concurrent misses on the same key share one upstream call: the first caller
+    runs the loader and the others wait for its result. Values are copied in and
+    out (see copy_value()), so callers may modify what they get back.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024,
+                 default_ttl: float = 30.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached entries
+            max_bytes: Approximate memory cap for cached values
+            default_ttl: TTL in seconds used when none is given
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "loads": 0,
+            "load_errors": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def get(self, key: Hashable, default=None):
+        """Get a fresh cached value without loading it."""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return default
+            self.counters["hits"] += 1
+            value = entry.value
+        return copy_value(value)
+
+    def set(self, key: Hashable, value, ttl: Optional[float] = None):
+        """Store a copy of a value for ttl seconds."""
+        value = copy_value(value)
+        size = approximate_size(value)
+        with self._lock:
+            self._store(key, value, ttl, size)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None,
+                    cache_if: Callable[[Any], bool] = None):
+        """
+        Get a cached value, calling loader on a miss.
+
+        Args:
+            key: Cache key, see make_key()
+            loader: Zero-argument callable that fetches the value upstream
+            ttl: Time to live in seconds (defaults to default_ttl)
+            cache_if: Predicate deciding whether a loaded value may be cached,
+                      e.g. to skip {"error": ...} results
+
+        Returns:
+            A copy of the cached or freshly loaded value
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.counters["hits"] += 1
+                value = entry.value
+            else:
+                self.counters["misses"] += 1
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = _Flight()
+                    self._flights[key] = flight
+                else:
+                    self.counters["coalesced"] += 1
+        if entry is not None:
+            return copy_value(value)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy_value(flight.value)
+
+        # Whatever happens, the flight must be retired and its followers woken,
+        # or every later miss on this key would wait on it forever
+        try:
+            value = loader()
+            cacheable = cache_if is None or cache_if(value)
+            size = approximate_size(value) if cacheable else 0
+            flight.value = value
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.counters["load_errors"] += 1
+            raise
+        else:
+            with self._lock:
+                self.counters["loads"] += 1
+                if cacheable:
+                    self._store(key, value, ttl, size)
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return copy_value(value)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["in_flight"] = len(self._flights)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    # The helpers below expect self._lock to be held
+
+    def _lookup(self, key) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            self._bytes -= entry.size
+            self.counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, value, ttl, size):
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old:
+            self._bytes -= old.size
+        ttl = self.default_ttl if ttl is None else ttl
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.counters["evictions"] += 1
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide cache shared by every connector instance."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def is_cacheable(value) -> bool:
+    """Connector results signal failure with an "error" key; those are never cached."""
+    return not (isinstance(value, dict) and "error" in value)
@@ -0,0 +1,362 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from data_storage import INTERVAL_SECONDS, create_ohlcv_tables
+from storage_connections import get_connection_manager, release_connection_manager
+
+# Each resolution is built from the one before it
+ROLLUPS = [("1m", "5m"), ("5m", "1h"), ("1h", "1d")]
+
+# How long data is kept at each resolution; None keeps it forever.
+# "raw" covers the snapshot and tick tables.
+DEFAULT_RETENTION = {
+    "raw": timedelta(days=7),
+    "1m": timedelta(days=7),
+    "5m": timedelta(days=30),
+    "1h": timedelta(days=365),
+    "1d": None,
+}
+
+
+@dataclass
+class TickSource:
+    """A table of raw price ticks that is rolled up into 1m bars."""
+    table: str
+    symbol_column: str
+    price_expression: str
+    volume_expression: str = "NULL"
+    timestamp_column: str = "timestamp"
+
+
+@dataclass
+class RawTable:
+    """A snapshot or tick table pruned after the 'raw' retention window."""
+    table: str
+    timestamp_column: str = "timestamp"
+    # Rows are only pruned once this tick source has rolled them up
+    tick_source: Optional[TickSource] = None
+
+
+# DataStorage's crypto snapshots: {"bitcoin": {"usd": 45000.0}}
+CRYPTO_TICKS = TickSource(
+    "crypto_data", "coin_id",
+    price_expression="json_extract(price, '$.\"' || coin_id || '\".usd')"
+)
+# The SaaS workflow's market_data table
+SAAS_MARKET_TICKS = TickSource("market_data", "symbol", price_expression="price", volume_expression="volume")
+
+DATA_STORAGE_TABLES = [RawTable("stock_data"), RawTable("crypto_data", tick_source=CRYPTO_TICKS)]
+SAAS_TABLES = [RawTable("market_data", tick_source=SAAS_MARKET_TICKS)]
+
+
+class RetentionManager:
+    """
+    Rolls raw ticks into 1m/5m/1h/1d bars and prunes data past its retention window.
+
+    Work is done in small chunks, each in its own short write transaction on the
+    shared writer (see storage_connections.py), so collectors writing to the same
+    database only ever wait for one chunk. Progress is kept as watermarks in the
+    retention_state table, so a run can stop at any point and the next one picks
+    up where it left off. Only closed buckets are rolled up, and data is never
+    pruned before it has been rolled into the next resolution.
+
+    Bars written by collectors take precedence: rollups only fill buckets that
+    are still empty at the target resolution.
+    """
+
+    def __init__(self, db_name: str = 'wealthflow.db', raw_tables: List[RawTable] = None,
+                 retention: Dict[str, Optional[timedelta]] = None, tick_batch_size: int = 5000,
+                 rollup_chunk_buckets: int = 288, delete_batch_size: int = 5000,
+                 vacuum_interval: Optional[timedelta] = None):
+        """
+        Initialize the manager.
+
+        Args:
+            db_name: SQLite database file
+            raw_tables: Snapshot/tick tables to roll up and prune (defaults to DataStorage's)
+            retention: Overrides for DEFAULT_RETENTION
+            tick_batch_size: Ticks rolled up per transaction
+            rollup_chunk_buckets: Target buckets rolled up per transaction
+            delete_batch_size: Rows pruned per transaction
+            vacuum_interval: Run VACUUM after pruning at most this often (never if None)
+        """
+        self.raw_tables = DATA_STORAGE_TABLES if raw_tables is None else raw_tables
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self.tick_batch_size = tick_batch_size
+        self.rollup_chunk_buckets = rollup_chunk_buckets
+        self.delete_batch_size = delete_batch_size
+        self.vacuum_interval = vacuum_interval
+
+        self.connections = get_connection_manager(db_name)
+        with self.connections.write() as conn:
+            create_ohlcv_tables(conn)
+            conn.execute("""CREATE TABLE IF NOT EXISTS retention_state (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER
+                )""")
+
+        self.counters = {"ticks_rolled": 0, "bars_rolled": 0, "bars_pruned": 0, "rows_pruned": 0, "vacuums": 0}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def run(self, time_budget: float = None, now: float = None) -> Dict[str, int]:
+        """
+        Run rollups and pruning until caught up or out of time.
+
+        Args:
+            time_budget: Seconds to spend; unfinished work continues on the next run
+            now: Current epoch time (for tests)
+
+        Returns:
+            Counters for this run
+        """
+        now = time.time() if now is None else now
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        before = dict(self.counters)
+
+        def has_time():
+            return deadline is None or time.monotonic() < deadline
+
+        for raw_table in self.raw_tables:
+            if raw_table.tick_source is not None:
+                while has_time() and self._roll_ticks(raw_table.tick_source):
+                    pass
+        for source, target in ROLLUPS:
+            while has_time() and self._roll_bars(source, target, now):
+                pass
+        for interval in INTERVAL_SECONDS:
+            if has_time():
+                self._prune_bars(interval, now)
+        for raw_table in self.raw_tables:
+            while has_time() and self._prune_raw(raw_table, now):
+                pass
+        if has_time():
+            self._maybe_vacuum(now)
+
+        return {key: self.counters[key] - before[key] for key in self.counters}
+
+    # Watermarks
+
+    def _get_state(self, conn, key):
+        row = conn.execute("SELECT value FROM retention_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO retention_state (key, value) VALUES (?, ?)", (key, value))
+
+    # Rollups
+
+    def _roll_ticks(self, source: TickSource) -> bool:
+        """Merge the next batch of ticks into 1m bars. Returns True if more ticks may be waiting."""
+        key = f"ticks:{source.table}"
+        step = INTERVAL_SECONDS["1m"]
+        with self.connections.write() as conn:
+            last_id = self._get_state(conn, key) or 0
+            rows = conn.execute(
+                f"SELECT id, {source.symbol_column}, {source.timestamp_column}, "
+                f"{source.price_expression}, {source.volume_expression} "
+                f"FROM {source.table} WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, self.tick_batch_size)
+            ).fetchall()
+            if not rows:
+                return False
+
+            bars = {}
+            for _, symbol, timestamp, price, volume in rows:
+                if price is None:
+                    continue
+                ts = _tick_epoch(timestamp)
+                _merge_into(bars, (symbol, ts - ts % step), ts, price, price, price, price, volume)
+
+            # A minute can span batches: merge with what earlier batches wrote
+            for (symbol, bucket), bar in bars.items():
+                existing = conn.execute(
+                    "SELECT open, high, low, close, volume FROM ohlcv_bars WHERE symbol = ? AND interval = '1m' AND ts = ?",
+                    (symbol, bucket)
+                ).fetchone()
+                if existing:
+                    bar[2] = existing[0]
+                    bar[3] = _max(bar[3], existing[1])
+                    bar[4] = _min(bar[4], existing[2])
+            conn.executemany(
+                "INSERT OR REPLACE INTO ohlcv_bars (symbol, interval, ts, open, high, low, close, volume) "
+                "VALUES (?, '1m', ?, ?, ?, ?, ?, ?)",
+                [(symbol, bucket) + tuple(bar[2:]) for (symbol, bucket), bar in bars.items()]
+            )
+            self._set_state(conn, key, rows[-1][0])
+        self.counters["ticks_rolled"] += len(rows)
+        return len(rows) == self.tick_batch_size
+
+    def _roll_bars(self, source: str, target: str, now: float) -> bool:
+        """Roll the next chunk of closed buckets. Returns True if more closed buckets remain."""
+        key = f"rollup:{source}:{target}"
+        step = INTERVAL_SECONDS[target]
+        # A bucket is closed once its last source bar has ended, plus one source bar of slack for late writes
+        closed_until = int(now - INTERVAL_SECONDS[source]) // step * step
+        with self.connections.write() as conn:
+            watermark = self._get_state(conn, key)
+            if watermark is None:
+                first = conn.execute("SELECT MIN(ts) FROM ohlcv_bars WHERE interval = ?", (source,)).fetchone()[0]
+                if first is None:
+                    return False
+                watermark = first - first % step
+            end = min(closed_until, watermark + self.rollup_chunk_buckets * step)
+            if end <= watermark:
+                return False
+
+            rows = conn.execute(
+                "SELECT symbol, ts, open, high, low, close, volume FROM ohlcv_bars "
+                "WHERE interval = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (source, watermark, end)
+            ).fetchall()
+            bars = {}
+            for symbol, ts, open_, high, low, close, volume in rows:
+                _merge_into(bars, (symbol, ts - ts % step), ts, open_, high, low, close, volume)
+            conn.executemany(
+                "INSERT OR IGNORE INTO ohlcv_bars (symbol, interval, ts, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(symbol, target, bucket) + tuple(bar[2:]) for (symbol, bucket), bar in bars.items()]
+            )
+            self._set_state(conn, key, end)
+        self.counters["bars_rolled"] += len(bars)
+        return end < closed_until
+
+    # Pruning
+
+    def _prune_bars(self, interval: str, now: float):
+        window = self.retention.get(interval)
+        if window is None:
+            return
+        cutoff = int(now - window.total_seconds())
+        next_rollup = [target for source, target in ROLLUPS if source == interval]
+        if next_rollup:
+            # Never drop bars that have not been rolled into the next resolution yet
+            with self.connections.write() as conn:
+                watermark = self._get_state(conn, f"rollup:{interval}:{next_rollup[0]}")
+            if watermark is None:
+                return
+            cutoff = min(cutoff, watermark)
+
+        symbols = [row[0] for row in self.connections.reader().execute(
+            "SELECT DISTINCT symbol FROM ohlcv_bars WHERE interval = ? AND ts < ?", (interval, cutoff)
+        ).fetchall()]
+        # One short transaction per symbol (a primary key range delete)
+        for symbol in symbols:
+            with self.connections.write() as conn:
+                deleted = conn.execute(
+                    "DELETE FROM ohlcv_bars WHERE symbol = ? AND interval = ? AND ts < ?", (symbol, interval, cutoff)
+                ).rowcount
+            self.counters["bars_pruned"] += deleted
+
+    def _prune_raw(self, raw_table: RawTable, now: float) -> bool:
+        """Delete one batch of expired raw rows. Returns True if the batch was full."""
+        window = self.retention.get("raw")
+        if window is None:
+            return False
+        # Raw tables hold naive local timestamps (datetime.now())
+        cutoff = datetime.fromtimestamp(now - window.total_seconds()).isoformat(sep=" ")
+        reader = self.connections.reader()
+        max_id = 2 ** 63 - 1
+        if raw_table.tick_source is not None:
+            max_id = self._get_state(reader, f"ticks:{raw_table.tick_source.table}")
+            if max_id is None:
+                return False
+        # Rows are appended in time order, so the expired ones are the lowest ids.
+        # Walk the first batch along the primary key, outside the write lock, and
+        # find where the expired run ends; the delete is then a primary key range.
+        last_expired = None
+        for row_id, expired in reader.execute(
+                f"SELECT id, julianday({raw_table.timestamp_column}) < julianday(?) FROM {raw_table.table} "
+                f"WHERE id <= ? ORDER BY id LIMIT ?", (cutoff, max_id, self.delete_batch_size)):
+            if not expired:
+                break
+            last_expired = row_id
+        if last_expired is None:
+            return False
+        with self.connections.write() as conn:
+            deleted = conn.execute(f"DELETE FROM {raw_table.table} WHERE id <= ?", (last_expired,)).rowcount
+        self.counters["rows_pruned"] += deleted
+        return deleted == self.delete_batch_size
+
+    def _maybe_vacuum(self, now: float):
+        if self.vacuum_interval is None:
+            return
+        with self.connections.write() as conn:
+            last_vacuum = self._get_state(conn, "last_vacuum") or 0
+        if now - last_vacuum < self.vacuum_interval.total_seconds():
+            return
+        # VACUUM cannot run inside a transaction; hold the write lock so no one starts one
+        with self.connections.write_lock:
+            self.connections.writer.execute("VACUUM")
+            with self.connections.writer:
+                self._set_state(self.connections.writer, "last_vacuum", int(now))
+        self.counters["vacuums"] += 1
+
+    # Background operation
+
+    def start(self, interval: float = 300.0, time_budget: float = 10.0):
+        """Run every `interval` seconds on a background thread, spending at most `time_budget` per run."""
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run_loop, args=(interval, time_budget),
+                                            name="retention", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        release_connection_manager(self.connections)
+
+    def _run_loop(self, interval, time_budget):
+        while not self._stop_event.is_set():
+            try:
+                summary = self.run(time_budget=time_budget)
+                if any(summary.values()):
+                    print(f"Retention run: {summary}")
+            except Exception as e:
+                print(f"Error in retention run: {e}")
+            self._stop_event.wait(interval)
+
+
+def _tick_epoch(value) -> int:
+    """Epoch seconds of a naive local timestamp as written by datetime.now()."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip())
+    return int(value.timestamp())
+
+
+def _merge_into(bars, key, ts, open_, high, low, close, volume):
+    """Fold one bar or tick into bars[key] = [first_ts, last_ts, open, high, low, close, volume]."""
+    bar = bars.get(key)
+    if bar is None:
+        bars[key] = [ts, ts, open_, high, low, close, volume]
+        return
+    if ts < bar[0]:
+        bar[0] = ts
+        bar[2] = open_
+    if ts >= bar[1]:
+        bar[1] = ts
+        bar[5] = close
+        # Volumes are the latest reported value, not a sum
+        bar[6] = volume if volume is not None else bar[6]
+    bar[3] = _max(bar[3], high)
+    bar[4] = _min(bar[4], low)
+
+
+def _max(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+
+def _min(a, b):
+    return b if a is None else a if b is None else min(a, b)
@@ -1,13 +1,14 @@
-import openai
 import os
 import re
+import threading
 from typing import List, Dict, Any
 
 class SentimentAnalyzer:
     def __init__(self, openai_api_key=None):
-        self.client = openai.OpenAI(
-            api_key=openai_api_key or os.getenv("OPENAI_API_KEY")
-        )
+        self.api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+        # The OpenAI client (and the openai package) is created on first analysis
+        self._client = None
+        self._client_lock = threading.Lock()
         
         # Keywords to focus on for financial sentiment analysis
         self.financial_keywords = [
@@ -17,6 +18,15 @@ class SentimentAnalyzer:
             "support", "volume", "merger", "acquisition", "earnings", "ipo"
         ]
 
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import openai
+                    self._client = openai.OpenAI(api_key=self.api_key)
+        return self._client
+
     def analyze_text_sentiment(self, text: str, asset_name: str = None) -> Dict[str, Any]:
         """
         Analyze sentiment of a given text using OpenAI GPT-4 Turbo.
@@ -1,4 +1,3 @@
-import praw
 import requests
 import time
 from typing import List, Dict, Any
@@ -17,6 +16,8 @@ class SocialCrawler:
         self.reddit = None
         if reddit_client_id and reddit_client_secret and reddit_user_agent:
             try:
+                # praw is only needed when Reddit credentials are configured
+                import praw
                 self.reddit = praw.Reddit(
                     client_id=reddit_client_id,
                     client_secret=reddit_client_secret,
@@ -0,0 +1,519 @@
+"""
+Storage backends for snapshots, bars, market ticks, signals, users,
+affiliates and commissions.
+
+SQLiteBackend is the row store used in production: DataStorage's tuned WAL
+connections plus the SaaS tables. DuckDBBackend keeps the same tables in an
+embedded column store, which is much faster for the affiliate and commission
+rollups over large commission tables. Both run the same queries wherever
+their SQL dialects agree, and both must pass test_storage_backends.py.
+"""
+import json
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from data_storage import DataStorage, OHLCV_COLUMNS, history_to_bars, market_chart_to_bars
+from history_codec import encode_history, load_history, to_epoch_seconds
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+class StorageBackend(ABC):
+    """Operations every storage backend supports."""
+
+    name = "abstract"
+
+    # Snapshots
+    @abstractmethod
+    def save_snapshots(self, stocks: Iterable[tuple] = (), cryptos: Iterable[tuple] = ()) -> int:
+        """Save (ticker, info, history) and (coin_id, price, market_chart) snapshots and their bars."""
+
+    @abstractmethod
+    def get_latest_stock_data(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Latest {"info", "history"} snapshot of a stock, or None."""
+
+    @abstractmethod
+    def get_latest_crypto_data(self, coin_id: str) -> Optional[Dict[str, Any]]:
+        """Latest {"price", "market_chart"} snapshot of a coin, or None."""
+
+    # Bars
+    @abstractmethod
+    def save_bars(self, symbol: str, interval: str, bars: Sequence[tuple]) -> int:
+        """Insert or replace (ts, open, high, low, close, volume) bars."""
+
+    @abstractmethod
+    def get_ohlcv(self, symbol: str, interval: str = "1d", start=None, end=None,
+                  limit: int = None) -> List[Dict[str, Any]]:
+        """Bars of one symbol in time order, as in DataStorage.get_ohlcv()."""
+
+    # SaaS workflow tables
+    @abstractmethod
+    def save_market_data(self, rows: Sequence[tuple]) -> int:
+        """Insert (symbol, price, volume, rsi, volume_avg_30min, timestamp) ticks."""
+
+    @abstractmethod
+    def save_signals(self, rows: Sequence[tuple]) -> int:
+        """Insert (type, symbol, price, reason, commission_value, timestamp) signals."""
+
+    @abstractmethod
+    def get_signals(self, since=None, limit: int = None) -> List[Dict[str, Any]]:
+        """Signals, newest first."""
+
+    @abstractmethod
+    def add_affiliates(self, rows: Sequence[tuple]) -> int:
+        """Insert (code, name, commission_rate, total_earned, users_referred) affiliates."""
+
+    @abstractmethod
+    def add_users(self, rows: Sequence[tuple]) -> int:
+        """Insert (email, package, affiliate_code, telegram_id) users and refresh referral counts."""
+
+    @abstractmethod
+    def count_users(self) -> int:
+        """Number of users."""
+
+    @abstractmethod
+    def get_users_by_package(self, package: str) -> List[tuple]:
+        """(email, package, affiliate_code, telegram_id) of the users on a package."""
+
+    @abstractmethod
+    def get_commission_rates(self, codes: Iterable[str]) -> Dict[str, float]:
+        """Commission rate of each known affiliate code."""
+
+    @abstractmethod
+    def record_commissions(self, rows: Sequence[tuple]) -> int:
+        """Insert (affiliate_code, user_email, signal_type, amount) commissions and add them to total_earned."""
+
+    @abstractmethod
+    def affiliate_stats(self, since=None) -> List[Dict[str, Any]]:
+        """Per affiliate: totals plus the number and sum of commissions since `since` (UTC)."""
+
+    @abstractmethod
+    def commission_breakdown(self, since=None) -> List[Dict[str, Any]]:
+        """Commission count and sum per affiliate and signal type since `since` (UTC)."""
+
+    @abstractmethod
+    def close(self):
+        """Release the backend's connections."""
+
+
+class _SQLBackend(StorageBackend):
+    """SQL shared by the backends; subclasses provide connections and DDL."""
+
+    @abstractmethod
+    def _transaction(self):
+        """Context manager yielding a connection inside a write transaction."""
+
+    @abstractmethod
+    def _fetchall(self, query: str, params: Sequence = ()) -> List[tuple]:
+        """Run a read query and return its rows."""
+
+    def save_bars(self, symbol, interval, bars):
+        rows = [(symbol, interval) + tuple(bar) for bar in bars]
+        if rows:
+            with self._transaction() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO ohlcv_bars (symbol, interval, ts, open, high, low, close, volume) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+        return len(rows)
+
+    def save_market_data(self, rows):
+        rows = [row[:5] + (_timestamp(row[5]),) for row in rows]
+        if rows:
+            with self._transaction() as conn:
+                conn.executemany(
+                    "INSERT INTO market_data (symbol, price, volume, rsi, volume_avg_30min, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+        return len(rows)
+
+    def save_signals(self, rows):
+        rows = [row[:5] + (_timestamp(row[5]),) for row in rows]
+        if rows:
+            with self._transaction() as conn:
+                conn.executemany(
+                    "INSERT INTO signals (type, symbol, price, reason, commission_value, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+        return len(rows)
+
+    def get_signals(self, since=None, limit=None):
+        query = "SELECT id, type, symbol, price, reason, commission_value, timestamp FROM signals"
+        params = []
+        if since is not None:
+            query += " WHERE timestamp >= ?"
+            params.append(_timestamp(since))
+        query += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        names = ("id", "type", "symbol", "price", "reason", "commission_value", "timestamp")
+        return [dict(zip(names, row[:6] + (_timestamp(row[6]),))) for row in self._fetchall(query, params)]
+
+    def add_affiliates(self, rows):
+        rows = list(rows)
+        if rows:
+            with self._transaction() as conn:
+                conn.executemany(
+                    "INSERT INTO affiliates (code, name, commission_rate, total_earned, users_referred) "
+                    "VALUES (?, ?, ?, ?, ?)", rows
+                )
+        return len(rows)
+
+    def add_users(self, rows):
+        rows = list(rows)
+        if rows:
+            with self._transaction() as conn:
+                conn.executemany(
+                    "INSERT INTO users (email, package, affiliate_code, telegram_id) VALUES (?, ?, ?, ?)", rows
+                )
+                conn.execute("""
+                    UPDATE affiliates
+                    SET users_referred = (
+                        SELECT COUNT(*) FROM users WHERE users.affiliate_code = affiliates.code
+                    )
+                """)
+        return len(rows)
+
+    def count_users(self):
+        return self._fetchall("SELECT COUNT(*) FROM users")[0][0]
+
+    def get_users_by_package(self, package):
+        return self._fetchall(
+            "SELECT email, package, affiliate_code, telegram_id FROM users WHERE package = ? ORDER BY email",
+            [package]
+        )
+
+    def get_commission_rates(self, codes):
+        codes = sorted(set(code for code in codes if code))
+        if not codes:
+            return {}
+        rows = self._fetchall(
+            f"SELECT code, commission_rate FROM affiliates WHERE code IN ({', '.join('?' * len(codes))})", codes
+        )
+        return dict(rows)
+
+    def record_commissions(self, rows):
+        rows = list(rows)
+        if not rows:
+            return 0
+        # One UPDATE per affiliate instead of one per commission
+        totals = {}
+        for code, _, _, amount in rows:
+            totals[code] = totals.get(code, 0.0) + amount
+        # UTC, in the format of SQLite's CURRENT_TIMESTAMP
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO commissions (affiliate_code, user_email, signal_type, commission_amount, timestamp) "
+                "VALUES (?, ?, ?, ?, ?)", [row + (timestamp,) for row in rows]
+            )
+            conn.executemany(
+                "UPDATE affiliates SET total_earned = total_earned + ? WHERE code = ?",
+                [(amount, code) for code, amount in sorted(totals.items())]
+            )
+        return len(rows)
+
+    def affiliate_stats(self, since=None):
+        where, params = _since_clause(since)
+        # Commissions are aggregated before the join, so each affiliate row is joined once
+        rows = self._fetchall(f"""
+            SELECT a.code, a.name, a.total_earned, a.users_referred,
+                   COALESCE(c.total_commissions, 0), COALESCE(c.commission_amount, 0.0)
+            FROM affiliates a
+            LEFT JOIN (
+                SELECT affiliate_code, COUNT(*) AS total_commissions, SUM(commission_amount) AS commission_amount
+                FROM commissions {where}
+                GROUP BY affiliate_code
+            ) c ON c.affiliate_code = a.code
+            ORDER BY a.code
+        """, params)
+        names = ("code", "name", "total_earned", "users_referred", "total_commissions", "commission_amount")
+        return [dict(zip(names, row)) for row in rows]
+
+    def commission_breakdown(self, since=None):
+        where, params = _since_clause(since)
+        rows = self._fetchall(f"""
+            SELECT affiliate_code, signal_type, COUNT(*), SUM(commission_amount)
+            FROM commissions {where}
+            GROUP BY affiliate_code, signal_type
+            ORDER BY affiliate_code, signal_type
+        """, params)
+        names = ("affiliate_code", "signal_type", "commissions", "amount")
+        return [dict(zip(names, row)) for row in rows]
+
+
+class SQLiteBackend(_SQLBackend):
+    """
+    SQLite row store: DataStorage (WAL, shared writer, thread-local readers)
+    plus the SaaS tables on the same connections.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_name: str = 'wealthflow.db', busy_timeout: float = 5.0):
+        self.storage = DataStorage(db_name, busy_timeout=busy_timeout)
+        self.connections = self.storage.connections
+        with self.connections.write() as conn:
+            create_saas_tables(conn)
+
+    @contextmanager
+    def _transaction(self):
+        with self.connections.write() as conn:
+            yield conn
+
+    def _fetchall(self, query, params=()):
+        return self.connections.reader().execute(query, params).fetchall()
+
+    def save_snapshots(self, stocks=(), cryptos=()):
+        return self.storage.save_snapshots(stocks=stocks, cryptos=cryptos)
+
+    def get_latest_stock_data(self, ticker):
+        return self.storage.get_latest_stock_data(ticker)
+
+    def get_latest_crypto_data(self, coin_id):
+        return self.storage.get_latest_crypto_data(coin_id)
+
+    def get_ohlcv(self, symbol, interval="1d", start=None, end=None, limit=None):
+        return self.storage.get_ohlcv(symbol, interval, start, end, limit)
+
+    def close(self):
+        self.storage.close()
+
+
+class DuckDBBackend(_SQLBackend):
+    """
+    DuckDB column store for analytical workloads (requires the duckdb package).
+
+    DuckDB allows one writer process per file, and a connection is not safe
+    to use from several threads at once, so all statements are serialized
+    on a lock.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, db_name: str = 'wealthflow.duckdb', history_codec: str = "zlib"):
+        if duckdb is None:
+            raise ImportError("DuckDBBackend requires duckdb (pip install duckdb)")
+        self.history_codec = history_codec
+        self.conn = duckdb.connect(db_name)
+        self._lock = threading.RLock()
+        with self._transaction() as conn:
+            create_duckdb_tables(conn)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.begin()
+            try:
+                yield self.conn
+            except Exception:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+
+    def _fetchall(self, query, params=()):
+        with self._lock:
+            return self.conn.execute(query, list(params)).fetchall()
+
+    def save_snapshots(self, stocks=(), cryptos=()):
+        timestamp = datetime.now().isoformat(sep=" ")
+        stock_rows, crypto_rows, bar_rows = [], [], []
+        for ticker, info, history in stocks:
+            stock_rows.append((ticker, timestamp, json.dumps(info), self._encode_history(history)))
+            interval, bars = history_to_bars(history)
+            bar_rows.extend((ticker, interval) + bar for bar in bars)
+        for coin_id, price, market_chart in cryptos:
+            crypto_rows.append((coin_id, timestamp, json.dumps(price), json.dumps(market_chart)))
+            interval, bars = market_chart_to_bars(market_chart)
+            bar_rows.extend((coin_id, interval) + bar for bar in bars)
+        if not stock_rows and not crypto_rows:
+            return 0
+
+        with self._transaction() as conn:
+            for table, latest, rows in (("stock_data", "stock_latest", stock_rows),
+                                        ("crypto_data", "crypto_latest", crypto_rows)):
+                if rows:
+                    conn.executemany(f"INSERT INTO {table} VALUES (nextval('{table}_id'), ?, ?, ?, ?)", rows)
+                    conn.executemany(f"INSERT OR REPLACE INTO {latest} VALUES (?, ?, ?, ?)", rows)
+            if bar_rows:
+                conn.executemany("INSERT OR REPLACE INTO ohlcv_bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", bar_rows)
+        return len(stock_rows) + len(crypto_rows)
+
+    def _encode_history(self, history):
+        encoded = encode_history(history, self.history_codec)
+        if encoded is not None:
+            return encoded
+        history = {column: {str(k): v for k, v in values.items()} for column, values in history.items()}
+        return json.dumps(history).encode("utf-8")
+
+    def get_latest_stock_data(self, ticker):
+        rows = self._fetchall("SELECT info, history FROM stock_latest WHERE ticker = ?", [ticker])
+        if rows:
+            info, history = rows[0]
+            return {"info": json.loads(info), "history": load_history(history)}
+        return None
+
+    def get_latest_crypto_data(self, coin_id):
+        rows = self._fetchall("SELECT price, market_chart FROM crypto_latest WHERE coin_id = ?", [coin_id])
+        if rows:
+            return {"price": json.loads(rows[0][0]), "market_chart": json.loads(rows[0][1])}
+        return None
+
+    def get_ohlcv(self, symbol, interval="1d", start=None, end=None, limit=None):
+        query = "SELECT ts, open, high, low, close, volume FROM ohlcv_bars WHERE symbol = ? AND interval = ?"
+        params = [symbol, interval]
+        if start is not None:
+            query += " AND ts >= ?"
+            params.append(to_epoch_seconds(start))
+        if end is not None:
+            query += " AND ts <= ?"
+            params.append(to_epoch_seconds(end))
+        if limit is not None:
+            query = f"SELECT * FROM ({query} ORDER BY ts DESC LIMIT ?) ORDER BY ts"
+            params.append(limit)
+        else:
+            query += " ORDER BY ts"
+        return [dict(zip(("ts",) + OHLCV_COLUMNS, row)) for row in self._fetchall(query, params)]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "duckdb": DuckDBBackend}
+
+
+def open_backend(kind: str = "sqlite", db_name: str = None, **kwargs) -> StorageBackend:
+    """
+    Open a storage backend by name.
+
+    Args:
+        kind: 'sqlite' or 'duckdb'
+        db_name: Database file (the backend's default if None)
+        **kwargs: Passed to the backend's constructor
+    """
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {kind}")
+    if db_name is not None:
+        kwargs["db_name"] = db_name
+    return BACKENDS[kind](**kwargs)
+
+
+def create_saas_tables(conn):
+    """Create the SaaS workflow tables in SQLite (users, affiliates, signals, commissions, market_data)."""
+    conn.execute("""CREATE TABLE IF NOT EXISTS users (
+            email TEXT PRIMARY KEY,
+            package TEXT NOT NULL,
+            affiliate_code TEXT,
+            telegram_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS affiliates (
+            code TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            commission_rate REAL DEFAULT 0.20,
+            total_earned REAL DEFAULT 0.0,
+            users_referred INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS signals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            price REAL NOT NULL,
+            reason TEXT,
+            commission_value REAL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS commissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            affiliate_code TEXT NOT NULL,
+            user_email TEXT NOT NULL,
+            signal_type TEXT NOT NULL,
+            commission_amount REAL NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (affiliate_code) REFERENCES affiliates (code),
+            FOREIGN KEY (user_email) REFERENCES users (email)
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS market_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            price REAL NOT NULL,
+            volume INTEGER NOT NULL,
+            rsi REAL NOT NULL,
+            volume_avg_30min INTEGER NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+    # Package lookups on every signal, and per-affiliate commission rollups
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_package ON users (package)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_commissions_affiliate_timestamp "
+                 "ON commissions (affiliate_code, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_signals_timestamp ON signals (timestamp)")
+
+
+def create_duckdb_tables(conn):
+    """Create every backend table in DuckDB (sequences stand in for AUTOINCREMENT)."""
+    for table in ("stock_data", "crypto_data", "signals", "commissions", "market_data"):
+        conn.execute(f"CREATE SEQUENCE IF NOT EXISTS {table}_id")
+    conn.execute("""CREATE TABLE IF NOT EXISTS stock_data (
+            id BIGINT PRIMARY KEY, ticker VARCHAR NOT NULL, timestamp VARCHAR NOT NULL, info VARCHAR, history BLOB
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS crypto_data (
+            id BIGINT PRIMARY KEY, coin_id VARCHAR NOT NULL, timestamp VARCHAR NOT NULL,
+            price VARCHAR, market_chart VARCHAR
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS stock_latest (
+            ticker VARCHAR PRIMARY KEY, timestamp VARCHAR NOT NULL, info VARCHAR, history BLOB
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS crypto_latest (
+            coin_id VARCHAR PRIMARY KEY, timestamp VARCHAR NOT NULL, price VARCHAR, market_chart VARCHAR
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS ohlcv_bars (
+            symbol VARCHAR NOT NULL, interval VARCHAR NOT NULL, ts BIGINT NOT NULL,
+            open DOUBLE, high DOUBLE, low DOUBLE, close DOUBLE, volume DOUBLE,
+            PRIMARY KEY (symbol, interval, ts)
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS users (
+            email VARCHAR PRIMARY KEY, package VARCHAR NOT NULL, affiliate_code VARCHAR, telegram_id VARCHAR,
+            created_at TIMESTAMP DEFAULT current_timestamp
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS affiliates (
+            code VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, commission_rate DOUBLE DEFAULT 0.20,
+            total_earned DOUBLE DEFAULT 0.0, users_referred INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT current_timestamp
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS signals (
+            id BIGINT PRIMARY KEY DEFAULT nextval('signals_id'), type VARCHAR NOT NULL, symbol VARCHAR NOT NULL,
+            price DOUBLE NOT NULL, reason VARCHAR, commission_value DOUBLE,
+            timestamp VARCHAR
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS commissions (
+            id BIGINT PRIMARY KEY DEFAULT nextval('commissions_id'), affiliate_code VARCHAR NOT NULL,
+            user_email VARCHAR NOT NULL, signal_type VARCHAR NOT NULL, commission_amount DOUBLE NOT NULL,
+            timestamp VARCHAR
+        )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS market_data (
+            id BIGINT PRIMARY KEY DEFAULT nextval('market_data_id'), symbol VARCHAR NOT NULL,
+            price DOUBLE NOT NULL, volume BIGINT NOT NULL, rsi DOUBLE NOT NULL, volume_avg_30min BIGINT NOT NULL,
+            timestamp VARCHAR
+        )""")
+
+
+def _timestamp(value) -> Optional[str]:
+    # Stored as text in both backends, in the format sqlite3 uses for datetimes
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def _since_clause(since):
+    if since is None:
+        return "", []
+    return "WHERE timestamp >= ?", [_timestamp(since)]
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Applied to every connection. WAL lets readers keep reading the last committed
+# state while the writer appends, and synchronous=NORMAL is durable in WAL mode
+# except for the last transactions before a power loss.
+DEFAULT_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -64000,          # negative = KiB, i.e. 64 MB page cache
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+class ConnectionManager:
+    """
+    SQLite connections for one database file: a single writer and one reader per thread.
+
+    The writer is shared by every DataStorage on the same file and is guarded by
+    a lock, so writes within the process never contend for the SQLite write lock.
+    Readers are thread-local and read-only; with WAL they never wait for the writer.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0, pragmas: Dict = None):
+        """
+        Initialize the manager and open the writer connection.
+
+        Args:
+            path: Database file (":memory:" shares the writer connection with readers)
+            busy_timeout: Seconds to wait for a lock held by another process before failing
+            pragmas: Overrides for DEFAULT_PRAGMAS
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+        self.in_memory = path == ":memory:"
+
+        # BEGIN IMMEDIATE takes the write lock up front, so a transaction never
+        # fails half way through when upgrading from a read lock
+        self.writer = self._connect(isolation_level="IMMEDIATE")
+        if not self.in_memory:
+            self.journal_mode = self.writer.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        else:
+            self.journal_mode = "memory"
+        self.write_lock = threading.RLock()
+
+        self._local = threading.local()
+        self._readers: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self, isolation_level="", query_only=False) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False,
+                               isolation_level=isolation_level)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if query_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def write(self):
+        """Run a write transaction on the shared writer; commits on success, rolls back on error."""
+        with self.write_lock:
+            with self.writer:
+                yield self.writer
+
+    def reader(self) -> sqlite3.Connection:
+        """Get this thread's read-only connection, opening it on first use."""
+        if self.in_memory:
+            # Every connection to ":memory:" is a separate database
+            return self.writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect(query_only=True)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._prune_readers()
+                self._readers.append((threading.current_thread(), conn))
+        return conn
+
+    def _prune_readers(self):
+        # Close readers left behind by threads that have exited
+        alive = []
+        for thread, conn in self._readers:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._readers = alive
+
+    def stats(self) -> Dict:
+        with self._readers_lock:
+            readers = len(self._readers)
+        return {"path": self.path, "journal_mode": self.journal_mode, "readers": readers}
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        with self._readers_lock:
+            for _, conn in self._readers:
+                conn.close()
+            self._readers = []
+        with self.write_lock:
+            self.writer.close()
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_refcounts: Dict[str, int] = {}
+_managers_lock = threading.Lock()
+
+
+def _registry_key(path: str) -> str:
+    return path if path == ":memory:" else os.path.abspath(path)
+
+
+def get_connection_manager(path: str, **kwargs) -> ConnectionManager:
+    """
+    Get the process-wide manager for a database file.
+
+    Every call must be paired with release_connection_manager(). In-memory
+    databases are never shared.
+    """
+    if path == ":memory:":
+        return ConnectionManager(path, **kwargs)
+    key = _registry_key(path)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = ConnectionManager(path, **kwargs)
+            _managers[key] = manager
+            _refcounts[key] = 0
+        _refcounts[key] += 1
+        return manager
+
+
+def release_connection_manager(manager: ConnectionManager):
+    """Drop one reference to a manager, closing its connections when none are left."""
+    key = _registry_key(manager.path)
+    with _managers_lock:
+        if _managers.get(key) is manager:
+            _refcounts[key] -= 1
+            if _refcounts[key] > 0:
+                return
+            del _managers[key]
+            del _refcounts[key]
+    manager.close()
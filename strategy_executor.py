@@ -5,6 +5,8 @@ from typing import Dict, List, Any, Optional
 from enum import Enum
 import logging
 
+from event_bus import get_event_bus
+
 # Mock implementations for broker APIs (replace with real implementations)
 class OrderType(Enum):
     MARKET = "market"
@@ -232,13 +234,14 @@ class MockBrokerAPI:
                     position.entry_price = new_avg_price
 
 class StrategyExecutor:
-    def __init__(self, broker_api=None, initial_capital: float = 10000.0):
+    def __init__(self, broker_api=None, initial_capital: float = 10000.0, event_bus=None):
         """
         Initialize strategy executor.
         
         Args:
             broker_api: Broker API instance (uses mock if None)
             initial_capital: Initial capital amount
+            event_bus: Bus executions are published to (defaults to the shared bus)
         """
         self.broker = broker_api or MockBrokerAPI(initial_capital)
         self.risk_manager = RiskManager()
@@ -248,6 +251,7 @@ class StrategyExecutor:
         
         # Strategy execution history
         self.execution_history = []
+        self.event_bus = event_bus or get_event_bus()
         
         # Configure logging
         logging.basicConfig(level=logging.INFO)
@@ -315,6 +319,7 @@ class StrategyExecutor:
             
             # Log execution
             execution_record = {
+                "seq": len(self.execution_history) + 1,
                 "timestamp": datetime.now().isoformat(),
                 "signal": signal,
                 "order": order.to_dict(),
@@ -322,6 +327,7 @@ class StrategyExecutor:
                 "strategy": strategy
             }
             self.execution_history.append(execution_record)
+            self.event_bus.publish(f"orders.{symbol}", execution_record)
             
             self.logger.info(f"Executed signal: {signal} -> {result}")
             
@@ -407,6 +413,8 @@ class StrategyExecutor:
         order = Order(symbol, side, OrderType.MARKET, position['quantity'])
         
         result = self.broker.place_order(order)
+        self.event_bus.publish(f"orders.{symbol}", {"timestamp": datetime.now().isoformat(),
+                                                   "order": order.to_dict(), "result": result})
         return {"success": True, "order_id": result.get('order_id')}
 
     def get_portfolio_summary(self) -> Dict[str, Any]:
@@ -427,6 +435,42 @@ class StrategyExecutor:
             "active_strategies": list(self.active_strategies)
         }
 
+    def get_execution_history(self, since: datetime = None, before: int = None, limit: int = 100,
+                              compact: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get executed signals newest first, one page at a time.
+        
+        Args:
+            since: Only executions at or after this time
+            before: Only executions whose "seq" is below this one (the last seq of the previous page)
+            limit: Maximum number of executions
+            compact: Return only the order summary instead of the full signal, order and result
+        
+        Returns:
+            List of execution records
+        """
+        # The history is append-only, so seq - 1 is the record's index
+        end = len(self.execution_history) if before is None else min(max(before - 1, 0), len(self.execution_history))
+        cutoff = since.isoformat() if since else None
+        records = []
+        for record in reversed(self.execution_history[max(end - limit, 0):end]):
+            if cutoff and record['timestamp'] < cutoff:
+                break
+            if compact:
+                order = record['order']
+                record = {
+                    "seq": record['seq'],
+                    "timestamp": record['timestamp'],
+                    "strategy": record['strategy'],
+                    "symbol": order.get('symbol'),
+                    "side": order.get('side'),
+                    "quantity": order.get('quantity'),
+                    "status": record['result'].get('status'),
+                    "order_id": record['result'].get('order_id')
+                }
+            records.append(record)
+        return records
+
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Calculate performance metrics."""
         if not self.execution_history:
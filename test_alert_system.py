@@ -1,5 +1,8 @@
 from alert_system import AlertSystem
 from trigger_engine import TriggerEngine
+from data_storage import DataStorage
+from event_bus import EventBus
+import os
 import time
 
 def test_alert_system():
@@ -7,7 +10,9 @@ def test_alert_system():
     print("Testing Alert System...")
     
     # Initialize alert system
-    alert_system = AlertSystem()
+    bus = EventBus()
+    subscription = bus.subscribe(["alerts"])
+    alert_system = AlertSystem(event_bus=bus)
     
     # Test volume anomaly detection
     print("\n1. Testing Volume Anomaly Detection:")
@@ -61,6 +66,39 @@ def test_alert_system():
     print("\n4. Alert Summary:")
     summary = alert_system.get_alert_summary()
     print(f"Alert summary: {summary}")
+    
+    # Every generated alert is published for the SSE stream
+    published = [event.data for event in subscription.get(timeout=0)]
+    assert published == alert_system.alert_history
+    assert alert_system.get_recent_alerts(1) == alert_system.alert_history
+    
+    # Paging newest first by seq
+    newest = alert_system.query_alerts(limit=1)
+    assert newest == alert_system.alert_history[-1:]
+    older = alert_system.query_alerts(before=newest[0]['seq'], compact=True)
+    assert len(older) == len(alert_system.alert_history) - 1
+    assert all('data' not in alert for alert in older)
+
+def test_stored_alerts_beyond_history():
+    """With a storage, recent alerts and the summary cover alerts trimmed from memory."""
+    db_name = "test_wealthflow_alert_system.db"
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    db = DataStorage(db_name=db_name)
+    alert_system = AlertSystem(event_bus=EventBus(), storage=db, max_history=2)
+    for i in range(10):
+        alert_system.generate_alert("volume_anomaly" if i % 2 else "pump_dump", "AAPL",
+                                    {"volume_multiplier": 3.0 + i}, "high" if i < 3 else "low")
+    assert len(alert_system.alert_history) < 10
+    
+    recent = alert_system.get_recent_alerts(24)
+    assert [alert['data']['volume_multiplier'] for alert in recent] == [3.0 + i for i in range(10)]
+    
+    summary = alert_system.get_alert_summary()
+    assert summary == {"total_alerts": 10, "alert_types": {"volume_anomaly": 5, "pump_dump": 5},
+                       "urgency_levels": {"high": 3, "low": 7}, "recent_alerts_24h": 10}
+    db.close()
+    os.remove(db_name)
 
 def test_trigger_engine():
     """Test the trigger engine functionality."""
@@ -120,6 +158,7 @@ def test_integration():
 
 if __name__ == "__main__":
     test_alert_system()
+    test_stored_alerts_beyond_history()
     test_trigger_engine()
     test_integration()
     
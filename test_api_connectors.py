@@ -1,4 +1,10 @@
 from api_connectors import YahooFinanceAPI, CoinGeckoAPI
+from rate_limiter import configure_limiter
+from response_cache import get_response_cache
+from unittest import mock
+import pytest
+import requests
+import sys
 
 def test_yahoo_finance():
     yf_api = YahooFinanceAPI()
@@ -31,8 +37,173 @@ def test_coingecko():
     else:
         print("Error fetching Ethereum market chart:", market_chart.get("error", "Unknown error"))
 
+def _price_response(ids, status_code=200):
+    response = mock.Mock(status_code=status_code, headers={})
+    response.json.return_value = {coin_id: {"usd": float(len(coin_id))} for coin_id in ids.split(",")}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(f"{status_code} Client Error")
+    return response
+
+def _mock_price_session(failing_calls=()):
+    """Session answering /simple/price with a price for every requested id; calls in failing_calls get a 400."""
+    session = mock.Mock()
+    def get(url, params=None):
+        call = session.get.call_count
+        return _price_response(params["ids"], 400 if call in failing_calls else 200)
+    session.get.side_effect = get
+    return session
+
+def test_coingecko_id_chunks():
+    cg_api = CoinGeckoAPI(session=mock.Mock())
+
+    # At most 250 ids per request
+    assert [len(chunk) for chunk in cg_api._chunk_ids([f"c{i}" for i in range(250)])] == [250]
+    assert [len(chunk) for chunk in cg_api._chunk_ids([f"c{i}" for i in range(251)])] == [250, 1]
+    assert [len(chunk) for chunk in cg_api._chunk_ids([f"c{i}" for i in range(600)])] == [250, 250, 100]
+
+    # At most 4000 characters in the comma-separated ids parameter:
+    # 40 ids of 99 characters take 40 * 99 + 39 commas = 3999
+    long_ids = [f"{i:02d}" + "x" * 97 for i in range(50)]
+    chunks = list(cg_api._chunk_ids(long_ids))
+    assert [len(chunk) for chunk in chunks] == [40, 10]
+    assert len(",".join(chunks[0])) == 3999
+    # 4000 characters exactly still fit; one more does not
+    exact = ["y" * 3000, "z" * 999]
+    assert [len(chunk) for chunk in cg_api._chunk_ids(exact)] == [2]
+    assert [len(chunk) for chunk in cg_api._chunk_ids(["y" * 3000, "z" * 1000])] == [1, 1]
+
+    # Order is kept and nothing is lost across chunks
+    assert [coin_id for chunk in chunks for coin_id in chunk] == long_ids
+    assert list(cg_api._chunk_ids([])) == []
+
+def test_coingecko_batched_prices():
+    configure_limiter("coingecko", rate=1000, capacity=1000)
+    get_response_cache().clear()
+    try:
+        ids = [f"coin{i}" for i in range(300)]
+        session = _mock_price_session()
+        cg_api = CoinGeckoAPI(session=session)
+        # Already cached prices are not requested again
+        cg_api.get_coin_prices(ids[:10])
+        assert session.get.call_count == 1
+        prices = cg_api.get_coin_prices(ids + ids[:5])
+        assert session.get.call_count == 3
+        requested = [call.kwargs["params"]["ids"].split(",") for call in session.get.call_args_list[1:]]
+        assert [len(chunk) for chunk in requested] == [250, 40]
+        assert all(call.kwargs["params"]["vs_currencies"] == "usd" for call in session.get.call_args_list)
+        # The batched responses are merged into one result in the callers' order
+        assert list(prices) == ids
+        assert prices["coin299"] == {"usd": 7.0}
+
+        # A failed chunk only loses its own coins
+        get_response_cache().clear()
+        session = _mock_price_session(failing_calls=(2,))
+        prices = CoinGeckoAPI(session=session).get_coin_prices(ids, vs_currencies=["usd", "eur"])
+        assert session.get.call_args.kwargs["params"]["vs_currencies"] == "usd,eur"
+        assert sorted(prices) == sorted(ids[:250])
+
+        # Every chunk failing is an error
+        get_response_cache().clear()
+        session = _mock_price_session(failing_calls=(1, 2))
+        assert "error" in CoinGeckoAPI(session=session).get_coin_prices(ids)
+    finally:
+        get_response_cache().clear()
+        configure_limiter("coingecko")
+
+def _ohlcv_frame(pd, tickers=None, days=3):
+    """yf.download-shaped frame: (ticker, field) MultiIndex columns for a list of tickers, flat for one."""
+    index = pd.date_range("2025-09-02", periods=days, freq="D", tz="America/New_York")
+    fields = ["Open", "High", "Low", "Close", "Volume"]
+    rows = [[100.0 + day, 101.0 + day, 99.0 + day, 100.5 + day, 1000.0 * (day + 1)] for day in range(days)]
+    if tickers is None:
+        return pd.DataFrame(rows, index=index, columns=fields)
+    columns = pd.MultiIndex.from_product([tickers, fields])
+    return pd.DataFrame([row * len(tickers) for row in rows], index=index, columns=columns)
+
+def _mock_ticker(info):
+    return mock.Mock(info=dict(info))
+
+def test_yahoo_batched_download():
+    pd = pytest.importorskip("pandas")
+    configure_limiter("yahoo", rate=1000, capacity=1000)
+    get_response_cache().clear()
+    yf = mock.Mock()
+    try:
+        with mock.patch.dict(sys.modules, {"yfinance": yf}):
+            yf_api = YahooFinanceAPI()
+
+            # Several tickers: one download, split by the first column level
+            frame = _ohlcv_frame(pd, ["AAPL", "MSFT"])
+            frame[("MSFT", "Close")] = float("nan")
+            for field in ("Open", "High", "Low", "Volume"):
+                frame[("MSFT", field)] = float("nan")
+            yf.download.return_value = frame
+            results = yf_api.get_stocks_data(["AAPL", "MSFT", "NOPE", "AAPL"])
+            assert yf.download.call_count == 1
+            assert sorted(yf.download.call_args.args[0]) == ["AAPL", "MSFT", "NOPE"]
+            assert list(results) == ["AAPL", "MSFT", "NOPE"]
+            assert list(results["AAPL"]["history"]["Close"].values()) == [100.5, 101.5, 102.5]
+            assert results["AAPL"]["info"] == {}
+            assert "error" in results["MSFT"]
+            assert "error" in results["NOPE"]
+
+            # Cached histories are not downloaded again; the rest comes as a single-ticker frame
+            yf.download.return_value = _ohlcv_frame(pd)
+            results = yf_api.get_stocks_data(["AAPL", "TSLA"])
+            assert yf.download.call_count == 2
+            assert yf.download.call_args.args[0] == ["TSLA"]
+            assert list(results["TSLA"]["history"]["Volume"].values()) == [1000.0, 2000.0, 3000.0]
+            assert results["AAPL"]["history"] == yf_api.get_stocks_data(["AAPL"])["AAPL"]["history"]
+            assert yf.download.call_count == 2
+
+            # A failed download is reported per ticker
+            yf.download.side_effect = RuntimeError("download failed")
+            assert yf_api.get_stocks_data(["GOOGL"]) == {"GOOGL": {"error": "download failed"}}
+            yf.download.side_effect = None
+
+            # .info is optional and scraped at most once per TTL
+            with mock.patch.object(yf_api, "_ticker", side_effect=lambda t: _mock_ticker({"symbol": t})) as ticker:
+                results = yf_api.get_stocks_data(["AAPL", "TSLA"], include_info=True)
+                assert results["AAPL"]["info"] == {"symbol": "AAPL"}
+                assert results["TSLA"]["info"] == {"symbol": "TSLA"}
+                yf_api.get_stocks_data(["AAPL", "TSLA"], include_info=True)
+                assert ticker.call_count == 2
+    finally:
+        get_response_cache().clear()
+        configure_limiter("yahoo")
+
+def test_latest_history_value_fallback():
+    """Without price fields in .info, reports fall back to the last bar of the downloaded history."""
+    pd = pytest.importorskip("pandas")
+    from report_generator import ReportGenerator
+    configure_limiter("yahoo", rate=1000, capacity=1000)
+    get_response_cache().clear()
+    yf = mock.Mock()
+    try:
+        with mock.patch.dict(sys.modules, {"yfinance": yf}):
+            yf.download.return_value = _ohlcv_frame(pd)
+            data = YahooFinanceAPI().get_stocks_data(["AAPL"])["AAPL"]
+        report_generator = ReportGenerator(yf_api=mock.Mock(), cg_api=mock.Mock(), sentiment_analyzer=mock.Mock(),
+                                           news_aggregator=mock.Mock(), alert_system=mock.Mock(), db=mock.Mock())
+        assert report_generator._extract_current_price(data) == 102.5
+        assert report_generator._extract_volume(data) == 3000.0
+        assert report_generator._latest_history_value(data, "Open") == 102.0
+        assert report_generator._latest_history_value({"history": {}}, "Close") is None
+
+        # .info wins when it has the fields
+        data = dict(data, info={"currentPrice": 150.0, "volume": 42})
+        assert report_generator._extract_current_price(data) == 150.0
+        assert report_generator._extract_volume(data) == 42
+    finally:
+        get_response_cache().clear()
+        configure_limiter("yahoo")
+
 if __name__ == "__main__":
     test_yahoo_finance()
     test_coingecko()
+    test_coingecko_id_chunks()
+    test_coingecko_batched_prices()
+    test_yahoo_batched_download()
+    test_latest_history_value_fallback()
 
 
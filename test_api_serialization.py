@@ -0,0 +1,69 @@
+from api_serialization import brotli, choose_encoding, compress, dumps, loads, negotiate, MIN_COMPRESS_SIZE
+from strategy_executor import Order, OrderSide, OrderType, Position
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+import gzip
+
+@dataclass
+class Snapshot:
+    version: int
+    built_at: datetime
+
+def test_native_types():
+    now = datetime(2025, 9, 1, 12, 30, 0, 123456)
+    payload = {
+        "timestamp": now,
+        "date": date(2025, 9, 1),
+        "side": OrderSide.BUY,
+        "amount": Decimal("1.5"),
+        "tags": {"vip"},
+        "snapshot": Snapshot(3, now),
+        "position": Position("AAPL", 10, 150.0, "long", timestamp=now),
+    }
+    decoded = loads(dumps(payload))
+    assert decoded["timestamp"] == now.isoformat()
+    assert decoded["date"] == "2025-09-01"
+    assert decoded["side"] == "buy"
+    assert decoded["amount"] == 1.5
+    assert decoded["tags"] == ["vip"]
+    assert decoded["snapshot"] == {"version": 3, "built_at": now.isoformat()}
+    assert decoded["position"]["symbol"] == "AAPL"
+    assert decoded["position"]["timestamp"] == now.isoformat()
+    # Compact and UTF-8, with no spaces after separators
+    assert dumps({"a": [1, 2], "b": "é"}) == '{"a":[1,2],"b":"é"}'.encode()
+
+    order = Order("BTC", OrderSide.SELL, OrderType.MARKET, 1)
+    assert loads(dumps(order))["side"] == "sell"
+
+def test_choose_encoding():
+    assert choose_encoding(None) is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("*") == ("br" if brotli else "gzip")
+    assert choose_encoding("br, gzip;q=0.5") == ("br" if brotli else "gzip")
+
+def test_negotiate():
+    small = b'{"success":true}'
+    assert negotiate(small, "gzip") == (small, None)
+
+    body = dumps({"data": [{"id": i, "message": "Volume spike detected"} for i in range(200)]})
+    assert len(body) > MIN_COMPRESS_SIZE
+    assert negotiate(body, None) == (body, None)
+    assert negotiate(body, "gzip", "text/event-stream") == (body, None)
+
+    cache = {}
+    compressed, encoding = negotiate(body, "gzip", "application/json", cache)
+    assert encoding == "gzip" and len(compressed) < len(body) / 4
+    assert gzip.decompress(compressed) == body
+    # Compressed once per encoding, then reused
+    assert negotiate(body, "gzip", "application/json", cache)[0] is compressed
+    # Deterministic output, so cached copies and ETags stay stable
+    assert compress(body, "gzip") == compressed
+
+if __name__ == "__main__":
+    test_native_types()
+    test_choose_encoding()
+    test_negotiate()
+    print("API serialization tests completed.")
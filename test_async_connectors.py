@@ -0,0 +1,64 @@
+from async_connectors import ConcurrentConnectors, ProviderConcurrency
+import async_connectors
+import threading
+import time
+
+class SlowCoinGeckoAPI:
+    """Fake CoinGecko connector that sleeps instead of calling the network."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def get_coin_prices(self, ids, vs_currencies="usd"):
+        return {coin_id: {"usd": 1.0} for coin_id in ids}
+
+    def get_coin_market_chart(self, coin_id, vs_currency="usd", days="1"):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        return {"prices": [[0, 1.0]], "total_volumes": [[0, 10.0]]}
+
+def test_concurrent_market_charts():
+    """Market charts for a watchlist should be fetched at once, bounded by the limit."""
+    original = async_connectors.concurrency
+    async_connectors.concurrency = ProviderConcurrency({"yahoo": 4, "coingecko": 4, "alphavantage": 1})
+    try:
+        fake_api = SlowCoinGeckoAPI(delay=0.2)
+        connectors = ConcurrentConnectors(yf_api=object(), cg_api=fake_api)
+
+        coins = ["bitcoin", "ethereum", "dogecoin", "cardano"]
+        charts = connectors.get_coin_market_charts(coins)
+
+        print(f"Fetched {len(charts)} charts (max in flight: {fake_api.max_in_flight})")
+        assert set(charts) == set(coins)
+        # Every request was in flight at the same time, none beyond the limit
+        assert fake_api.max_in_flight == len(coins)
+    finally:
+        async_connectors.concurrency = original
+
+def test_concurrency_limit():
+    """No more than the provider limit should run at once."""
+    original = async_connectors.concurrency
+    async_connectors.concurrency = ProviderConcurrency({"yahoo": 4, "coingecko": 2, "alphavantage": 1})
+    try:
+        fake_api = SlowCoinGeckoAPI(delay=0.05)
+        connectors = ConcurrentConnectors(yf_api=object(), cg_api=fake_api)
+
+        snapshots = connectors.get_crypto_snapshots([f"coin{i}" for i in range(10)])
+        print(f"Max in flight with limit 2: {fake_api.max_in_flight}")
+        assert len(snapshots) == 10
+        assert all(s["price"] and "error" not in s["price"] for s in snapshots.values())
+        assert fake_api.max_in_flight == 2
+    finally:
+        async_connectors.concurrency = original
+
+if __name__ == "__main__":
+    test_concurrent_market_charts()
+    test_concurrency_limit()
+    print("Async connector tests completed.")
@@ -0,0 +1,80 @@
+from collection_scheduler import CollectionScheduler, OVERRUN_ALLOW
+import time
+
+def test_fixed_rate_cadence():
+    """Cycles should start on the interval grid even when each cycle takes a while."""
+    scheduler = CollectionScheduler(interval=0.2, max_workers=4)
+    starts = []
+
+    def build_tasks():
+        return {f"asset{i}": (lambda: time.sleep(0.05) or "ok") for i in range(4)}
+
+    def on_results(results, report):
+        starts.append(time.monotonic())
+        assert report.completed == 4
+
+    scheduler.run_forever(build_tasks, on_results, max_cycles=4)
+    scheduler.shutdown()
+
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    print(f"Gaps between cycles: {[round(g, 3) for g in gaps]}")
+    # A fixed-delay loop would give interval + cycle duration (~0.25s)
+    assert all(0.15 < gap < 0.24 for gap in gaps)
+
+def test_deadline_and_skip_overrun():
+    """Slow assets time out without holding up the cycle, then get skipped while still running."""
+    scheduler = CollectionScheduler(interval=0.2, max_workers=4, asset_deadline=0.1)
+    tasks = {"fast": lambda: 1, "slow": lambda: time.sleep(0.5) or 2}
+
+    start = time.monotonic()
+    results, report = scheduler.run_cycle(tasks)
+    elapsed = time.monotonic() - start
+    print(f"First cycle took {elapsed:.2f}s: {report.to_dict()}")
+    assert results["fast"].status == "ok" and results["fast"].value == 1
+    assert results["slow"].status == "timeout"
+    assert elapsed < 0.3
+
+    results, report = scheduler.run_cycle(tasks)
+    assert results["slow"].status == "skipped"
+    assert report.skipped == 1
+    scheduler.shutdown()
+
+def test_allow_overrun_and_errors():
+    """With the 'allow' policy overrunning assets are resubmitted; exceptions become errors."""
+    scheduler = CollectionScheduler(interval=0.2, max_workers=4, asset_deadline=0.05,
+                                    overrun_policy=OVERRUN_ALLOW)
+    tasks = {"slow": lambda: time.sleep(0.2), "broken": lambda: 1 / 0}
+
+    scheduler.run_cycle(tasks)
+    results, report = scheduler.run_cycle(tasks)
+    assert results["slow"].status == "timeout"
+    assert results["broken"].status == "error"
+    assert report.failed == 1 and report.skipped == 0
+    scheduler.shutdown()
+
+def test_deadline_cancels_queued_tasks():
+    """Tasks still queued at the deadline never run, and late results are not reported."""
+    scheduler = CollectionScheduler(interval=0.2, max_workers=1, asset_deadline=0.1)
+    ran = []
+    tasks = {
+        "slow": lambda: time.sleep(0.3) or ran.append("slow") or "late",
+        "queued": lambda: ran.append("queued") or "never",
+    }
+
+    results, report = scheduler.run_cycle(tasks)
+    assert results["slow"].status == "timeout" and results["slow"].value is None
+    assert results["queued"].status == "timeout" and "before starting" in results["queued"].error
+    assert report.timed_out == 2
+
+    time.sleep(0.4)
+    assert ran == ["slow"]
+    # Only the task that was running is tracked as overrunning
+    assert list(scheduler._running) == ["slow"]
+    scheduler.shutdown()
+
+if __name__ == "__main__":
+    test_fixed_rate_cadence()
+    test_deadline_and_skip_overrun()
+    test_allow_overrun_and_errors()
+    test_deadline_cancels_queued_tasks()
+    print("Collection scheduler tests completed.")
@@ -0,0 +1,100 @@
+from component_registry import ComponentRegistry
+import threading
+import time
+
+def test_lazy_shared_components():
+    registry = ComponentRegistry()
+    built = []
+
+    def alert_system(registry):
+        built.append("alert_system")
+        return object()
+
+    def report_generator(registry):
+        built.append("report_generator")
+        return {"alerts": registry.get("alert_system")}
+
+    def trigger_engine(registry):
+        built.append("trigger_engine")
+        return {"alerts": registry.get("alert_system")}
+
+    registry.register("alert_system", alert_system)
+    registry.register("report_generator", report_generator)
+    registry.register("trigger_engine", trigger_engine)
+
+    # Nothing is built until it is used
+    assert built == []
+    assert {name: entry["state"] for name, entry in registry.status().items()} == {
+        "alert_system": "pending", "report_generator": "pending", "trigger_engine": "pending"
+    }
+
+    report = registry.get("report_generator")
+    engine = registry.get("trigger_engine")
+    assert report["alerts"] is engine["alerts"]
+    assert built == ["report_generator", "alert_system", "trigger_engine"]
+    assert registry.get("report_generator") is report
+
+    status = registry.status()
+    assert status["trigger_engine"]["state"] == "ready"
+    assert status["alert_system"]["init_ms"] >= 0
+    print(f"Component status: {status}")
+
+def test_failed_component_is_not_retried():
+    registry = ComponentRegistry()
+    attempts = []
+
+    def broken(registry):
+        attempts.append(1)
+        raise ImportError("No module named 'openai'")
+
+    registry.register("sentiment_analyzer", broken)
+    registry.register("report_generator", lambda r: {"sentiment": r.get("sentiment_analyzer")})
+
+    assert registry.optional("report_generator") is None
+    assert registry.optional("report_generator") is None
+    try:
+        registry.get("sentiment_analyzer")
+    except RuntimeError as e:
+        assert "openai" in str(e)
+    else:
+        raise AssertionError("expected RuntimeError")
+    assert len(attempts) == 1
+    assert registry.status()["sentiment_analyzer"]["state"] == "failed"
+
+    # reset() allows another attempt, e.g. after fixing configuration
+    registry.reset("sentiment_analyzer")
+    registry.reset("report_generator")
+    registry.set("sentiment_analyzer", "analyzer")
+    assert registry.get("report_generator") == {"sentiment": "analyzer"}
+
+    try:
+        registry.get("unknown")
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("expected KeyError")
+
+def test_concurrent_first_use_builds_once():
+    registry = ComponentRegistry()
+    built = []
+
+    def slow(registry):
+        built.append(1)
+        time.sleep(0.05)
+        return object()
+
+    registry.register("db", slow)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("db"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert all(result is results[0] for result in results)
+
+if __name__ == "__main__":
+    test_lazy_shared_components()
+    test_failed_component_is_not_retried()
+    test_concurrent_first_use_builds_once()
+    print("Component registry tests completed.")
@@ -1,5 +1,10 @@
-from data_storage import DataStorage
+from data_storage import DataStorage, WriteBehindBuffer
+from datetime import datetime, timedelta, timezone
 import json
+import os
+import sqlite3
+import threading
+import time
 
 def test_data_storage():
     db = DataStorage(db_name="test_wealthflow.db")
@@ -31,7 +36,269 @@ def test_data_storage():
     db.close()
     print("Data storage tests completed.")
 
-if __name__ == "__main__":
-    test_data_storage()
+def test_ohlcv_bars():
+    db_name = "test_wealthflow_bars.db"
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    db = DataStorage(db_name=db_name)
+
+    # yfinance DataFrame.to_dict() layout
+    history = {
+        "Open": {"2025-09-01 00:00:00-04:00": 149.0, "2025-09-02 00:00:00-04:00": 150.0},
+        "High": {"2025-09-01 00:00:00-04:00": 151.0, "2025-09-02 00:00:00-04:00": 152.0},
+        "Low": {"2025-09-01 00:00:00-04:00": 148.0, "2025-09-02 00:00:00-04:00": 149.5},
+        "Close": {"2025-09-01 00:00:00-04:00": 150.0, "2025-09-02 00:00:00-04:00": float("nan")},
+        "Volume": {"2025-09-01 00:00:00-04:00": 1000, "2025-09-02 00:00:00-04:00": 2000},
+    }
+    db.save_stock_data("AAPL", {"symbol": "AAPL"}, history)
+    bars = db.get_ohlcv("AAPL", "1d")
+    print("AAPL bars:", bars)
+    assert [bar["open"] for bar in bars] == [149.0, 150.0]
+    assert bars[1]["close"] is None
+    assert bars[0]["ts"] == int(datetime(2025, 9, 1, 4, tzinfo=timezone.utc).timestamp())
+
+    # Saving the same bar again replaces it instead of duplicating it
+    history["Close"]["2025-09-02 00:00:00-04:00"] = 151.0
+    db.save_stock_data("AAPL", {"symbol": "AAPL"}, history)
+    bars = db.get_ohlcv("AAPL", "1d", start=datetime(2025, 9, 2, tzinfo=timezone.utc))
+    assert len(bars) == 1 and bars[0]["close"] == 151.0
+
+    # History is stored as packed arrays and can be read back without building dicts
+    arrays = db.get_latest_stock_history("AAPL")
+    assert list(arrays["Close"]) == [150.0, 151.0]
+    assert list(arrays.timestamps) == [bar["ts"] for bar in db.get_ohlcv("AAPL", "1d")]
+
+    # CoinGecko 5 minute samples are bucketed onto the grid
+    base = 1678886400000
+    market_chart = {
+        "prices": [[base + 10000, 100.0], [base + 200000, 105.0], [base + 310000, 102.0], [base + 610000, 99.0]],
+        "total_volumes": [[base + 10000, 5.0], [base + 310000, 6.0], [base + 610000, 7.0]],
+    }
+    db.save_crypto_data("bitcoin", {"bitcoin": {"usd": 99.0}}, market_chart)
+    bars = db.get_ohlcv("bitcoin", "5m")
+    print("bitcoin bars:", bars)
+    assert len(bars) == 3
+    assert (bars[0]["open"], bars[0]["high"], bars[0]["low"], bars[0]["close"]) == (100.0, 105.0, 100.0, 105.0)
+    assert db.get_ohlcv("bitcoin", "5m", limit=1)[0]["close"] == 99.0
+    db.close()
+
+    # Blobs written before the bars table existed are migrated on open
+    conn = sqlite3.connect(db_name)
+    conn.execute("DELETE FROM ohlcv_bars")
+    conn.execute("DELETE FROM stock_latest")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+    db = DataStorage(db_name=db_name)
+    assert len(db.get_ohlcv("AAPL", "1d")) == 2
+    assert db.get_latest_stock_data("AAPL")["history"]["Close"]["2025-09-02 00:00:00-04:00"] == 151.0
+    assert len(db.get_ohlcv("bitcoin", "5m")) == 3
+    db.close()
+    os.remove(db_name)
+    print("OHLCV bar tests completed.")
+
+def test_batched_writes():
+    db_name = "test_wealthflow_batch.db"
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    db = DataStorage(db_name=db_name)
+
+    history = {"Close": {"2025-09-01 00:00:00-04:00": 150.0}}
+    stocks = [(f"T{i}", {"symbol": f"T{i}"}, history) for i in range(50)]
+    cryptos = [("bitcoin", {"bitcoin": {"usd": 1.0}}, {"prices": [[1678886400000, 1.0]]})]
+    assert db.save_snapshots(stocks=stocks, cryptos=cryptos) == 51
+    assert db.get_latest_stock_data("T49")["info"] == {"symbol": "T49"}
+    assert db.get_latest_crypto_data("bitcoin")["price"] == {"bitcoin": {"usd": 1.0}}
+
+    # A bad snapshot rolls back the whole batch
+    try:
+        db.save_snapshots(stocks=[("NEW", {}, history), (None, {}, history)])
+        assert False, "expected the batch to fail"
+    except sqlite3.IntegrityError:
+        pass
+    assert db.get_latest_stock_data("NEW") is None
+
+    # Write-behind: flushed by size threshold, then by the background thread
+    buffer = WriteBehindBuffer(db, flush_interval=0.1, max_pending=10)
+    for i in range(10):
+        buffer.save_stock_data(f"B{i}", {"symbol": f"B{i}"}, history)
+    assert db.get_latest_stock_data("B9") is not None
+    buffer.start()
+    buffer.save_stock_data("LATE", {"symbol": "LATE"}, history)
+    time.sleep(0.3)
+    assert db.get_latest_stock_data("LATE") is not None
+    buffer.save_stock_data("LAST", {"symbol": "LAST"}, history)
+    buffer.stop()
+    assert db.get_latest_stock_data("LAST") is not None
+    print("Write-behind counters:", buffer.counters)
+    assert buffer.counters["written"] == 12
+
+    db.close()
+    os.remove(db_name)
+    print("Batched write tests completed.")
+
+def test_write_behind_poison_snapshot():
+    db_name = "test_wealthflow_poison.db"
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    db = DataStorage(db_name=db_name)
+
+    # An info dict that does not encode fails the batch it is flushed with
+    history = {"Close": {"2025-09-01 00:00:00-04:00": 150.0}}
+    buffer = WriteBehindBuffer(db, max_pending=100, max_retries=2)
+    buffer.save_stock_data("GOOD1", {"symbol": "GOOD1"}, history)
+    buffer.save_stock_data("POISON", {"bad": object()}, history)
+    buffer.save_stock_data("GOOD2", {"symbol": "GOOD2"}, history)
+    assert buffer.flush() == 2
+    assert db.get_latest_stock_data("GOOD1") is not None
+    assert db.get_latest_stock_data("GOOD2") is not None
+    assert buffer.counters["flush_errors"] == 1
+    assert buffer.counters["queued"] == 1
+
+    # Retried on its own, then dropped; it never holds up later snapshots
+    buffer.save_stock_data("GOOD3", {"symbol": "GOOD3"}, history)
+    assert buffer.flush() == 1
+    assert db.get_latest_stock_data("GOOD3") is not None
+    print("Poison snapshot counters:", buffer.counters)
+    assert buffer.counters["dropped"] == 1
+    assert buffer.counters["queued"] == 0
+    assert [row[0] for _, row, _ in buffer.rejected] == ["POISON"]
+    assert db.get_latest_stock_data("POISON") is None
+
+    buffer.save_stock_data("GOOD4", {"symbol": "GOOD4"}, history)
+    assert buffer.flush() == 1
+    assert buffer.counters["flush_errors"] == 1
 
+    db.close()
+    os.remove(db_name)
+
+def test_wal_readers_do_not_block():
+    db_name = "test_wealthflow_wal.db"
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    collector_db = DataStorage(db_name=db_name)
+    engine_db = DataStorage(db_name=db_name)
+    # Both share one connection manager (and so one writer) for the file
+    assert collector_db.connections is engine_db.connections
+    assert collector_db.connections.journal_mode == "wal"
+
+    history = {"Close": {"2025-09-01 00:00:00-04:00": 150.0}}
+    collector_db.save_stock_data("AAPL", {"symbol": "AAPL"}, history)
+
+    # Hold the write transaction open while another thread reads
+    read_times = []
+    def read():
+        start = time.perf_counter()
+        assert engine_db.get_latest_stock_data("AAPL")["info"] == {"symbol": "AAPL"}
+        read_times.append(time.perf_counter() - start)
+
+    with collector_db.connections.write() as conn:
+        conn.execute("INSERT INTO stock_latest (ticker, timestamp, info, history) VALUES ('MSFT', 'now', '{}', '{}')")
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(timeout=2)
+        # The uncommitted row is not visible to readers
+        assert engine_db.get_latest_stock_data("MSFT") is None
+    print(f"Read during open write transaction took {read_times[0] * 1000:.2f}ms")
+    assert read_times and read_times[0] < 0.5
+    assert engine_db.get_latest_stock_data("MSFT") == {"info": {}, "history": {}}
+
+    engine_db.close()
+    collector_db.close()
+    os.remove(db_name)
+    print("WAL reader tests completed.")
+
+def test_bar_queries():
+    db_name = "test_wealthflow_queries.db"
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    db = DataStorage(db_name=db_name)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for ticker, offset in (("AAPL", 100.0), ("MSFT", 300.0)):
+        history = {
+            "Close": {str(start + timedelta(days=i)): offset + i for i in range(40)},
+            "Volume": {str(start + timedelta(days=i)): 1000 + i for i in range(40)},
+        }
+        db.save_stock_data(ticker, {"symbol": ticker}, history)
+
+    bars = db.get_bars(["AAPL", "MSFT", "NONE"], start=start + timedelta(days=10),
+                       end=start + timedelta(days=19), interval="1d")
+    assert len(bars["AAPL"]) == 10 and len(bars["MSFT"]) == 10 and len(bars["NONE"]) == 0
+    assert list(bars["MSFT"]["close"])[:2] == [310.0, 311.0]
+    assert bars["AAPL"].timestamps[0] == int((start + timedelta(days=10)).timestamp())
+    # Open/high/low were not in the history: NaN in the arrays, None in records
+    assert bars["AAPL"]["open"][0] != bars["AAPL"]["open"][0]
+    assert bars["AAPL"].records()[0] == {"ts": bars["AAPL"].timestamps[0], "open": None, "high": None,
+                                         "low": None, "close": 110.0, "volume": 1010.0}
+
+    chunks = list(db.iter_bars(["AAPL", "MSFT"], interval="1d", chunk_size=15))
+    assert [(symbol, len(arrays)) for symbol, arrays in chunks] == [
+        ("AAPL", 15), ("AAPL", 15), ("AAPL", 10), ("MSFT", 15), ("MSFT", 15), ("MSFT", 10)
+    ]
+    streamed = [ts for symbol, arrays in chunks if symbol == "AAPL" for ts in arrays.timestamps]
+    assert streamed == sorted(set(streamed)) and len(streamed) == 40
+    db.close()
+    os.remove(db_name)
+    print("Bar query tests completed.")
 
+def test_alert_pages():
+    db_name = "test_wealthflow_alerts.db"
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    db = DataStorage(db_name=db_name)
+    start = datetime(2025, 9, 1, 12, 0, 0)
+    seqs = []
+    for i in range(5):
+        seqs.append(db.save_alert({
+            "id": f"volume_anomaly_{i}", "type": "pump_dump" if i == 2 else "volume_anomaly",
+            "asset_name": "BTC" if i % 2 else "AAPL", "urgency": "high",
+            "timestamp": (start + timedelta(minutes=i)).isoformat(), "message": f"alert {i}",
+            "data": {"volume_ratio": 3.0 + i}
+        }))
+
+    # Newest first, paged by seq
+    first = db.get_alerts(limit=2)
+    assert [alert["id"] for alert in first] == ["volume_anomaly_4", "volume_anomaly_3"]
+    assert first[0]["data"] == {"volume_ratio": 7.0}
+    second = db.get_alerts(before=first[-1]["seq"], limit=2)
+    assert [alert["seq"] for alert in second] == [seqs[2], seqs[1]]
+
+    assert len(db.get_alerts(since=start + timedelta(minutes=3))) == 2
+    assert [alert["asset_name"] for alert in db.get_alerts(assets=["BTC"])] == ["BTC", "BTC"]
+    assert [alert["type"] for alert in db.get_alerts(types=["pump_dump"])] == ["pump_dump"]
+    assert "data" not in db.get_alerts(limit=1, include_data=False)[0]
+    assert len(db.get_alerts(limit=None)) == 5
+
+    counts = db.count_alerts()
+    assert counts == {"total_alerts": 5, "alert_types": {"volume_anomaly": 4, "pump_dump": 1},
+                      "urgency_levels": {"high": 5}}
+    assert db.count_alerts(since=start + timedelta(minutes=3))["total_alerts"] == 2
+    db.close()
+    os.remove(db_name)
+
+def test_close_is_idempotent():
+    db_name = "test_wealthflow_close.db"
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    first = DataStorage(db_name=db_name)
+    second = DataStorage(db_name=db_name)
+    assert first.connections is second.connections
+
+    # Closing one storage twice must not release the other's reference
+    first.close()
+    first.close()
+    second.save_stock_data("AAPL", {"symbol": "AAPL"}, {})
+    assert second.get_latest_stock_data("AAPL")["info"] == {"symbol": "AAPL"}
+    second.close()
+    second.close()
+    os.remove(db_name)
+
+if __name__ == "__main__":
+    test_data_storage()
+    test_ohlcv_bars()
+    test_batched_writes()
+    test_write_behind_poison_snapshot()
+    test_wal_readers_do_not_block()
+    test_bar_queries()
+    test_alert_pages()
+    test_close_is_idempotent()
@@ -0,0 +1,100 @@
+from data_storage import DataStorage, WriteBehindBuffer
+import os
+import threading
+import time
+
+DB_NAME = "test_wealthflow_concurrency.db"
+HISTORY = {"Close": {"2025-09-01 00:00:00-04:00": 150.0}}
+
+def _fresh_db():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_NAME + suffix):
+            os.remove(DB_NAME + suffix)
+
+def test_concurrent_writers_and_readers():
+    """Writers and readers on separate DataStorage instances and threads must not error or lose rows."""
+    _fresh_db()
+    writers, readers, writes_per_thread = 4, 4, 50
+    errors = []
+    reads = [0]
+    stop_reading = threading.Event()
+
+    def write(worker):
+        db = DataStorage(db_name=DB_NAME)
+        try:
+            for i in range(writes_per_thread):
+                if i % 2:
+                    db.save_stock_data(f"W{worker}", {"n": i}, HISTORY)
+                else:
+                    db.save_crypto_data(f"coin{worker}", {"n": i}, {"prices": [[1678886400000 + i * 300000, float(i)]]},
+                                       interval="5m")
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    def read():
+        db = DataStorage(db_name=DB_NAME)
+        try:
+            while not stop_reading.is_set():
+                for worker in range(writers):
+                    db.get_latest_stock_data(f"W{worker}")
+                    db.get_ohlcv(f"coin{worker}", "5m")
+                    reads[0] += 1
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    # Keep one instance open so the connection manager outlives the threads
+    main_db = DataStorage(db_name=DB_NAME)
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    start = time.perf_counter()
+    for t in reader_threads + threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stop_reading.set()
+    for t in reader_threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"{writers * writes_per_thread} writes and {reads[0]} read rounds in {elapsed:.2f}s, errors: {errors}")
+    assert not errors
+    for worker in range(writers):
+        assert main_db.get_latest_stock_data(f"W{worker}")["info"] == {"n": writes_per_thread - 1}
+        assert len(main_db.get_ohlcv(f"coin{worker}", "5m")) == writes_per_thread // 2
+    stock_rows = main_db.connections.reader().execute("SELECT COUNT(*) FROM stock_data").fetchone()[0]
+    assert stock_rows == writers * writes_per_thread // 2
+    main_db.close()
+    _fresh_db()
+
+def test_write_behind_with_concurrent_producers():
+    """Many threads queueing into one write-behind buffer should land every snapshot exactly once."""
+    _fresh_db()
+    db = DataStorage(db_name=DB_NAME)
+    buffer = WriteBehindBuffer(db, flush_interval=0.05, max_pending=25).start()
+
+    def produce(worker):
+        for i in range(100):
+            buffer.save_stock_data(f"P{worker}-{i}", {"n": i}, HISTORY)
+
+    threads = [threading.Thread(target=produce, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    buffer.stop()
+
+    count = db.connections.reader().execute("SELECT COUNT(*) FROM stock_latest").fetchone()[0]
+    print(f"Write-behind stored {count} snapshots in {buffer.counters['flushes']} flushes")
+    assert count == 800
+    assert buffer.counters["flush_errors"] == 0
+    db.close()
+    _fresh_db()
+
+if __name__ == "__main__":
+    test_concurrent_writers_and_readers()
+    test_write_behind_with_concurrent_producers()
+    print("Data storage concurrency tests completed.")
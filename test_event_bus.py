@@ -0,0 +1,97 @@
+from event_bus import EventBus, sse_stream, topic_matches
+from strategy_executor import StrategyExecutor
+import json
+import threading
+
+def test_topic_filters():
+    assert topic_matches("prices.AAPL", ["prices"])
+    assert topic_matches("prices.AAPL", ["alerts", "prices.AAPL"])
+    assert not topic_matches("prices.AAPLX", ["prices.AAPL"])
+    assert not topic_matches("pricesx", ["prices"])
+    assert topic_matches("orders.BTC", None)
+
+    bus = EventBus()
+    prices = bus.subscribe(["prices"])
+    everything = bus.subscribe()
+    bus.publish("prices.AAPL", {"price": 150.0})
+    bus.publish("alerts.TSLA", {"type": "volume_anomaly"})
+    assert [e.topic for e in prices.get(timeout=0)] == ["prices.AAPL"]
+    assert [e.topic for e in everything.get(timeout=0)] == ["prices.AAPL", "alerts.TSLA"]
+
+    prices.close()
+    bus.publish("prices.MSFT", {})
+    assert bus.stats()["subscribers"] == 1
+
+def test_resume_from_last_event_id():
+    bus = EventBus(history_size=3)
+    ids = [bus.publish("alerts.BTC", {"n": n}).id for n in range(5)]
+
+    # Events 3..5 are still buffered
+    subscription = bus.subscribe(["alerts"], last_event_id=ids[2])
+    assert [e.data["n"] for e in subscription.get(timeout=0)] == [3, 4]
+    assert subscription.take_dropped() == 0
+
+    # Event 2 has left the ring buffer, so the client is told it missed one
+    subscription = bus.subscribe(last_event_id=ids[0])
+    assert [e.data["n"] for e in subscription.get(timeout=0)] == [2, 3, 4]
+    assert subscription.take_dropped() == 1
+
+def test_slow_subscriber_drops_oldest():
+    bus = EventBus()
+    slow = bus.subscribe(max_queue=2)
+    for n in range(5):
+        bus.publish("prices.ETH", {"n": n})
+    assert [e.data["n"] for e in slow.get(timeout=0)] == [3, 4]
+    assert slow.take_dropped() == 3
+    assert slow.take_dropped() == 0
+
+def test_sse_frames():
+    bus = EventBus()
+    subscription = bus.subscribe(max_queue=1)
+    stream = sse_stream(subscription, heartbeat=0.01)
+    assert next(stream).startswith("retry:")
+    assert next(stream) == ": keep-alive\n\n"
+
+    bus.publish("alerts.BTC", {"message": "spike"})
+    bus.publish("alerts.ETH", {"message": "dip"})
+    assert next(stream) == 'event: lagged\ndata: {"dropped":1}\n\n'
+    event_id = bus.stats()["last_event_id"]
+    assert next(stream) == f'id: {event_id}\nevent: alerts.ETH\ndata: {{"message":"dip"}}\n\n'
+
+    # Closing the generator (client disconnect) unsubscribes
+    stream.close()
+    assert bus.stats()["subscribers"] == 0
+
+def test_blocking_get_wakes_on_publish():
+    bus = EventBus()
+    subscription = bus.subscribe()
+    received = []
+    reader = threading.Thread(target=lambda: received.extend(subscription.get(timeout=5)))
+    reader.start()
+    bus.publish("orders.AAPL", {"side": "buy"})
+    reader.join(timeout=5)
+    assert [e.topic for e in received] == ["orders.AAPL"]
+
+def test_executor_publishes_orders():
+    bus = EventBus()
+    subscription = bus.subscribe(["orders"])
+
+    executor = StrategyExecutor(event_bus=bus)
+    result = executor.execute_signal({"symbol": "AAPL", "action": "buy", "quantity": 1, "price": 150.0})
+    assert result["success"]
+
+    events = subscription.get(timeout=0)
+    assert [e.topic for e in events] == ["orders.AAPL"]
+    assert json.loads(events[0].to_sse().split("data: ", 1)[1])["signal"]["symbol"] == "AAPL"
+
+    executor.close_position("AAPL")
+    assert [e.data["order"]["side"] for e in subscription.get(timeout=0)] == ["sell"]
+
+if __name__ == "__main__":
+    test_topic_filters()
+    test_resume_from_last_event_id()
+    test_slow_subscriber_drops_oldest()
+    test_sse_frames()
+    test_blocking_get_wakes_on_publish()
+    test_executor_publishes_orders()
+    print("Event bus tests completed.")
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+from history_cache import HistoryCache
+import math
+import os
+import pytest
+import shutil
+import tempfile
+import time
+
+START = 1756684800  # 2025-09-01 00:00 UTC
+
+def test_append_and_open():
+    root = tempfile.mkdtemp()
+    try:
+        cache = HistoryCache(root)
+        timestamps = [START + 60 * i for i in range(100)]
+        assert cache.append("AAPL", "1m", timestamps, [100.0 + i for i in range(100)], [1000.0] * 100) == 100
+
+        with cache.open("AAPL", "1m") as view:
+            assert len(view) == 100
+            assert view.timestamps[0] == START and view.timestamps[99] == START + 60 * 99
+            assert view["close"][99] == 199.0
+            assert sum(view["volume"]) == 100000.0
+
+        # Only rows at or after the start are exposed
+        with cache.open("AAPL", "1m", start=START + 60 * 90 + 1) as view:
+            assert len(view) == 9
+            assert view["close"][0] == 191.0
+
+        with cache.window("AAPL", "1m", 600, now=START + 60 * 99) as view:
+            assert len(view) == 11
+
+        with cache.open("MSFT", "1m") as view:
+            assert len(view) == 0
+        assert cache.symbols("1m") == ["AAPL"]
+        assert cache.intervals("AAPL") == ["1m"]
+        assert cache.intervals("MSFT") == []
+    finally:
+        shutil.rmtree(root)
+
+def test_append_only_updates():
+    """Older rows are ignored and a repeated last timestamp overwrites the bar in progress."""
+    root = tempfile.mkdtemp()
+    try:
+        cache = HistoryCache(root)
+        cache.append_bars("bitcoin", "5m", [(START, 1, 1, 1, 10.0, 5.0), (START + 300, 1, 1, 1, 11.0, None)])
+
+        written = cache.append_bars("bitcoin", "5m", [
+            (START, 1, 1, 1, 99.0, 99.0),         # already cached
+            (START + 300, 1, 1, 1, 12.0, 7.0),    # updates the last bar
+            (START + 600, 1, 1, 1, 13.0, 8.0),
+        ])
+        assert written == 2
+
+        with cache.open("bitcoin", "5m") as view:
+            assert list(view.timestamps) == [START, START + 300, START + 600]
+            assert list(view["close"]) == [10.0, 12.0, 13.0]
+            assert list(view["volume"]) == [5.0, 7.0, 8.0]
+
+        cache.append_bars("bitcoin", "5m", [(START + 900, 1, 1, 1, None, None)])
+        with cache.open("bitcoin", "5m", start=START + 900) as view:
+            assert math.isnan(view["close"][0]) and math.isnan(view["volume"][0])
+    finally:
+        shutil.rmtree(root)
+
+def test_collector_cache_feeds_trigger_checks():
+    """Bars the DataCollector caches are found by TriggerEngine at the interval they were written in."""
+    pytest.importorskip("requests")
+    from alert_system import AlertSystem
+    from data_collector import DataCollector
+    from event_bus import EventBus
+    from trigger_engine import TriggerEngine
+
+    root = tempfile.mkdtemp()
+    db_name = os.path.join(root, "test_wealthflow_trigger_cache.db")
+    try:
+        bus = EventBus()
+        collector = DataCollector(db_name, history_cache=os.path.join(root, "cache"), event_bus=bus)
+
+        # 20 daily stock bars ending today, the last one on heavy volume
+        today = datetime.now(timezone.utc).replace(hour=4, minute=0, second=0, microsecond=0)
+        days = [today - timedelta(days=n) for n in range(19, -1, -1)]
+        history = {
+            "Close": {str(day): 150.0 for day in days},
+            "Volume": {str(day): 1000.0 + n for n, day in enumerate(days[:-1])},
+        }
+        history["Volume"][str(days[-1])] = 50000.0
+        # A day of CoinGecko samples every 5 minutes
+        now_ms = int(time.time()) * 1000
+        samples = [now_ms - 300000 * n for n in range(287, -1, -1)]
+        market_chart = {"prices": [[ms, 60000.0] for ms in samples],
+                        "total_volumes": [[ms, 1e9] for ms in samples]}
+        collector._write_snapshots(stocks=[("AAPL", {}, history)],
+                                   cryptos=[("bitcoin", {"bitcoin": {"usd": 60000.0}}, market_chart)])
+        assert collector.history_cache.intervals("AAPL") == ["1d"]
+        assert collector.history_cache.intervals("bitcoin") == ["5m"]
+
+        engine = TriggerEngine(db=collector.db, history_cache=collector.history_cache,
+                               alert_system=AlertSystem(event_bus=bus), yf_api=collector.yf_api,
+                               cg_api=collector.cg_api)
+        assert engine._check_cached_history("AAPL")
+        assert engine._check_cached_history("bitcoin")
+        assert not engine._check_cached_history("MSFT")
+        assert [(a["type"], a["asset_name"]) for a in engine.alert_system.alert_history] == [("volume_anomaly", "AAPL")]
+        collector.db.close()
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    test_append_and_open()
+    test_append_only_updates()
+    test_collector_cache_feeds_trigger_checks()
+    print("History cache tests completed.")
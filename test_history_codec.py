@@ -0,0 +1,69 @@
+from history_codec import decode_history, encode_columns, encode_history, load_history, HistoryArrays
+import json
+from datetime import datetime, timedelta, timezone
+import math
+
+HISTORY = {
+    "Open": {"2025-09-01 00:00:00-04:00": 149.0, "2025-09-02 00:00:00-04:00": 150.0, "2025-09-03 00:00:00-04:00": 151.5},
+    "Close": {"2025-09-01 00:00:00-04:00": 150.0, "2025-09-02 00:00:00-04:00": float("nan"), "2025-09-03 00:00:00-04:00": 152.0},
+    "Volume": {"2025-09-01 00:00:00-04:00": 1000, "2025-09-02 00:00:00-04:00": 2000, "2025-09-03 00:00:00-04:00": 3000},
+}
+
+def test_round_trip():
+    for compression in ("raw", "zlib", "lz4"):
+        blob = encode_history(HISTORY, compression)
+        arrays = decode_history(blob)
+        assert isinstance(arrays, HistoryArrays)
+        assert len(arrays) == 3
+        assert list(arrays.timestamps) == [1756699200, 1756785600, 1756872000]
+        assert list(arrays["Open"]) == [149.0, 150.0, 151.5]
+        assert math.isnan(arrays["Close"][1])
+        assert list(arrays["Volume"]) == [1000.0, 2000.0, 3000.0]
+
+        # Keys come back as they were written, in the exchange's offset
+        history = load_history(blob)
+        assert list(history["Open"]) == list(HISTORY["Open"])
+        assert history["Close"]["2025-09-02 00:00:00-04:00"] is None
+        assert history["Volume"]["2025-09-03 00:00:00-04:00"] == 3000.0
+        print(f"{compression}: {len(blob)} bytes")
+
+def test_timestamp_offsets():
+    """Offsets are kept per row (across a DST change) and naive timestamps stay naive."""
+    history = {"Close": {"2025-11-01 00:00:00-04:00": 1.0, "2025-11-03 00:00:00-05:00": 2.0}}
+    assert list(load_history(encode_history(history))["Close"]) == list(history["Close"])
+    naive = {"Close": {"2025-09-01 00:00:00": 1.0, "2025-09-02 00:00:00": 2.0}}
+    assert load_history(encode_history(naive)) == naive
+    utc = {"Close": {"2025-09-01 00:00:00+00:00": 1.0}}
+    assert load_history(encode_history(utc)) == utc
+
+    # Blobs written before offsets were stored read back as UTC
+    blob = bytearray(encode_columns([1756699200], {"Close": [150.0]}, "raw"))
+    blob[4] = 1
+    del blob[-16:-8]
+    assert load_history(bytes(blob)) == {"Close": {"2025-09-01 04:00:00+00:00": 150.0}}
+    assert decode_history(bytes(blob)).offsets is None
+
+def test_smaller_than_json():
+    start = datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=-5)))
+    history = {
+        column: {str(start + timedelta(days=i)): 100.0 + i for i in range(365)}
+        for column in ("Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits")
+    }
+    as_json = json.dumps(history)
+    blob = encode_history(history, "zlib")
+    print(f"One year of daily bars: JSON {len(as_json)} bytes, packed {len(blob)} bytes")
+    assert len(blob) * 4 < len(as_json)
+
+def test_unpackable_histories():
+    """Histories that are not {column: {timestamp: number}} are left for the JSON path."""
+    assert encode_history({}) is None
+    assert encode_history({"2025-09-01": {"Open": 149.0, "Close": 150.0}}) is None
+    assert encode_history({"Close": {"2025-09-01": "n/a"}}) is None
+    assert load_history('{"a": {"b": 1}}') == {"a": {"b": 1}}
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_timestamp_offsets()
+    test_smaller_than_json()
+    test_unpackable_histories()
+    print("History codec tests completed.")
@@ -0,0 +1,104 @@
+from http_cache import CachedResponse, EndpointCache, not_modified
+from email.utils import formatdate
+import time
+
+def _renderer(bodies):
+    calls = []
+
+    def render():
+        calls.append(1)
+        return CachedResponse(bodies[min(len(calls), len(bodies)) - 1])
+    return render, calls
+
+def test_fresh_stale_and_expired():
+    cache = EndpointCache(default_ttl=0.05, default_stale_ttl=0.1)
+    render, calls = _renderer([b'{"v": 1}', b'{"v": 2}', b'{"v": 3}'])
+    refreshes = []
+    key = ("portfolio", (), ())
+
+    entry, state = cache.get_or_render(key, render, refresh=refreshes.append)
+    assert (state, entry.body) == ("MISS", b'{"v": 1}')
+    assert cache.get_or_render(key, render, refresh=refreshes.append)[1] == "HIT"
+
+    # Past the TTL the stale copy is served and a single refresh is scheduled
+    time.sleep(0.06)
+    entry, state = cache.get_or_render(key, render, refresh=refreshes.append)
+    assert (state, entry.body) == ("STALE", b'{"v": 1}')
+    assert cache.get_or_render(key, render, refresh=refreshes.append)[1] == "STALE"
+    assert len(refreshes) == 1
+    refreshes[0]()
+    entry, state = cache.get_or_render(key, render, refresh=refreshes.append)
+    assert (state, entry.body) == ("HIT", b'{"v": 2}')
+
+    # Past the stale window it is rendered in the request again
+    time.sleep(0.16)
+    entry, state = cache.get_or_render(key, render, refresh=refreshes.append)
+    assert (state, entry.body) == ("MISS", b'{"v": 3}')
+    assert len(calls) == 3
+    print(f"Endpoint cache stats: {cache.stats()}")
+
+def test_invalidation_and_errors():
+    cache = EndpointCache(default_ttl=60)
+    render, calls = _renderer([b"a", b"b"])
+    cache.get_or_render(("strategies", (), ()), render)
+    cache.invalidate("strategies")
+    entry, state = cache.get_or_render(("strategies", (), ()), render)
+    assert (state, entry.body) == ("MISS", b"b")
+
+    # Error responses are returned but never cached
+    failing = lambda: CachedResponse(b'{"success": false}', 500, cacheable=False)
+    assert cache.get_or_render(("alerts", (), ()), failing)[0].status == 500
+    assert cache.get_or_render(("alerts", (), ()), failing)[1] == "MISS"
+
+def test_refresh_discarded_after_invalidation():
+    """A refresh that started before a POST invalidated the endpoint must not store its result."""
+    cache = EndpointCache(default_ttl=0.01, default_stale_ttl=60)
+    render, _ = _renderer([b"old", b"refreshed", b"new"])
+    refreshes = []
+    key = ("portfolio", (), ())
+    cache.get_or_render(key, render)
+    time.sleep(0.02)
+    cache.get_or_render(key, render, refresh=refreshes.append)
+    cache.invalidate("portfolio")
+    refreshes[0]()
+    assert cache.get_or_render(key, render)[0].body == b"new"
+
+def test_conditional_requests():
+    entry = CachedResponse(b'{"data": []}')
+    assert not_modified(entry, entry.etag, None)
+    assert not_modified(entry, f'"other", W/{entry.etag}', None)
+    assert not_modified(entry, "*", None)
+    assert not not_modified(entry, '"other"', None)
+    assert not_modified(entry, None, formatdate(entry.last_modified + 1, usegmt=True))
+    assert not not_modified(entry, None, formatdate(entry.last_modified - 10, usegmt=True))
+    assert not not_modified(entry, None, "not a date")
+    # If-None-Match takes precedence over If-Modified-Since
+    assert not not_modified(entry, '"other"', formatdate(entry.last_modified + 1, usegmt=True))
+
+def test_key_locks_do_not_outlive_renders():
+    """Render locks are dropped once no render holds them, whatever the response."""
+    cache = EndpointCache(default_ttl=0.01, default_stale_ttl=60)
+    render, _ = _renderer([b"a", b"b"])
+    failing = lambda: CachedResponse(b'{"success": false}', 500, cacheable=False)
+    for i in range(100):
+        cache.get_or_render(("alerts", (("page", str(i)),), ()), failing)
+    cache.get_or_render(("portfolio", (), ()), render)
+    cache.invalidate("portfolio")
+    assert cache._key_locks == {}
+
+    # A scheduled refresh holds its key's lock until it has run
+    refreshes = []
+    cache.get_or_render(("portfolio", (), ()), render)
+    time.sleep(0.02)
+    assert cache.get_or_render(("portfolio", (), ()), render, refresh=refreshes.append)[1] == "STALE"
+    assert list(cache._key_locks) == [("portfolio", (), ())]
+    refreshes[0]()
+    assert cache._key_locks == {}
+
+if __name__ == "__main__":
+    test_fresh_stale_and_expired()
+    test_invalidation_and_errors()
+    test_refresh_discarded_after_invalidation()
+    test_conditional_requests()
+    test_key_locks_do_not_outlive_renders()
+    print("HTTP cache tests completed.")
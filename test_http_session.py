@@ -0,0 +1,76 @@
+from unittest import mock
+import http_session
+import requests
+
+def _adapter_config(adapter):
+    return adapter._pool_connections, adapter._pool_maxsize, adapter._pool_block
+
+def test_shared_session_per_host():
+    http_session.reset_session()
+    try:
+        session = http_session.get_session()
+        assert http_session.get_session() is session
+
+        # Each configured host keeps one adapter (and so one keep-alive pool) across requests
+        coingecko = session.get_adapter("https://api.coingecko.com/api/v3/simple/price")
+        assert session.get_adapter("https://api.coingecko.com/api/v3/coins/list") is coingecko
+        pool = coingecko.poolmanager.connection_from_url("https://api.coingecko.com/api/v3/ping")
+        assert coingecko.poolmanager.connection_from_url("https://api.coingecko.com/api/v3/ping") is pool
+
+        # Hosts without their own configuration share the catch-all adapter
+        default = session.get_adapter("https://example.com/")
+        assert default is session.get_adapter("https://example.org/")
+        assert default is not coingecko
+    finally:
+        http_session.reset_session()
+
+def test_host_settings():
+    http_session.reset_session()
+    try:
+        session = http_session.get_session()
+        assert _adapter_config(session.get_adapter("https://api.coingecko.com/")) == (1, 10, False)
+        assert _adapter_config(session.get_adapter("https://www.alphavantage.co/")) == (1, 5, False)
+        assert _adapter_config(session.get_adapter("https://example.com/")) == (4, 10, False)
+
+        http_session.configure_host("example.com", pool_maxsize=2, timeout=(1, 2), pool_block=True)
+        assert _adapter_config(session.get_adapter("https://example.com/quote")) == (4, 2, True)
+        assert _adapter_config(session.get_adapter("http://example.com/quote")) == (4, 2, True)
+        # Longest prefix wins: other hosts keep the defaults
+        assert _adapter_config(session.get_adapter("https://example.org/")) == (4, 10, False)
+
+        # The host's timeout applies unless the caller passes one
+        with mock.patch.object(requests.Session, "request") as request:
+            session.get("https://example.com/quote")
+            assert request.call_args.kwargs["timeout"] == (1, 2)
+            session.get("https://api.coingecko.com/api/v3/ping")
+            assert request.call_args.kwargs["timeout"] == (3.05, 10)
+            session.get("https://example.org/")
+            assert request.call_args.kwargs["timeout"] == (3.05, 15)
+            session.get("https://example.com/quote", timeout=30)
+            assert request.call_args.kwargs["timeout"] == 30
+    finally:
+        http_session.reset_session()
+
+def test_reset_session():
+    http_session.reset_session()
+    session = http_session.get_session()
+    http_session.configure_host("example.com", pool_maxsize=2)
+    with mock.patch.object(session, "close") as close:
+        http_session.reset_session()
+        close.assert_called_once()
+    fresh = http_session.get_session()
+    assert fresh is not session
+    # Configuration does not carry over to the new session
+    assert "example.com" not in fresh.host_configs
+
+    replacement = http_session.PooledSession(host_configs={})
+    http_session.reset_session(replacement)
+    assert http_session.get_session() is replacement
+    assert replacement.host_configs == {}
+    http_session.reset_session()
+
+if __name__ == "__main__":
+    test_shared_session_per_host()
+    test_host_settings()
+    test_reset_session()
+    print("HTTP session tests completed.")
@@ -0,0 +1,57 @@
+from pagination import decode_cursor, encode_cursor, parse_fields, parse_flag, parse_limit, parse_since, project
+from datetime import datetime, timezone
+
+def test_cursors():
+    for value in (42, "AAPL", [3, "x"]):
+        assert decode_cursor(encode_cursor(value)) == value
+    assert decode_cursor(None) is None
+    for bad in ("not-a-cursor!", "e30"[:-1]):
+        try:
+            decode_cursor(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"expected ValueError for {bad!r}")
+
+def test_query_arguments():
+    assert parse_limit(None) == 100
+    assert parse_limit("25") == 25
+    assert parse_limit("100000") == 500
+    for bad in ("0", "ten"):
+        try:
+            parse_limit(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"expected ValueError for {bad!r}")
+
+    assert parse_fields("id, type,,message") == ["id", "type", "message"]
+    assert parse_fields("") is None
+    assert parse_flag("1") and parse_flag("true") and parse_flag("")
+    assert not parse_flag(None) and not parse_flag("0")
+
+    alert = {"id": "a", "type": "pump_dump", "data": {"big": True}}
+    assert project(alert, ["id", "missing"]) == {"id": "a"}
+    assert project(alert, None) is alert
+
+def test_since():
+    now = datetime(2025, 9, 1, 12, 0, 0)
+    assert parse_since("2h", now=now) == datetime(2025, 9, 1, 10, 0, 0)
+    assert parse_since("15m", now=now) == datetime(2025, 9, 1, 11, 45, 0)
+    assert parse_since("2025-09-01T08:30:00") == datetime(2025, 9, 1, 8, 30)
+    utc = datetime(2025, 9, 1, 8, 30, tzinfo=timezone.utc)
+    assert parse_since("2025-09-01T08:30:00Z") == utc.astimezone().replace(tzinfo=None)
+    assert parse_since(str(utc.timestamp())) == utc.astimezone().replace(tzinfo=None)
+    assert parse_since(None) is None
+    try:
+        parse_since("yesterday")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+if __name__ == "__main__":
+    test_cursors()
+    test_query_arguments()
+    test_since()
+    print("Pagination tests completed.")
@@ -0,0 +1,95 @@
+from data_storage import DataStorage
+from storage_backends import create_saas_tables
+import parquet_io
+import os
+import pytest
+import shutil
+import sqlite3
+import tempfile
+
+START = 1756684800  # 2025-09-01 00:00 UTC
+
+def _bars_db(path):
+    db = DataStorage(db_name=path)
+    rows = [
+        (symbol, "1d", START + day * 86400, 1.0, 2.0, 0.5, 100.0 + day, 1000.0 * day)
+        for symbol in ("AAPL", "MSFT", "1234")
+        for day in range(60)
+    ]
+    with db.connections.write() as conn:
+        conn.executemany("INSERT INTO ohlcv_bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    db.close()
+
+def test_export_import_round_trip():
+    pytest.importorskip("pyarrow")
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, "source.db")
+        target = os.path.join(directory, "target.db")
+        root = os.path.join(directory, "export")
+        _bars_db(source)
+
+        assert parquet_io.export_table(source, root) == 180
+        assert os.path.isdir(os.path.join(root, "ohlcv_bars", "symbol=AAPL", "date=2025-10"))
+
+        # Column pruning plus partition and row filters
+        table = parquet_io.read_table(root, columns=["ts", "close"], symbols=["AAPL"],
+                                      start=START + 35 * 86400, end=START + 39 * 86400)
+        assert table.column_names == ["ts", "close"]
+        assert table.column("close").to_pylist() == [135.0, 136.0, 137.0, 138.0, 139.0]
+
+        # Numeric tickers stay strings
+        assert parquet_io.read_table(root, symbols=["1234"]).num_rows == 60
+
+        assert parquet_io.import_table(target, root) == 180
+        # Existing rows are not duplicated
+        assert parquet_io.import_table(target, root) == 0
+
+        db = DataStorage(db_name=target)
+        bars = db.get_ohlcv("MSFT", "1d", limit=5)
+        assert len(bars) == 5
+        db.close()
+    finally:
+        shutil.rmtree(directory)
+
+def test_signals_import_into_new_database():
+    """Signals get fresh ids in the target, so they never collide with the ones it has."""
+    pytest.importorskip("pyarrow")
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, "source.db")
+        target = os.path.join(directory, "target.db")
+        root = os.path.join(directory, "export")
+        conn = sqlite3.connect(source)
+        create_saas_tables(conn)
+        conn.executemany("INSERT INTO signals (type, symbol, price, reason, timestamp) VALUES (?, ?, ?, ?, ?)",
+                         [("BUY", "AAPL", 150.0 + i, "rsi", f"2025-09-0{i + 1} 10:00:00") for i in range(3)])
+        conn.commit()
+        conn.close()
+        assert parquet_io.export_table(source, root, parquet_io.SIGNALS) == 3
+
+        # A fresh database: the table is created on import
+        assert parquet_io.import_table(target, root, parquet_io.SIGNALS) == 3
+
+        # A database with signals of its own under the same ids
+        other = os.path.join(directory, "other.db")
+        conn = sqlite3.connect(other)
+        create_saas_tables(conn)
+        conn.execute("INSERT INTO signals (type, symbol, price, timestamp) VALUES ('SELL', 'TSLA', 200.0, "
+                     "'2025-09-01 09:00:00')")
+        conn.commit()
+        conn.close()
+        assert parquet_io.import_table(other, root, parquet_io.SIGNALS) == 3
+        assert parquet_io.import_table(other, root, parquet_io.SIGNALS) == 0
+        conn = sqlite3.connect(other)
+        assert conn.execute("SELECT id, symbol FROM signals ORDER BY id").fetchall() == [
+            (1, "TSLA"), (2, "AAPL"), (3, "AAPL"), (4, "AAPL")
+        ]
+        conn.close()
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    test_export_import_round_trip()
+    test_signals_import_into_new_database()
+    print("Parquet export/import tests completed.")
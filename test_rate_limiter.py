@@ -0,0 +1,87 @@
+from rate_limiter import ProviderLimiter, BackoffPolicy, parse_retry_after
+import time
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+def test_token_bucket():
+    """Requests beyond the burst capacity should wait for tokens."""
+    limiter = ProviderLimiter("test", rate=20.0, capacity=2)
+
+    start = time.perf_counter()
+    for _ in range(4):
+        limiter.acquire()
+    elapsed = time.perf_counter() - start
+
+    stats = limiter.stats()
+    print(f"4 requests at 20/s with burst 2 took {elapsed:.3f}s: {stats}")
+    assert elapsed >= 0.09  # two requests had to wait ~50ms each
+    assert stats["requests"] == 4
+    assert stats["throttled"] == 2
+
+def test_retry_after_is_honored():
+    """A 429 with Retry-After should be retried after at least that delay."""
+    limiter = ProviderLimiter("test", rate=100.0, capacity=5,
+                              policy=BackoffPolicy(max_retries=3, base_delay=0.01, max_delay=1.0))
+    responses = [FakeResponse(429, {"Retry-After": "0.2"}), FakeResponse(200)]
+
+    start = time.perf_counter()
+    response = limiter.request(lambda: responses.pop(0))
+    elapsed = time.perf_counter() - start
+
+    stats = limiter.stats()
+    print(f"Retried after {elapsed:.3f}s: {stats}")
+    assert response.status_code == 200
+    assert elapsed >= 0.2
+    assert stats["rate_limited"] == 1
+    assert stats["retried"] == 1
+
+def test_gives_up_after_max_retries():
+    """Persistent throttling should return the last response after max_retries."""
+    limiter = ProviderLimiter("test", rate=1000.0, capacity=10,
+                              policy=BackoffPolicy(max_retries=2, base_delay=0.001, max_delay=0.01))
+    calls = []
+
+    def send():
+        calls.append(1)
+        return FakeResponse(429)
+
+    response = limiter.request(send)
+    stats = limiter.stats()
+    print(f"Calls made: {len(calls)}, stats: {stats}")
+    assert response.status_code == 429
+    assert len(calls) == 3
+    assert stats["failed"] == 1
+
+def test_call_retries_retryable_errors():
+    """Non-HTTP calls should be retried only for retryable errors."""
+    limiter = ProviderLimiter("test", rate=1000.0, capacity=10,
+                              policy=BackoffPolicy(max_retries=3, base_delay=0.001, max_delay=0.01))
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("Too Many Requests")
+        return "ok"
+
+    result = limiter.call(flaky, lambda e: "Too Many Requests" in str(e))
+    print(f"Result after {len(attempts)} attempts: {result}")
+    assert result == "ok"
+    assert limiter.stats()["retried"] == 2
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # date in the past
+    print("Retry-After parsing works.")
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_retry_after_is_honored()
+    test_gives_up_after_max_retries()
+    test_call_retries_retryable_errors()
+    test_parse_retry_after()
+    print("Rate limiter tests completed.")
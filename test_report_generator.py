@@ -1,5 +1,7 @@
 from report_generator import ReportGenerator, NewsAggregator, ReportScheduler
 import json
+import threading
+import time
 
 def test_news_aggregator():
     """Test the news aggregator functionality."""
@@ -76,6 +78,55 @@ def test_report_generator():
     
     return report_data
 
+def test_report_snapshot():
+    """The report is built once and shared until its inputs change."""
+    report_generator = ReportGenerator()
+    builds = []
+    
+    def generate():
+        builds.append(1)
+        return {"date": "2025-09-01", "build": len(builds)}
+    report_generator.generate_daily_report = generate
+    
+    first = report_generator.get_report_snapshot()
+    assert first.version == 1
+    assert report_generator.get_report_snapshot() is first
+    assert len(builds) == 1
+    
+    # Changing the watchlist rebuilds in the background; the old report is served meanwhile
+    report_generator.monitored_stocks = report_generator.monitored_stocks + ["AMD"]
+    assert report_generator.get_report_snapshot() is first
+    for _ in range(50):
+        if report_generator._snapshot is not first:
+            break
+        time.sleep(0.05)
+    assert report_generator.get_report_snapshot().version == 2
+    assert report_generator.get_report_snapshot().data["build"] == 2
+    print(f"Report snapshot built {len(builds)} times")
+
+def test_report_snapshot_without_waiting():
+    """Request handlers get None while the first snapshot is built in the background."""
+    report_generator = ReportGenerator()
+    started = threading.Event()
+    release = threading.Event()
+    
+    def generate():
+        started.set()
+        release.wait(5)
+        return {"date": "2025-09-01"}
+    report_generator.generate_daily_report = generate
+    
+    assert report_generator.get_report_snapshot(wait=False) is None
+    assert started.wait(5)
+    assert report_generator.is_building()
+    assert report_generator.get_report_snapshot(wait=False) is None
+    release.set()
+    for _ in range(50):
+        if not report_generator.is_building():
+            break
+        time.sleep(0.05)
+    assert report_generator.get_report_snapshot(wait=False).version == 1
+
 def test_report_templates():
     """Test report template rendering."""
     print("\n" + "="*50)
@@ -220,6 +271,8 @@ def test_integration():
 if __name__ == "__main__":
     test_news_aggregator()
     test_report_generator()
+    test_report_snapshot()
+    test_report_snapshot_without_waiting()
     test_report_templates()
     test_report_scheduler()
     test_integration()
@@ -0,0 +1,145 @@
+from response_cache import ResponseCache, make_key, is_cacheable
+import threading
+import time
+
+def test_ttl_and_hits():
+    """Values are served from cache until their TTL expires."""
+    cache = ResponseCache(default_ttl=0.1)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"bitcoin": {"usd": 50000}}
+
+    key = make_key("coingecko", "simple/price", {"ids": "bitcoin", "vs_currencies": "usd"})
+    assert cache.get_or_load(key, loader) == {"bitcoin": {"usd": 50000}}
+    assert cache.get_or_load(key, loader) == {"bitcoin": {"usd": 50000}}
+    assert len(calls) == 1
+
+    time.sleep(0.15)
+    cache.get_or_load(key, loader)
+    stats = cache.stats()
+    print(f"Cache stats: {stats}")
+    assert len(calls) == 2
+    assert stats["hits"] == 1
+    assert stats["expirations"] == 1
+
+def test_error_results_not_cached():
+    cache = ResponseCache()
+    key = make_key("coingecko", "simple/price", {"ids": "bitcoin"})
+    cache.get_or_load(key, lambda: {"error": "429 Too Many Requests"}, cache_if=is_cacheable)
+    assert cache.get(key) is None
+    print("Error results are not cached.")
+
+def test_lru_eviction_and_memory_cap():
+    """Least recently used entries are evicted by count and by size."""
+    cache = ResponseCache(max_entries=3)
+    for i in range(3):
+        cache.set(("k", i), i)
+    cache.get(("k", 0))  # 0 becomes most recently used
+    cache.set(("k", 3), 3)
+    assert cache.get(("k", 1)) is None
+    assert cache.get(("k", 0)) == 0
+
+    small = ResponseCache(max_bytes=20000)
+    for i in range(10):
+        small.set(("blob", i), "x" * 5000)
+    stats = small.stats()
+    print(f"Memory-capped cache stats: {stats}")
+    assert stats["bytes"] <= 20000
+    assert stats["evictions"] > 0
+
+def test_single_flight():
+    """Concurrent misses on one key make a single upstream call."""
+    cache = ResponseCache()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"prices": [[0, 1.0]]}
+
+    key = make_key("coingecko", "market_chart", {"id": "bitcoin", "days": "1"})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load(key, slow_loader)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    print(f"Upstream calls: {len(calls)}, stats: {stats}")
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert stats["coalesced"] == 7
+    # Coalesced callers each get their own copy
+    assert len({id(result) for result in results}) == 8
+
+def test_failing_cache_predicate_releases_waiters():
+    """A cache_if that raises fails the load for every waiter instead of hanging the key."""
+    cache = ResponseCache()
+    key = make_key("alphavantage", "query", {"symbol": "AAPL"})
+    started = threading.Event()
+
+    def slow_loader():
+        started.set()
+        time.sleep(0.2)
+        return None
+
+    def predicate(body):
+        return "Note" not in body  # TypeError on a null body
+
+    errors = []
+
+    def load():
+        try:
+            cache.get_or_load(key, slow_loader, cache_if=predicate)
+        except TypeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=load)
+    leader.start()
+    started.wait(timeout=5)
+    follower = threading.Thread(target=load)
+    follower.start()
+    leader.join(timeout=5)
+    follower.join(timeout=5)
+    assert not leader.is_alive() and not follower.is_alive()
+    assert len(errors) == 2
+    assert cache.stats()["load_errors"] == 1
+
+    # The key is usable again afterwards
+    assert cache.get_or_load(key, lambda: {"price": 1.0}, cache_if=predicate) == {"price": 1.0}
+
+def test_values_are_copies():
+    """Callers that modify a returned value do not change what the cache holds."""
+    cache = ResponseCache()
+    original = {"prices": [[0, 1.0]]}
+    cache.set("k", original)
+    original["prices"].append([1, 2.0])
+    assert cache.get("k") == {"prices": [[0, 1.0]]}
+
+    first = cache.get("k")
+    first["prices"][0][1] = 99.0
+    first["extra"] = True
+    assert cache.get("k") == {"prices": [[0, 1.0]]}
+
+    loaded = cache.get_or_load("m", lambda: {"usd": 1.0})
+    loaded["usd"] = 2.0
+    hit = cache.get_or_load("m", lambda: {"usd": 3.0})
+    assert hit == {"usd": 1.0}
+    assert hit is not cache.get_or_load("m", lambda: None)
+
+def test_make_key_is_order_independent():
+    assert make_key("p", "e", {"a": 1, "b": [1, 2]}) == make_key("p", "e", {"b": [1, 2], "a": 1})
+
+if __name__ == "__main__":
+    test_ttl_and_hits()
+    test_error_results_not_cached()
+    test_lru_eviction_and_memory_cap()
+    test_single_flight()
+    test_failing_cache_predicate_releases_waiters()
+    test_values_are_copies()
+    test_make_key_is_order_independent()
+    print("Response cache tests completed.")
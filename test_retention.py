@@ -0,0 +1,113 @@
+from data_storage import DataStorage
+from datetime import datetime, timedelta
+from retention import RetentionManager, RawTable, SAAS_MARKET_TICKS
+import os
+import sqlite3
+import time
+
+DB_NAME = "test_wealthflow_retention.db"
+SAAS_DB_NAME = "test_wealthflow_retention_saas.db"
+
+def _remove(path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def test_rollups_and_pruning():
+    _remove(DB_NAME)
+    db = DataStorage(db_name=DB_NAME)
+    # Two hours of 5m crypto bars, as written by the collector from CoinGecko charts
+    start = int(time.time()) // 3600 * 3600 - 3 * 3600
+    market_chart = {"prices": [[(start + i * 300) * 1000, 100.0 + i] for i in range(24)]}
+    db.save_crypto_data("bitcoin", {"bitcoin": {"usd": 123.0}}, market_chart, interval="5m")
+
+    now = start + 3 * 3600
+    manager = RetentionManager(DB_NAME, rollup_chunk_buckets=1,
+                               retention={"5m": timedelta(hours=1), "raw": timedelta(days=7)})
+    summary = manager.run(now=now)
+    print("First run:", summary)
+
+    hourly = db.get_ohlcv("bitcoin", "1h")
+    assert [(bar["open"], bar["high"], bar["low"], bar["close"]) for bar in hourly] == [
+        (100.0, 111.0, 100.0, 111.0), (112.0, 123.0, 112.0, 123.0)
+    ]
+    # Bars older than an hour are gone at 5m but kept at coarser resolutions
+    assert all(bar["ts"] >= now - 3600 for bar in db.get_ohlcv("bitcoin", "5m"))
+    assert summary["bars_pruned"] == 24
+
+    # The crypto snapshot was rolled into a 1m tick bar, then kept (it is recent)
+    assert len(db.get_ohlcv("bitcoin", "1m")) == 1
+    assert summary["rows_pruned"] == 0
+
+    # Later runs only pick up new work
+    assert not any(manager.run(now=now).values())
+
+    # Far in the future raw snapshots expire; the daily bar survives
+    summary = manager.run(now=now + 30 * 86400)
+    print("Later run:", summary)
+    assert summary["rows_pruned"] == 1
+    assert len(db.get_ohlcv("bitcoin", "1d")) >= 1
+    assert db.get_latest_crypto_data("bitcoin") is not None
+    manager.close()
+    db.close()
+    _remove(DB_NAME)
+
+def test_saas_market_ticks():
+    _remove(SAAS_DB_NAME)
+    conn = sqlite3.connect(SAAS_DB_NAME)
+    conn.execute("""CREATE TABLE market_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT NOT NULL, price REAL NOT NULL,
+            volume INTEGER NOT NULL, rsi REAL NOT NULL, volume_avg_30min INTEGER NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+    base = datetime(2025, 9, 1, 10, 0, 0)
+    for i, price in enumerate([10.0, 12.0, 9.0, 11.0]):
+        conn.execute("INSERT INTO market_data (symbol, price, volume, rsi, volume_avg_30min, timestamp) "
+                     "VALUES (?, ?, ?, 50, 0, ?)", ("AAPL", price, 100 + i, str(base + timedelta(seconds=15 * i))))
+    conn.commit()
+    conn.close()
+
+    # Small tick batches so the minute is built across several transactions
+    manager = RetentionManager(SAAS_DB_NAME, raw_tables=[RawTable("market_data", tick_source=SAAS_MARKET_TICKS)],
+                               tick_batch_size=1, vacuum_interval=timedelta(days=1))
+    summary = manager.run(now=(base + timedelta(days=10)).timestamp())
+    print("SaaS run:", summary)
+    bars = manager.connections.reader().execute(
+        "SELECT interval, open, high, low, close, volume FROM ohlcv_bars WHERE symbol = 'AAPL' ORDER BY ts, interval"
+    ).fetchall()
+    # The 1m bar was rolled up and then pruned after its 7 day window
+    assert bars == [("1d", 10.0, 12.0, 9.0, 11.0, 103.0), ("1h", 10.0, 12.0, 9.0, 11.0, 103.0),
+                    ("5m", 10.0, 12.0, 9.0, 11.0, 103.0)]
+    assert summary["ticks_rolled"] == 4
+    assert summary["rows_pruned"] == 4
+    assert summary["vacuums"] == 1
+    manager.close()
+    _remove(SAAS_DB_NAME)
+
+def test_raw_pruning_in_batches():
+    """Expired stock snapshots go in primary key batches; newer ones are kept."""
+    _remove(DB_NAME)
+    db = DataStorage(db_name=DB_NAME)
+    old = (datetime.now() - timedelta(days=30)).isoformat()
+    with db.connections.write() as conn:
+        conn.executemany("INSERT INTO stock_data (ticker, timestamp, info, history) VALUES (?, ?, '{}', '{}')",
+                         [(f"OLD{i}", old) for i in range(25)])
+    db.save_stock_data("NEW", {}, {})
+
+    manager = RetentionManager(DB_NAME, delete_batch_size=10, retention={"raw": timedelta(days=7)})
+    assert manager._prune_raw(manager.raw_tables[0], time.time())
+    assert manager.counters["rows_pruned"] == 10
+    summary = manager.run()
+    assert summary["rows_pruned"] == 15
+    remaining = manager.connections.reader().execute("SELECT ticker FROM stock_data").fetchall()
+    assert remaining == [("NEW",)]
+    # Nothing expired: the walk stops at the first row
+    assert not manager._prune_raw(manager.raw_tables[0], time.time())
+    manager.close()
+    db.close()
+    _remove(DB_NAME)
+
+if __name__ == "__main__":
+    test_rollups_and_pruning()
+    test_saas_market_ticks()
+    test_raw_pruning_in_batches()
+    print("Retention tests completed.")
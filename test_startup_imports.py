@@ -0,0 +1,39 @@
+from bench_startup import HEAVY_MODULES, parse_importtime
+import subprocess
+import sys
+
+def _heavy_modules_after_import(module):
+    """Heavy third-party packages loaded by importing a module in a fresh interpreter."""
+    script = f"import sys, {module}; print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return [name for name in result.stdout.strip().split(",") if name]
+
+def test_sentiment_analyzer_defers_openai():
+    assert _heavy_modules_after_import("sentiment_analyzer") == []
+
+def test_social_crawler_defers_praw():
+    assert _heavy_modules_after_import("social_crawler") == []
+
+def test_api_connectors_defer_yfinance_and_pandas():
+    assert _heavy_modules_after_import("api_connectors") == []
+
+def test_report_generator_defers_feeds_templates_and_scheduling():
+    assert _heavy_modules_after_import("report_generator") == []
+
+def test_parse_importtime():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   _io",
+        "import time:      2500 |       4000 | event_bus",
+        "some other warning",
+    ])
+    assert parse_importtime(stderr) == [("_io", 120, 120), ("event_bus", 2500, 4000)]
+
+if __name__ == "__main__":
+    test_sentiment_analyzer_defers_openai()
+    test_social_crawler_defers_praw()
+    test_api_connectors_defer_yfinance_and_pandas()
+    test_report_generator_defers_feeds_templates_and_scheduling()
+    test_parse_importtime()
+    print("Startup import tests completed.")
@@ -0,0 +1,97 @@
+from storage_backends import BACKENDS, open_backend, duckdb
+from datetime import datetime
+import os
+import shutil
+import tempfile
+
+START = 1756684800  # 2025-09-01 00:00 UTC
+
+HISTORY = {
+    "Open": {"2025-09-01 00:00:00-04:00": 149.0, "2025-09-02 00:00:00-04:00": 150.0},
+    "Close": {"2025-09-01 00:00:00-04:00": 150.0, "2025-09-02 00:00:00-04:00": 151.0},
+    "Volume": {"2025-09-01 00:00:00-04:00": 1000, "2025-09-02 00:00:00-04:00": 2000},
+}
+
+def _available_backends():
+    # DuckDB is optional
+    return [kind for kind in BACKENDS if kind != "duckdb" or duckdb is not None]
+
+def check_backend(backend):
+    """Conformance checks every StorageBackend must pass."""
+    # Snapshots and the bars derived from them
+    assert backend.save_snapshots(
+        stocks=[("AAPL", {"symbol": "AAPL"}, HISTORY)],
+        cryptos=[("bitcoin", {"bitcoin": {"usd": 45000.0}}, {"prices": [[START * 1000, 45000.0]], "total_volumes": []})]
+    ) == 2
+    latest = backend.get_latest_stock_data("AAPL")
+    assert latest["info"] == {"symbol": "AAPL"}
+    assert latest["history"]["Close"]["2025-09-02 00:00:00-04:00"] == 151.0
+    assert backend.get_latest_crypto_data("bitcoin")["price"] == {"bitcoin": {"usd": 45000.0}}
+    assert backend.get_latest_stock_data("MSFT") is None
+    assert [bar["close"] for bar in backend.get_ohlcv("AAPL", "1d")] == [150.0, 151.0]
+
+    # Bars are replaced by key
+    backend.save_bars("ETH", "1h", [(START, 1.0, 2.0, 0.5, 1.5, 10.0), (START + 3600, 1.5, 2.5, 1.0, 2.0, 20.0)])
+    backend.save_bars("ETH", "1h", [(START + 3600, 1.5, 2.5, 1.0, 2.2, 25.0)])
+    bars = backend.get_ohlcv("ETH", "1h")
+    assert [bar["close"] for bar in bars] == [1.5, 2.2]
+    assert backend.get_ohlcv("ETH", "1h", start=START + 1, limit=5)[0]["volume"] == 25.0
+
+    # Users, affiliates and commissions
+    assert backend.count_users() == 0
+    backend.add_affiliates([("AFF001", "Ana", 0.2, 0.0, 0), ("AFF002", "Rui", 0.5, 0.0, 0)])
+    backend.add_users([
+        ("a@x.com", "VIP", "AFF001", "1"), ("b@x.com", "VIP", "AFF002", None), ("c@x.com", "BASIC", None, None)
+    ])
+    assert backend.count_users() == 3
+    assert [row[0] for row in backend.get_users_by_package("VIP")] == ["a@x.com", "b@x.com"]
+    assert backend.get_commission_rates(["AFF001", "AFF002", "NOPE", None]) == {"AFF001": 0.2, "AFF002": 0.5}
+
+    assert backend.record_commissions([
+        ("AFF001", "a@x.com", "OURO", 1.0), ("AFF001", "a@x.com", "PRATA", 0.4), ("AFF002", "b@x.com", "OURO", 2.5)
+    ]) == 3
+    stats = {row["code"]: row for row in backend.affiliate_stats()}
+    assert stats["AFF001"]["users_referred"] == 1
+    assert stats["AFF001"]["total_commissions"] == 2
+    assert abs(stats["AFF001"]["total_earned"] - 1.4) < 1e-9
+    assert abs(stats["AFF002"]["commission_amount"] - 2.5) < 1e-9
+    assert backend.affiliate_stats(since="2999-01-01")[0]["total_commissions"] == 0
+
+    breakdown = backend.commission_breakdown()
+    assert [(row["affiliate_code"], row["signal_type"], row["commissions"]) for row in breakdown] == [
+        ("AFF001", "OURO", 1), ("AFF001", "PRATA", 1), ("AFF002", "OURO", 1)
+    ]
+
+    # Signals and market ticks
+    now = datetime(2025, 9, 1, 12, 0, 0)
+    backend.save_signals([("OURO", "BTC", 45000.0, "Volume spike", 5.0, now),
+                          ("BRONZE", "ETH", 3000.0, "RSI", 0.5, datetime(2025, 9, 1, 13, 0, 0))])
+    signals = backend.get_signals()
+    assert [signal["symbol"] for signal in signals] == ["ETH", "BTC"]
+    assert signals[1]["timestamp"] == "2025-09-01 12:00:00"
+    assert len(backend.get_signals(since=datetime(2025, 9, 1, 12, 30))) == 1
+    assert backend.save_market_data([("BTC", 45000.0, 1000, 55.0, 900, now)]) == 1
+
+def test_backends_conformance():
+    for kind in _available_backends():
+        directory = tempfile.mkdtemp()
+        try:
+            backend = open_backend(kind, os.path.join(directory, f"conformance.{kind}"))
+            check_backend(backend)
+            backend.close()
+            print(f"{kind}: conformance checks passed")
+        finally:
+            shutil.rmtree(directory)
+
+def test_unknown_backend():
+    try:
+        open_backend("postgres")
+    except ValueError as e:
+        assert "postgres" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+if __name__ == "__main__":
+    test_backends_conformance()
+    test_unknown_backend()
+    print("Storage backend tests completed.")
@@ -1,5 +1,6 @@
 from strategy_executor import StrategyExecutor, MockBrokerAPI, RiskManager
 import time
+from datetime import datetime
 
 def test_strategy_executor():
     """Test the strategy executor functionality."""
@@ -202,11 +203,32 @@ def test_integration():
     print(f"Success rate: {metrics['success_rate']:.2%}")
     print(f"Strategy breakdown: {metrics['strategy_breakdown']}")
 
+def test_execution_history_pages():
+    executor = StrategyExecutor(initial_capital=100000.0)
+    for symbol in ("AAPL", "MSFT", "GOOGL", "TSLA", "NVDA"):
+        result = executor.execute_signal({"symbol": symbol, "action": "buy", "quantity": 1, "price": 100.0,
+                                          "strategy": "test"})
+        assert result["success"]
+
+    first = executor.get_execution_history(limit=2)
+    assert [record["signal"]["symbol"] for record in first] == ["NVDA", "TSLA"]
+    second = executor.get_execution_history(before=first[-1]["seq"], limit=2)
+    assert [record["signal"]["symbol"] for record in second] == ["GOOGL", "MSFT"]
+    last = executor.get_execution_history(before=second[-1]["seq"], limit=2)
+    assert [record["seq"] for record in last] == [1]
+
+    compact = executor.get_execution_history(limit=1, compact=True)[0]
+    assert compact["symbol"] == "NVDA" and compact["side"] == "buy" and compact["status"] == "filled"
+    assert "signal" not in compact
+    since = datetime.fromisoformat(first[0]["timestamp"])
+    assert all(record["timestamp"] >= first[0]["timestamp"] for record in executor.get_execution_history(since=since))
+
 if __name__ == "__main__":
     test_strategy_executor()
     test_risk_manager()
     test_mock_broker()
     test_integration()
+    test_execution_history_pages()
     
     print("\n" + "="*50)
     print("Strategy executor testing completed!")
@@ -1,30 +1,55 @@
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Callable
 from api_connectors import YahooFinanceAPI, CoinGeckoAPI
-from data_storage import DataStorage
+from async_connectors import ConcurrentConnectors
+from data_storage import DataStorage, INTERVAL_SECONDS
 from sentiment_analyzer import SentimentAnalyzer
 from social_crawler import SocialCrawler
 from alert_system import AlertSystem
+from history_cache import HistoryCache
+from history_codec import to_epoch_seconds
 
 class TriggerEngine:
-    def __init__(self, db_name: str = 'wealthflow.db'):
+    def __init__(self, db_name: str = 'wealthflow.db', parallel: bool = False,
+                 history_cache=None, history_interval: str = None, history_days: int = 30,
+                 db: DataStorage = None, alert_system: AlertSystem = None,
+                 sentiment_analyzer: SentimentAnalyzer = None, yf_api: YahooFinanceAPI = None,
+                 cg_api: CoinGeckoAPI = None):
         """
         Initialize the trigger engine.
         
         Args:
             db_name: Database name for data storage
+            parallel: Run the stock, crypto and sentiment checks that are due
+                      concurrently instead of one after another
+            history_cache: HistoryCache (or its directory) filled by the DataCollector;
+                           symbols found in it are checked on its memory-mapped columns
+            history_interval: Bar interval read from the history cache. By default
+                              the finest interval the cache holds for each symbol,
+                              i.e. whatever the DataCollector wrote ("1d" for stock
+                              histories, "5m" for CoinGecko market charts)
+            history_days: Days of cached bars the detectors look at
+            db, alert_system, sentiment_analyzer, yf_api, cg_api: Shared instances
+                to use instead of creating new ones (e.g. from a ComponentRegistry)
         """
-        self.db = DataStorage(db_name)
-        self.yf_api = YahooFinanceAPI()
-        self.cg_api = CoinGeckoAPI()
-        self.sentiment_analyzer = SentimentAnalyzer()
+        self.db = db or DataStorage(db_name)
+        self.history_cache = HistoryCache(history_cache) if isinstance(history_cache, str) else history_cache
+        self.history_interval = history_interval
+        self.history_days = history_days
+        self.yf_api = yf_api or YahooFinanceAPI()
+        self.cg_api = cg_api or CoinGeckoAPI()
+        self.connectors = ConcurrentConnectors(self.yf_api, self.cg_api)
+        self.sentiment_analyzer = sentiment_analyzer or SentimentAnalyzer()
         self.social_crawler = SocialCrawler()
-        self.alert_system = AlertSystem()
+        self.alert_system = alert_system or AlertSystem()
         
         self.running = False
         self.monitoring_thread = None
+        self.parallel = parallel
+        self.executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="trigger") if parallel else None
         
         # Assets to monitor
         self.monitored_stocks = ["AAPL", "GOOGL", "MSFT", "TSLA", "NVDA"]
@@ -65,20 +90,20 @@ class TriggerEngine:
             try:
                 current_time = datetime.now()
                 
+                due_checks = []
                 # Check stocks
                 if (current_time - self.last_stock_check).total_seconds() >= self.stock_check_interval:
-                    self._check_stock_triggers()
-                    self.last_stock_check = current_time
+                    due_checks.append(("last_stock_check", self._check_stock_triggers))
                 
                 # Check cryptos
                 if (current_time - self.last_crypto_check).total_seconds() >= self.crypto_check_interval:
-                    self._check_crypto_triggers()
-                    self.last_crypto_check = current_time
+                    due_checks.append(("last_crypto_check", self._check_crypto_triggers))
                 
                 # Check sentiment
                 if (current_time - self.last_sentiment_check).total_seconds() >= self.sentiment_check_interval:
-                    self._check_sentiment_triggers()
-                    self.last_sentiment_check = current_time
+                    due_checks.append(("last_sentiment_check", self._check_sentiment_triggers))
+                
+                self._run_checks(due_checks, current_time)
                 
                 # Sleep for a short interval before next check
                 time.sleep(30)  # Check every 30 seconds
@@ -87,19 +112,50 @@ class TriggerEngine:
                 print(f"Error in monitoring loop: {e}")
                 time.sleep(60)  # Wait longer on error
     
+    def _run_checks(self, due_checks, current_time: datetime):
+        """Run the due checks, concurrently when parallel monitoring is enabled."""
+        if self.executor is None:
+            for attribute, check in due_checks:
+                check()
+                setattr(self, attribute, current_time)
+            return
+        
+        # The checks only share thread-safe state: DataStorage (per-thread readers,
+        # locked writer), the rate-limited connectors and the response cache
+        futures = [(attribute, self.executor.submit(check)) for attribute, check in due_checks]
+        for attribute, future in futures:
+            try:
+                future.result()
+                setattr(self, attribute, current_time)
+            except Exception as e:
+                print(f"Error in {attribute.replace('last_', '').replace('_', ' ')}: {e}")
+    
     def _check_stock_triggers(self):
         """Check triggers for monitored stocks."""
         print(f"Checking stock triggers at {datetime.now()}")
         
-        for ticker in self.monitored_stocks:
+        # Copy the watchlist: API requests may add or remove assets meanwhile
+        monitored_stocks = list(self.monitored_stocks)
+        
+        # Stocks with cached bars are checked on the cache's arrays
+        monitored_stocks = [ticker for ticker in monitored_stocks if not self._check_cached_history(ticker)]
+        if not monitored_stocks:
+            return
+        
+        # Get current data for the other stocks in one bulk download
+        stocks_data = self.yf_api.get_stocks_data(monitored_stocks)
+        # and their stored daily bars in one query, without the bar being traded now
+        current_bars = {ticker: self._current_bar_ts(data) for ticker, data in stocks_data.items()}
+        stocks_history = self._get_historical_stocks_data(monitored_stocks, days=30, current_bars=current_bars)
+        
+        for ticker in monitored_stocks:
             try:
-                # Get current data
-                current_data = self.yf_api.get_stock_data(ticker)
+                current_data = stocks_data.get(ticker, {"error": "No data returned"})
                 if "error" in current_data:
                     continue
                 
                 # Get historical data from database
-                historical_data = self._get_historical_stock_data(ticker, days=30)
+                historical_data = stocks_history.get(ticker, [])
                 
                 if not historical_data:
                     continue
@@ -138,15 +194,24 @@ class TriggerEngine:
         """Check triggers for monitored cryptocurrencies."""
         print(f"Checking crypto triggers at {datetime.now()}")
         
-        for coin_id in self.monitored_cryptos:
+        # Get current prices for the whole watchlist in batched requests
+        monitored_cryptos = list(self.monitored_cryptos)
+        current_prices = self.cg_api.get_coin_prices(monitored_cryptos)
+        if "error" in current_prices:
+            print(f"Error fetching crypto prices: {current_prices['error']}")
+            return
+        
+        # Fetch market charts concurrently for the priced coins that are not in the history cache
+        priced_coins = [
+            coin_id for coin_id in monitored_cryptos
+            if coin_id in current_prices and not self._check_cached_history(coin_id)
+        ]
+        market_charts = self.connectors.get_coin_market_charts(priced_coins, days="7")
+        
+        for coin_id in priced_coins:
             try:
-                # Get current price data
-                current_price = self.cg_api.get_coin_price(coin_id)
-                if "error" in current_price:
-                    continue
-                
                 # Get market chart data
-                market_chart = self.cg_api.get_coin_market_chart(coin_id, days="7")
+                market_chart = market_charts[coin_id]
                 if "error" in market_chart:
                     continue
                 
@@ -231,11 +296,88 @@ class TriggerEngine:
             except Exception as e:
                 print(f"Error checking sentiment for {asset}: {e}")
     
+    def _check_cached_history(self, symbol: str) -> bool:
+        """
+        Run the volume and pump/dump checks on the cached close/volume columns.
+        
+        The columns are memory-mapped views, so a month of minute bars is
+        checked without building a Python float per bar. The last bar is the
+        current one and is compared against the bars before it.
+        
+        Returns:
+            False if the cache holds no bars for the symbol
+        """
+        if self.history_cache is None:
+            return False
+        interval = self.history_interval or self._cached_interval(symbol)
+        if interval is None:
+            return False
+        with self.history_cache.window(symbol, interval, self.history_days * 86400) as view:
+            if len(view) < 2:
+                return False
+            closes, volumes = view["close"], view["volume"]
+            
+            volume_result = self.alert_system.detect_volume_anomaly(volumes[len(volumes) - 1], volumes[:len(volumes) - 1])
+            if volume_result["anomaly_detected"]:
+                alert = self.alert_system.generate_alert("volume_anomaly", symbol, volume_result, "high")
+                print(f"Volume anomaly alert: {alert['message']}")
+            
+            pump_dump_result = self.alert_system.detect_pump_and_dump_arrays(closes, volumes)
+            if pump_dump_result["pattern_detected"]:
+                urgency = "high" if pump_dump_result["pump_detected"] else "medium"
+                alert = self.alert_system.generate_alert("pump_dump", symbol, pump_dump_result, urgency)
+                print(f"Pump/dump alert: {alert['message']}")
+        return True
+    
+    def _cached_interval(self, symbol: str):
+        """Finest bar interval the history cache holds for a symbol, or None."""
+        intervals = self.history_cache.intervals(symbol)
+        if not intervals:
+            return None
+        return min(intervals, key=lambda interval: INTERVAL_SECONDS.get(interval, float("inf")))
+    
     def _get_historical_stock_data(self, ticker: str, days: int = 30) -> List[Dict[str, Any]]:
         """Get historical stock data from database."""
-        # This is a simplified version - in a real implementation,
-        # you would query the database for historical data
-        return []
+        return self._get_historical_stocks_data([ticker], days)[ticker]
+    
+    def _get_historical_stocks_data(self, tickers: List[str], days: int = 30,
+                                    current_bars: Dict[str, int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the last `days` of daily bars for many tickers in one query.
+        
+        The bar of the current day is left out so the live values are compared
+        against completed days only. It is the bar stamped with the live data's
+        timestamp when that is known (daily bars are stamped at the exchange's
+        midnight, e.g. 04:00 UTC), otherwise any bar whose day has not ended.
+        
+        Args:
+            tickers: Tickers to read
+            days: Days of bars to read
+            current_bars: {ticker: epoch seconds of the bar the live data belongs to}
+        
+        Returns:
+            {ticker: [{"ts", "open", "high", "low", "close", "volume"}, ...]} oldest first
+        """
+        now = time.time()
+        current_bars = current_bars or {}
+        bars = self.db.get_bars(tickers, start=now - days * 86400, end=now, interval="1d")
+        history = {}
+        for ticker in tickers:
+            records = bars[ticker].records()
+            current = current_bars.get(ticker)
+            if current is not None:
+                records = [bar for bar in records if bar["ts"] < current]
+            else:
+                records = [bar for bar in records if bar["ts"] <= now - 86400]
+            history[ticker] = records
+        return history
+    
+    def _current_bar_ts(self, stock_data: Dict[str, Any]):
+        """Epoch seconds of the latest bar in live stock data, or None."""
+        closes = stock_data.get("history", {}).get("Close") if "error" not in stock_data else None
+        if not closes:
+            return None
+        return max(to_epoch_seconds(ts) for ts in closes)
     
     def _extract_current_volume(self, stock_data: Dict[str, Any]) -> float:
         """Extract current volume from stock data."""
@@ -251,9 +393,10 @@ class TriggerEngine:
     
     def _format_price_history(self, historical_data: List[Dict[str, Any]]) -> List[Dict[str, float]]:
         """Format historical data for pump/dump detection."""
-        # This is a placeholder - in a real implementation,
-        # you would format the actual historical data
-        return []
+        return [
+            {"close": bar["close"], "timestamp": bar["ts"]}
+            for bar in historical_data if bar.get("close") is not None
+        ]
     
     def add_monitored_asset(self, asset_type: str, asset_name: str):
         """Add an asset to monitoring list."""
@@ -277,6 +420,7 @@ class TriggerEngine:
         """Get current monitoring status."""
         return {
             "running": self.running,
+            "parallel": self.parallel,
             "monitored_stocks": self.monitored_stocks,
             "monitored_cryptos": self.monitored_cryptos,
             "last_checks": {
@@ -12,12 +12,13 @@ Executado a cada 5 minutos em produção.
 import json
 import time
 import random
-import sqlite3
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import requests
 from dataclasses import dataclass
 import logging
+from retention import RetentionManager, SAAS_TABLES
+from storage_backends import open_backend
 
 # Configurar logging
 logging.basicConfig(
@@ -79,11 +80,15 @@ class Affiliate:
 class WealthFlowWorkflow:
     """Simulador do fluxo de trabalho WealthFlow SaaS"""
     
-    def __init__(self):
-        self.db_path = "wealthflow_saas.db"
-        self.init_database()
+    def __init__(self, db_path: str = "wealthflow_saas.db", backend: str = "sqlite"):
+        self.db_path = db_path
+        # Backend de armazenamento: "sqlite" (produção) ou "duckdb" (agregações analíticas)
+        self.storage = open_backend(backend, db_path)
         self.load_sample_data()
         
+        # Agrega market_data em barras 1m/5m/1h/1d e remove dados expirados (só SQLite)
+        self.retention = RetentionManager(self.db_path, raw_tables=SAAS_TABLES) if backend == "sqlite" else None
+        
         # Configurações de comissão por tipo de sinal
         self.commission_rates = {
             "OURO": 5.0,    # €5 por sinal ouro
@@ -97,87 +102,10 @@ class WealthFlowWorkflow:
             "BTC", "ETH", "ADA", "SOL", "DOGE"
         ]
         
-    def init_database(self):
-        """Inicializa o banco de dados SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabela de usuários
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                email TEXT PRIMARY KEY,
-                package TEXT NOT NULL,
-                affiliate_code TEXT,
-                telegram_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de afiliados
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS affiliates (
-                code TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                commission_rate REAL DEFAULT 0.20,
-                total_earned REAL DEFAULT 0.0,
-                users_referred INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de sinais
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS signals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                type TEXT NOT NULL,
-                symbol TEXT NOT NULL,
-                price REAL NOT NULL,
-                reason TEXT,
-                commission_value REAL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de comissões
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS commissions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                affiliate_code TEXT NOT NULL,
-                user_email TEXT NOT NULL,
-                signal_type TEXT NOT NULL,
-                commission_amount REAL NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (affiliate_code) REFERENCES affiliates (code),
-                FOREIGN KEY (user_email) REFERENCES users (email)
-            )
-        ''')
-        
-        # Tabela de dados de mercado
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS market_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                symbol TEXT NOT NULL,
-                price REAL NOT NULL,
-                volume INTEGER NOT NULL,
-                rsi REAL NOT NULL,
-                volume_avg_30min INTEGER NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        logger.info("Database initialized successfully")
-    
     def load_sample_data(self):
         """Carrega dados de exemplo para simulação"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Verificar se já existem dados
-        cursor.execute("SELECT COUNT(*) FROM users")
-        if cursor.fetchone()[0] > 0:
-            conn.close()
+        if self.storage.count_users() > 0:
             return
         
         # Afiliados de exemplo
@@ -188,10 +116,7 @@ class WealthFlowWorkflow:
             ("AFF004", "Ana Oliveira", 0.30, 0.0, 0)
         ]
         
-        cursor.executemany('''
-            INSERT INTO affiliates (code, name, commission_rate, total_earned, users_referred)
-            VALUES (?, ?, ?, ?, ?)
-        ''', affiliates)
+        self.storage.add_affiliates(affiliates)
         
         # Usuários de exemplo
         users = [
@@ -205,21 +130,8 @@ class WealthFlowWorkflow:
             ("user8@email.com", "PREMIUM", "AFF004", "654987321")
         ]
         
-        cursor.executemany('''
-            INSERT INTO users (email, package, affiliate_code, telegram_id)
-            VALUES (?, ?, ?, ?)
-        ''', users)
-        
-        # Atualizar contadores de afiliados
-        cursor.execute('''
-            UPDATE affiliates 
-            SET users_referred = (
-                SELECT COUNT(*) FROM users WHERE users.affiliate_code = affiliates.code
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        # Também atualiza os contadores de afiliados
+        self.storage.add_users(users)
         logger.info("Sample data loaded successfully")
     
     def fetch_market_data(self) -> List[MarketData]:
@@ -276,17 +188,8 @@ class WealthFlowWorkflow:
     
     def save_market_data(self, data: MarketData):
         """Salva dados de mercado no banco"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO market_data (symbol, price, volume, rsi, volume_avg_30min, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (data.symbol, data.price, data.volume, data.rsi, 
-              data.volume_avg_30min, data.timestamp))
-        
-        conn.commit()
-        conn.close()
+        self.storage.save_market_data([(data.symbol, data.price, data.volume, data.rsi,
+                                        data.volume_avg_30min, data.timestamp)])
     
     def fetch_social_sentiment(self) -> SentimentData:
         """
@@ -392,74 +295,30 @@ class WealthFlowWorkflow:
     
     def save_signal(self, signal: Signal):
         """Salva sinal no banco"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO signals (type, symbol, price, reason, commission_value, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (signal.type, signal.symbol, signal.price, signal.reason, 
-              signal.commission_value, signal.timestamp))
-        
-        conn.commit()
-        conn.close()
+        self.storage.save_signals([(signal.type, signal.symbol, signal.price, signal.reason,
+                                    signal.commission_value, signal.timestamp)])
     
     def get_users_by_package(self, package: str) -> List[User]:
         """Busca usuários por pacote"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT email, package, affiliate_code, telegram_id
-            FROM users WHERE package = ?
-        ''', (package,))
-        
-        users = []
-        for row in cursor.fetchall():
-            users.append(User(
-                email=row[0],
-                package=row[1],
-                affiliate_code=row[2],
-                telegram_id=row[3]
-            ))
-        
-        conn.close()
-        return users
+        return [
+            User(email=row[0], package=row[1], affiliate_code=row[2], telegram_id=row[3])
+            for row in self.storage.get_users_by_package(package)
+        ]
     
     def process_commissions(self, signal: Signal, users: List[User]):
         """Processa comissões para afiliados"""
         logger.info(f"Processing commissions for {signal.type} signal ({len(users)} users)")
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Taxas de comissão de todos os afiliados numa só consulta
+        rates = self.storage.get_commission_rates(user.affiliate_code for user in users)
         
-        for user in users:
-            if user.affiliate_code:
-                # Buscar taxa de comissão do afiliado
-                cursor.execute('''
-                    SELECT commission_rate FROM affiliates WHERE code = ?
-                ''', (user.affiliate_code,))
-                
-                result = cursor.fetchone()
-                if result:
-                    commission_rate = result[0]
-                    commission_amount = signal.commission_value * commission_rate
-                    
-                    # Registrar comissão
-                    cursor.execute('''
-                        INSERT INTO commissions (affiliate_code, user_email, signal_type, commission_amount)
-                        VALUES (?, ?, ?, ?)
-                    ''', (user.affiliate_code, user.email, signal.type, commission_amount))
-                    
-                    # Atualizar total do afiliado
-                    cursor.execute('''
-                        UPDATE affiliates 
-                        SET total_earned = total_earned + ?
-                        WHERE code = ?
-                    ''', (commission_amount, user.affiliate_code))
-        
-        conn.commit()
-        conn.close()
+        commissions = [
+            (user.affiliate_code, user.email, signal.type, signal.commission_value * rates[user.affiliate_code])
+            for user in users if user.affiliate_code in rates
+        ]
+        
+        # Registrar comissões e atualizar totais dos afiliados numa transação
+        self.storage.record_commissions(commissions)
     
     def distribute_signals(self, signals: List[Signal]):
         """Distribui sinais para usuários baseado no tipo de pacote"""
@@ -550,38 +409,15 @@ class WealthFlowWorkflow:
         """Atualiza estatísticas dos afiliados"""
         logger.info("Updating affiliate statistics...")
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Buscar estatísticas atualizadas
-        cursor.execute('''
-            SELECT 
-                a.code,
-                a.name,
-                a.total_earned,
-                a.users_referred,
-                COUNT(c.id) as total_commissions,
-                SUM(c.commission_amount) as total_commission_amount
-            FROM affiliates a
-            LEFT JOIN commissions c ON a.code = c.affiliate_code
-            GROUP BY a.code, a.name, a.total_earned, a.users_referred
-        ''')
-        
-        stats = cursor.fetchall()
-        
-        for stat in stats:
-            code, name, total_earned, users_referred, total_commissions, commission_sum = stat
-            commission_sum = commission_sum or 0.0
-            
+        for stat in self.storage.affiliate_stats():
             logger.info(f"""
-📊 Afiliado: {name} ({code})
-👥 Usuários Referidos: {users_referred}
-💰 Total Ganho: €{total_earned:.2f}
-📈 Comissões Hoje: {total_commissions}
-💵 Valor Comissões: €{commission_sum:.2f}
+📊 Afiliado: {stat['name']} ({stat['code']})
+👥 Usuários Referidos: {stat['users_referred']}
+💰 Total Ganho: €{stat['total_earned']:.2f}
+📈 Comissões Hoje: {stat['total_commissions']}
+💵 Valor Comissões: €{stat['commission_amount']:.2f}
             """.strip())
-        
-        conn.close()
     
     def generate_workflow_report(self, signals: List[Signal], sentiment: SentimentData) -> str:
         """Gera relatório do fluxo de trabalho"""
@@ -637,7 +473,12 @@ class WealthFlowWorkflow:
             # 5. Atualizar estatísticas de afiliados
             self.update_affiliate_stats()
             
-            # 6. Gerar relatório
+            # 6. Compactar dados de mercado (limitado para não atrasar o próximo ciclo)
+            if self.retention is not None:
+                retention_summary = self.retention.run(time_budget=10.0)
+                logger.info(f"Retention: {retention_summary}")
+            
+            # 7. Gerar relatório
             report = self.generate_workflow_report(signals, sentiment)
             logger.info(report)
             